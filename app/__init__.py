@@ -4,9 +4,12 @@ Flask应用工厂
 from flask import Flask, render_template
 from flask_cors import CORS
 from config import config
-from app.extensions import db, jwt, migrate
+from app.extensions import db, jwt, migrate, cache
 from app.middleware.error_handler import register_error_handlers
+from app.commands import register_commands
 from app.utils.response import success_response
+from app.utils.query_counter import init_query_counter
+from app.utils.json_provider import FastJSONProvider
 import logging
 import os
 
@@ -22,6 +25,9 @@ def create_app(config_name='default'):
     # 加载配置
     app.config.from_object(config[config_name])
     
+    # JSON编解码（Decimal/日期统一转换，优先使用orjson）
+    app.json = FastJSONProvider(app)
+    
     # 初始化扩展
     init_extensions(app)
     
@@ -31,12 +37,20 @@ def create_app(config_name='default'):
     # 注册错误处理器
     register_error_handlers(app)
     
+    # 注册命令行工具
+    register_commands(app)
+    
     # 配置CORS
     CORS(app, resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}})
     
     # 配置日志
     setup_logging(app)
     
+    # 预热教材搜索索引
+    if app.config.get('TEXTBOOK_SEARCH_INDEX') and app.config.get('TEXTBOOK_SEARCH_INDEX_WARMUP'):
+        from app.dao.textbook_dao import warm_search_index
+        warm_search_index(app)
+    
     # 前端路由
     @app.route('/')
     def index():
@@ -75,6 +89,8 @@ def init_extensions(app):
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+    init_query_counter(app)
 
 
 def register_blueprints(app):
@@ -6,7 +6,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api.v1 import api_v1
 from app.services.auth_service import AuthService
 from app.schemas.user_schema import LoginSchema, UserSchema
-from app.utils.response import success_response, error_response
+from app.utils.response import success_response, error_response, page_response
+from app.utils.helpers import get_pagination_params
 from marshmallow import ValidationError
 
 
@@ -71,7 +72,11 @@ def get_current_user():
 @api_v1.route('/auth/users', methods=['GET'])
 @jwt_required()
 def get_users():
-    """获取用户列表（用于订购人下拉选择）"""
+    """
+    获取用户列表（用于订购人下拉选择，数据来自内存中的用户目录）
+    - keyword：用户名或姓名前缀
+    - 传入 page 或 per_page 时分页返回，否则返回全部
+    """
     try:
         from flask_jwt_extended import get_jwt
         from app.dao.user_dao import UserDAO
@@ -81,40 +86,38 @@ def get_users():
         # 注意：JWT的sub存储的是user_id，username在additional_claims中
         current_username = current_user.get('username')
         
-        user_dao = UserDAO()
-        
         # 根据角色返回不同的用户列表
         if user_role in ['管理员', '仓库管理员']:
             # 管理员和仓库管理员可以看到所有用户
-            users = user_dao.get_all_users()
+            roles, pin_username = None, None
         elif user_role == '教师':
-            # 教师可以看到自己和普通用户
-            normal_users = user_dao.get_users_by_role('普通用户')
-            current_user_obj = user_dao.find_by_username(current_username)
-            # 确保自己在列表前面，并避免重复
-            users = []
-            if current_user_obj:
-                users.append(current_user_obj)
-            for u in normal_users:
-                if u.username != current_username:  # 避免重复
-                    users.append(u)
+            # 教师可以看到自己（置顶）和普通用户
+            roles, pin_username = ['普通用户'], current_username
         else:
             # 普通用户只能看到自己
-            current_user_obj = user_dao.find_by_username(current_username)
-            users = [current_user_obj] if current_user_obj else []
+            roles, pin_username = [], current_username
+        
+        paginate = 'page' in request.args or 'per_page' in request.args
+        page, per_page = get_pagination_params()
+        page_result = UserDAO().search_directory(
+            prefix=request.args.get('keyword'),
+            roles=roles,
+            pin_username=pin_username,
+            page=page,
+            per_page=per_page if paginate else None
+        )
         
         # 格式化返回数据
-        user_list = []
-        for user in users:
-            if user:
-                user_list.append({
-                    'user_id': user.user_id,
-                    'username': user.username,
-                    'real_name': user.real_name,
-                    'role': user.role,
-                    'department': user.department
-                })
+        user_list = [{
+            'user_id': user['user_id'],
+            'username': user['username'],
+            'real_name': user['real_name'],
+            'role': user['role'],
+            'department': user['department']
+        } for user in page_result.items]
         
+        if paginate:
+            return page_response(page_result.with_items(user_list), page, per_page)
         return success_response(data=user_list)
     except Exception as e:
         return error_response(message=str(e))
@@ -5,39 +5,48 @@ from flask import request
 from flask_jwt_extended import jwt_required
 from app.api.v1 import api_v1
 from app.dao.publisher_dao import PublisherDAO
-from app.schemas.publisher_schema import PublisherSchema, PublisherUpdateSchema
-from app.utils.response import success_response, error_response, paginated_response
-from app.utils.helpers import get_pagination_params
-from app.utils.decorators import admin_required
+from app.services.import_service import ImportService
+from app.schemas.publisher_schema import PublisherSchema, PublisherUpdateSchema, PublisherBatchUpdateSchema
+from app.utils.response import success_response, error_response, page_response, bulk_response
+from app.utils.helpers import get_pagination_params, get_cursor_param, get_count_policy, run_batch, get_batch_body
+from app.utils.decorators import admin_required, conditional_get
+from app.models.publisher import Publisher
 from marshmallow import ValidationError
 
 
 publisher_dao = PublisherDAO()
+import_service = ImportService()
 
 
 @api_v1.route('/publishers', methods=['GET'])
 @jwt_required()
+@conditional_get('publisher')
 def get_publishers():
     """获取出版社列表（所有登录用户可查看）"""
     try:
         page, per_page = get_pagination_params()
+        cursor = get_cursor_param()
+        count_policy = get_count_policy()
         keyword = request.args.get('keyword')
         
         if keyword:
-            items, total = publisher_dao.search_by_keyword(keyword, page, per_page)
+            page_result = publisher_dao.search_by_keyword(keyword, page, per_page, cursor=cursor,
+                                                          count_policy=count_policy)
         else:
-            items, total = publisher_dao.paginate(page=page, per_page=per_page, filters={'status': 1})
+            page_result = publisher_dao.paginate(page=page, per_page=per_page, filters={'status': 1},
+                                                 cursor=cursor, count_policy=count_policy)
         
         schema = PublisherSchema(many=True)
-        result = schema.dump(items)
+        result = schema.dump(page_result.items)
         
-        return paginated_response(result, total, page, per_page)
+        return page_response(page_result.with_items(result), page, per_page)
     except Exception as e:
         return error_response(message=str(e))
 
 
 @api_v1.route('/publishers/<int:publisher_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('publisher', row=(Publisher, 'publisher_id'))
 def get_publisher(publisher_id):
     """获取出版社详情（所有登录用户可查看）"""
     try:
@@ -68,6 +77,59 @@ def create_publisher():
         return error_response(message=str(e))
 
 
+@api_v1.route('/publishers/batch', methods=['POST'])
+@jwt_required()
+@admin_required
+def batch_create_publishers():
+    """
+    批量创建出版社（仅管理员）
+    请求体：{"items": [...], "mode": "create" | "upsert"}，upsert 按出版社名称更新已存在的出版社
+    """
+    try:
+        data = get_batch_body()
+        write = publisher_dao.upsert_many if data.get('mode') == 'upsert' else publisher_dao.create_many
+        results = run_batch(data.get('items'), PublisherSchema(), write)
+        return bulk_response(results)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/publishers/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def import_publishers():
+    """
+    导入出版社目录（仅管理员）
+    multipart/form-data：file 为CSV或XLSX文件，mode 为 create（默认）或 upsert
+    """
+    try:
+        upload = request.files.get('file')
+        if not upload:
+            return error_response(message='请上传文件')
+        report = import_service.import_publishers(
+            upload.stream, upload.filename, mode=request.form.get('mode', 'create')
+        )
+        return success_response(data=report, message='导入完成')
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/publishers/batch', methods=['PUT'])
+@jwt_required()
+@admin_required
+def batch_update_publishers():
+    """
+    批量更新出版社（仅管理员）
+    请求体：{"items": [{"publisher_id": 1, "contact_phone": "..."}, ...]}
+    """
+    try:
+        data = get_batch_body()
+        results = run_batch(data.get('items'), PublisherBatchUpdateSchema(), publisher_dao.update_many)
+        return bulk_response(results)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
 @api_v1.route('/publishers/<int:publisher_id>', methods=['PUT'])
 @jwt_required()
 @admin_required
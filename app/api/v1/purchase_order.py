@@ -1,22 +1,40 @@
 """
 订购API
 """
-from flask import request
+from flask import request, current_app
 from flask_jwt_extended import jwt_required, get_jwt
 from app.api.v1 import api_v1
 from app.services.purchase_service import PurchaseService
 from app.schemas.purchase_order_schema import PurchaseOrderSchema, PurchaseOrderUpdateSchema
-from app.utils.response import success_response, error_response, paginated_response
-from app.utils.helpers import get_pagination_params
-from app.utils.decorators import teacher_required, warehouse_required
+from app.utils.response import success_response, error_response, page_response, bulk_response
+from app.utils.exceptions import BusinessException
+from app.utils.helpers import get_pagination_params, get_cursor_param, get_count_policy
+from app.utils.decorators import teacher_required, warehouse_required, conditional_get
+from app.utils.export import export_response, model_columns
+from app.models.purchase_order import PurchaseOrder
 from marshmallow import ValidationError
 
 
 purchase_service = PurchaseService()
 
 
+def _visibility_filters(role, username):
+    """
+    按角色生成订单数据权限过滤条件
+    - 管理员和仓库管理员：不设限制
+    - 教师：order_person是自己或普通用户
+    - 普通用户：order_person是自己
+    """
+    if role == '普通用户':
+        return {'order_person': username}
+    if role == '教师':
+        return {'current_username': username, 'allowed_roles': ['教师', '普通用户']}
+    return {}
+
+
 @api_v1.route('/purchase-orders', methods=['GET'])
 @jwt_required()
+@conditional_get('purchase_order', 'textbook', 'user')
 def get_purchase_orders():
     """
     获取订单列表
@@ -31,42 +49,55 @@ def get_purchase_orders():
         username = current_user.get('username')
         
         page, per_page = get_pagination_params()
+        cursor = get_cursor_param()
+        count_policy = get_count_policy()
         status = request.args.get('status')
         keyword = request.args.get('keyword')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        # 数据权限过滤
-        order_person = None
-        allowed_roles = None
-        if role == '普通用户':
-            # 普通用户只能查看order_person是自己的订单
-            order_person = username
-        elif role == '教师':
-            # 教师可以查看order_person是自己或普通用户的订单
-            # 这里需要特殊处理，传递allowed_roles参数
-            allowed_roles = ['教师', '普通用户']
-        # 管理员和仓库管理员不设限制，可以看到所有订单
-        
-        items, total = purchase_service.get_order_list(
+        result = purchase_service.get_order_list(
             page=page,
             per_page=per_page,
             status=status,
             start_date=start_date,
             end_date=end_date,
             keyword=keyword,
-            order_person=order_person,
-            current_username=username if role == '教师' else None,
-            allowed_roles=allowed_roles
+            cursor=cursor,
+            count_policy=count_policy,
+            **_visibility_filters(role, username)  # 数据权限过滤
         )
         
-        return paginated_response(items, total, page, per_page)
+        return page_response(result, page, per_page)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/purchase-orders/export', methods=['GET'])
+@jwt_required()
+def export_purchase_orders():
+    """
+    导出订单（CSV或NDJSON，流式输出）
+    查询参数与订单列表相同，format 为 csv（默认）或 ndjson；数据权限与订单列表一致
+    """
+    try:
+        current_user = get_jwt()
+        rows = purchase_service.iter_orders(
+            status=request.args.get('status'),
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date'),
+            keyword=request.args.get('keyword'),
+            **_visibility_filters(current_user.get('role'), current_user.get('username'))
+        )
+        return export_response(rows, model_columns(PurchaseOrder, ('textbook_name', 'isbn')),
+                               'purchase_orders', request.args.get('format', 'csv'))
     except Exception as e:
         return error_response(message=str(e))
 
 
 @api_v1.route('/purchase-orders/<int:order_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('purchase_order', 'textbook', 'user', row=(PurchaseOrder, 'order_id'))
 def get_purchase_order(order_id):
     """
     获取订单详情
@@ -80,25 +111,20 @@ def get_purchase_order(order_id):
         # 注意：JWT的sub存储的是user_id，username在additional_claims中
         username = current_user.get('username')
         
+        if role == '教师':
+            # 教师只能查看order_person是自己或普通用户的订单（可见性与订单一并查出）
+            result, visible = purchase_service.get_order_detail_for_teacher(order_id, username)
+            if not visible:
+                return error_response(message='教师只能查看订购人是自己或普通用户的订单', code=403)
+            return success_response(data=result)
+        
         result = purchase_service.get_order_detail(order_id)
         
         # 数据权限检查
-        if role not in ['管理员', '仓库管理员']:
-            order_person = result.get('order_person')
-            
-            if role == '普通用户':
-                # 普通用户只能查看order_person是自己的订单
-                if order_person != username:
-                    return error_response(message='您只能查看订购人是自己的订单', code=403)
-            elif role == '教师':
-                # 教师只能查看order_person是自己或普通用户的订单
-                # 需要检查订购人的角色
-                from app.dao.user_dao import UserDAO
-                user_dao = UserDAO()
-                target_user = user_dao.find_by_username(order_person)
-                
-                if order_person != username and (not target_user or target_user.role != '普通用户'):
-                    return error_response(message='教师只能查看订购人是自己或普通用户的订单', code=403)
+        if role == '普通用户':
+            # 普通用户只能查看order_person是自己的订单
+            if result.get('order_person') != username:
+                return error_response(message='您只能查看订购人是自己的订单', code=403)
         
         return success_response(data=result)
     except Exception as e:
@@ -121,10 +147,9 @@ def create_purchase_order():
         # 权限检查：确保用户只能为有权限的人创建订单
         order_person = data.get('order_person')
         
-        # 验证订购人是否合法
+        # 验证订购人是否合法（查内存中的用户目录）
         from app.dao.user_dao import UserDAO
-        user_dao = UserDAO()
-        target_user = user_dao.find_by_username(order_person)
+        target_user = UserDAO().get_directory().get(order_person)
         
         if not target_user:
             return error_response(message='订购人不存在', code=400)
@@ -136,7 +161,7 @@ def create_purchase_order():
                 return error_response(message='普通用户只能为自己创建订单', code=403)
         elif role == '教师':
             # 教师只能为自己或普通用户创建订单
-            if order_person != username and target_user.role != '普通用户':
+            if order_person != username and target_user['role'] != '普通用户':
                 return error_response(message='教师只能为自己或普通用户创建订单', code=403)
         # 管理员和仓库管理员可以为任何人创建订单，无需额外检查
         
@@ -209,49 +234,36 @@ def deliver_purchase_order(order_id):
     - 发放后：库存扣减已到货数量，订单状态变为"已发放"
     """
     try:
-        from flask_jwt_extended import get_jwt
-        from app.dao.purchase_order_dao import PurchaseOrderDAO
-        from app.extensions import db
-        
-        current_user = get_jwt()
-        username = current_user.get('username')
-        
-        # 获取订单信息
-        purchase_dao = PurchaseOrderDAO()
-        order = purchase_dao.get_by_id(order_id)
-        
-        if not order:
-            return error_response(message='订单不存在', code=404)
-        
-        if order.order_status != '已到货':
-            return error_response(message='只有"已到货"状态的订单才能发放', code=400)
-        
-        if order.arrived_quantity <= 0:
-            return error_response(message='订单没有可发放的数量', code=400)
-        
-        # 检查库存是否充足
-        from app.models.inventory import Inventory
-        inventory = Inventory.query.filter_by(textbook_id=order.textbook_id).first()
-        
-        if not inventory or inventory.current_quantity < order.arrived_quantity:
-            return error_response(message='库存不足，无法发放', code=400)
-        
-        # 扣减库存
-        inventory.current_quantity -= order.arrived_quantity
-        inventory.total_out_quantity += order.arrived_quantity
-        from datetime import date
-        inventory.last_out_date = date.today()
-        
-        # 更新订单状态为"已发放"
-        order.order_status = '已发放'
-        order.remarks = f'{order.remarks or ""}\n[{date.today()}] 由 {username} 发放，数量：{order.arrived_quantity}'.strip()
-        
-        db.session.commit()
-        
-        return success_response(message=f'发放成功，已从库存扣减 {order.arrived_quantity} 本')
+        username = get_jwt().get('username')
+        quantity = purchase_service.deliver_order(order_id, username)
+        return success_response(message=f'发放成功，已从库存扣减 {quantity} 本')
+    except BusinessException as e:
+        return error_response(message=e.message, code=e.code)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/purchase-orders/deliver-batch', methods=['POST'])
+@jwt_required()
+@warehouse_required
+def deliver_purchase_orders():
+    """
+    批量发放订单（仅管理员和仓库管理员，用于开学集中发放）
+    请求体：{"order_ids": [1, 2, ...]}；逐个订单返回结果，库存不足或状态不符的订单不发放
+    """
+    try:
+        data = request.get_json(silent=True)
+        order_ids = data.get('order_ids') if isinstance(data, dict) else None
+        if not isinstance(order_ids, list) or not order_ids or \
+                not all(isinstance(order_id, int) for order_id in order_ids):
+            return error_response(message='order_ids必须是订单ID的非空列表', code=400)
+        max_items = current_app.config.get('BULK_MAX_ITEMS', 5000)
+        if len(order_ids) > max_items:
+            return error_response(message=f'单次最多处理{max_items}条数据', code=400)
+        
+        results = purchase_service.deliver_orders(order_ids, get_jwt().get('username'))
+        return bulk_response(results, message='批量发放完成')
     except Exception as e:
-        from app.extensions import db
-        db.session.rollback()
         return error_response(message=str(e))
 
 
@@ -270,24 +282,22 @@ def cancel_purchase_order(order_id):
         # 注意：JWT的sub存储的是user_id，username在additional_claims中
         username = current_user.get('username')
         
-        # 获取原订单
-        original = purchase_service.get_order_detail(order_id)
-        order_person = original.get('order_person')
+        # 获取原订单（教师的可见性与订单一并查出）
+        if role == '教师':
+            original, visible = purchase_service.get_order_detail_for_teacher(order_id, username)
+        else:
+            original = purchase_service.get_order_detail(order_id)
         
         # 数据权限检查
         if role not in ['管理员', '仓库管理员']:
             if role == '普通用户':
                 # 普通用户只能取消order_person是自己的订单
-                if order_person != username:
+                if original.get('order_person') != username:
                     return error_response(message='您只能取消订购人是自己的订单', code=403)
             elif role == '教师':
                 # 教师只能取消order_person是自己或普通用户的订单
-                if order_person != username:
-                    from app.dao.user_dao import UserDAO
-                    user_dao = UserDAO()
-                    target_user = user_dao.find_by_username(order_person)
-                    if not target_user or target_user.role != '普通用户':
-                        return error_response(message='教师只能取消订购人是自己或普通用户的订单', code=403)
+                if not visible:
+                    return error_response(message='教师只能取消订购人是自己或普通用户的订单', code=403)
             
             # 检查订单状态
             if original.get('order_status') != '待审核':
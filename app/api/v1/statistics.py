@@ -1,15 +1,20 @@
 """
 统计API
 """
-from flask import request
-from flask_jwt_extended import jwt_required
+from flask import request, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt
 from app.api.v1 import api_v1
 from app.services.statistics_service import StatisticsService
+from app.services.inventory_ledger_service import InventoryLedgerService
+from app.services.reorder_service import ReorderService
+from app.extensions import cache
 from app.utils.response import success_response, error_response
-from app.utils.decorators import teacher_required, warehouse_required
+from app.utils.decorators import teacher_required, warehouse_required, admin_required
 
 
 statistics_service = StatisticsService()
+inventory_ledger_service = InventoryLedgerService()
+reorder_service = ReorderService()
 
 
 @api_v1.route('/statistics/by-type', methods=['GET'])
@@ -48,12 +53,19 @@ def get_statistics_by_textbook(textbook_id):
 @api_v1.route('/statistics/by-date', methods=['GET'])
 @jwt_required()
 def get_statistics_by_date():
-    """按日期范围统计（所有登录用户）"""
+    """
+    按日期范围统计（所有登录用户）
+    查询参数：start_date、end_date（YYYY-MM-DD），granularity 为 day / week / month（默认）
+    """
     try:
-        start_date = request.args.get('start_date', required=True)
-        end_date = request.args.get('end_date', required=True)
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        if not start_date or not end_date:
+            return error_response(message='请提供开始日期start_date和结束日期end_date', code=400)
         
-        result = statistics_service.get_statistics_by_date_range(start_date, end_date)
+        result = statistics_service.get_statistics_by_date_range(
+            start_date, end_date, granularity=request.args.get('granularity', 'month')
+        )
         return success_response(data=result)
     except Exception as e:
         return error_response(message=str(e))
@@ -71,6 +83,96 @@ def get_inventory_warnings():
         return error_response(message=str(e))
 
 
+@api_v1.route('/statistics/inventory-warnings/stream', methods=['GET'])
+@jwt_required()
+@warehouse_required
+def stream_inventory_warnings():
+    """
+    库存预警推送（Server-Sent Events，仅管理员和仓库管理员）
+    事件：snapshot（全量）、enter / leave / update（进入预警、离开预警、预警数量变化）、reset（需重连）
+    """
+    try:
+        last_event_id = request.headers.get('Last-Event-ID', type=int)
+        stream = statistics_service.stream_inventory_warnings(last_event_id)
+        return Response(stream_with_context(stream), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/statistics/inventory-as-of', methods=['GET'])
+@jwt_required()
+@warehouse_required
+def get_inventory_as_of():
+    """
+    查询某一时点的库存（仅管理员和仓库管理员）
+    查询参数：at 为日期（YYYY-MM-DD，当天结束时）或时间（YYYY-MM-DD HH:MM:SS），textbook_id 可选
+    """
+    try:
+        at = request.args.get('at')
+        if not at:
+            return error_response(message='请提供查询时点at', code=400)
+        result = inventory_ledger_service.get_inventory_as_of(
+            at, textbook_id=request.args.get('textbook_id', type=int)
+        )
+        return success_response(data=result)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/statistics/inventory-ledger/verify', methods=['GET'])
+@jwt_required()
+@admin_required
+def verify_inventory_ledger():
+    """核对库存表与库存流水，返回不一致的教材（仅管理员）"""
+    try:
+        mismatches = inventory_ledger_service.verify()
+        return success_response(data={'consistent': not mismatches, 'mismatches': mismatches})
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/statistics/reorder-suggestions', methods=['GET'])
+@jwt_required()
+@warehouse_required
+def get_reorder_suggestions():
+    """
+    补货建议（仅管理员和仓库管理员）
+    查询参数：window_days 统计窗口天数；scope=all 返回全部有需求的教材，默认只返回现在需要补货的教材
+    """
+    try:
+        result = reorder_service.get_suggestions(
+            window_days=request.args.get('window_days', type=int),
+            due_only=request.args.get('scope') != 'all'
+        )
+        return success_response(data=result)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/statistics/reorder-suggestions/apply', methods=['POST'])
+@jwt_required()
+@admin_required
+def apply_reorder_suggestions():
+    """
+    执行补货建议（仅管理员）
+    请求体：{"window_days": 180, "apply_thresholds": true, "draft_orders": false}
+    """
+    try:
+        data = request.get_json() or {}
+        summary = reorder_service.run(
+            get_jwt().get('username'),
+            window_days=data.get('window_days'),
+            apply_thresholds=bool(data.get('apply_thresholds')),
+            draft_orders=bool(data.get('draft_orders'))
+        )
+        return success_response(data=summary)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
 @api_v1.route('/statistics/dashboard', methods=['GET'])
 @jwt_required()
 def get_dashboard():
@@ -81,3 +183,14 @@ def get_dashboard():
     except Exception as e:
         return error_response(message=str(e))
 
+
+
+@api_v1.route('/statistics/cache', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_cache_stats():
+    """获取缓存命中统计，按键前缀分组（仅管理员）"""
+    try:
+        return success_response(data=cache.stats())
+    except Exception as e:
+        return error_response(message=str(e))
@@ -6,9 +6,11 @@ from flask_jwt_extended import jwt_required
 from app.api.v1 import api_v1
 from app.services.stock_in_service import StockInService
 from app.schemas.stock_in_schema import StockInSchema, StockInUpdateSchema
-from app.utils.response import success_response, error_response, paginated_response
-from app.utils.helpers import get_pagination_params
-from app.utils.decorators import warehouse_required, admin_required
+from app.utils.response import success_response, error_response, page_response, bulk_response
+from app.utils.helpers import get_pagination_params, get_cursor_param, get_count_policy, run_batch, get_batch_body
+from app.utils.decorators import warehouse_required, admin_required, conditional_get
+from app.utils.export import export_response, model_columns
+from app.models.stock_in import StockIn
 from marshmallow import ValidationError
 
 
@@ -18,23 +20,48 @@ stock_in_service = StockInService()
 @api_v1.route('/stock-ins', methods=['GET'])
 @jwt_required()
 @warehouse_required
+@conditional_get('stock_in', 'purchase_order', 'textbook')
 def get_stock_ins():
     """获取入库列表（仅管理员和仓库管理员）"""
     try:
         page, per_page = get_pagination_params()
+        cursor = get_cursor_param()
+        count_policy = get_count_policy()
         keyword = request.args.get('keyword')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        items, total = stock_in_service.get_stock_in_list(
+        result = stock_in_service.get_stock_in_list(
             page=page,
             per_page=per_page,
             keyword=keyword,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            cursor=cursor,
+            count_policy=count_policy
         )
         
-        return paginated_response(items, total, page, per_page)
+        return page_response(result, page, per_page)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/stock-ins/export', methods=['GET'])
+@jwt_required()
+@warehouse_required
+def export_stock_ins():
+    """
+    导出入库记录（仅管理员和仓库管理员，CSV或NDJSON，流式输出）
+    查询参数与入库列表相同，format 为 csv（默认）或 ndjson
+    """
+    try:
+        rows = stock_in_service.iter_stock_ins(
+            keyword=request.args.get('keyword'),
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date')
+        )
+        return export_response(rows, model_columns(StockIn, ('textbook_name', 'isbn', 'order_no')),
+                               'stock_ins', request.args.get('format', 'csv'))
     except Exception as e:
         return error_response(message=str(e))
 
@@ -42,6 +69,7 @@ def get_stock_ins():
 @api_v1.route('/stock-ins/<int:stock_in_id>', methods=['GET'])
 @jwt_required()
 @warehouse_required
+@conditional_get('stock_in', 'purchase_order', 'textbook', row=(StockIn, 'stock_in_id'))
 def get_stock_in(stock_in_id):
     """获取入库详情（仅管理员和仓库管理员）"""
     try:
@@ -68,6 +96,23 @@ def create_stock_in():
         return error_response(message=str(e))
 
 
+@api_v1.route('/stock-ins/batch', methods=['POST'])
+@jwt_required()
+@warehouse_required
+def batch_create_stock_ins():
+    """
+    批量入库（仅管理员和仓库管理员）
+    请求体：{"items": [入库单, ...]}，字段与创建入库单相同；同一订单的多行按累计数量校验，
+    整批在一个事务中写入，逐行返回结果
+    """
+    try:
+        data = get_batch_body()
+        results = run_batch(data.get('items'), StockInSchema(), stock_in_service.batch_create_stock_ins)
+        return bulk_response(results, message='批量入库完成，库存已自动更新')
+    except Exception as e:
+        return error_response(message=str(e))
+
+
 @api_v1.route('/stock-ins/<int:stock_in_id>', methods=['PUT'])
 @jwt_required()
 @warehouse_required
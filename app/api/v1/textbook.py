@@ -5,41 +5,70 @@ from flask import request
 from flask_jwt_extended import jwt_required
 from app.api.v1 import api_v1
 from app.services.textbook_service import TextbookService
-from app.schemas.textbook_schema import TextbookSchema, TextbookUpdateSchema
-from app.utils.response import success_response, error_response, paginated_response
-from app.utils.helpers import get_pagination_params
-from app.utils.decorators import admin_required
+from app.services.import_service import ImportService
+from app.schemas.textbook_schema import TextbookSchema, TextbookUpdateSchema, TextbookBatchUpdateSchema
+from app.utils.response import success_response, error_response, page_response, bulk_response
+from app.utils.helpers import get_pagination_params, get_cursor_param, get_count_policy, run_batch, get_batch_body
+from app.utils.decorators import admin_required, conditional_get
+from app.utils.export import export_response, model_columns
+from app.models.textbook import Textbook
 from marshmallow import ValidationError
 
 
 textbook_service = TextbookService()
+import_service = ImportService()
 
 
 @api_v1.route('/textbooks', methods=['GET'])
 @jwt_required()
+@conditional_get('textbook', 'inventory', 'publisher', 'textbook_type')
 def get_textbooks():
     """获取教材列表（所有登录用户可查看）"""
     try:
         page, per_page = get_pagination_params()
+        cursor = get_cursor_param()
+        count_policy = get_count_policy()
         keyword = request.args.get('keyword')
         publisher_id = request.args.get('publisher_id', type=int)
         type_id = request.args.get('type_id', type=int)
         
-        items, total = textbook_service.get_textbook_list(
+        result = textbook_service.get_textbook_list(
             page=page,
             per_page=per_page,
             keyword=keyword,
             publisher_id=publisher_id,
-            type_id=type_id
+            type_id=type_id,
+            cursor=cursor,
+            count_policy=count_policy
         )
         
-        return paginated_response(items, total, page, per_page)
+        return page_response(result, page, per_page)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/textbooks/export', methods=['GET'])
+@jwt_required()
+def export_textbooks():
+    """
+    导出教材（所有登录用户，CSV或NDJSON，流式输出）
+    查询参数与教材列表相同，format 为 csv（默认）或 ndjson
+    """
+    try:
+        rows = textbook_service.iter_textbooks(
+            keyword=request.args.get('keyword'),
+            publisher_id=request.args.get('publisher_id', type=int),
+            type_id=request.args.get('type_id', type=int)
+        )
+        columns = model_columns(Textbook, ('publisher_name', 'type_name', 'current_quantity'))
+        return export_response(rows, columns, 'textbooks', request.args.get('format', 'csv'))
     except Exception as e:
         return error_response(message=str(e))
 
 
 @api_v1.route('/textbooks/<int:textbook_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('textbook', 'inventory', 'publisher', 'textbook_type', row=(Textbook, 'textbook_id'))
 def get_textbook(textbook_id):
     """获取教材详情（所有登录用户可查看）"""
     try:
@@ -66,6 +95,67 @@ def create_textbook():
         return error_response(message=str(e))
 
 
+@api_v1.route('/textbooks/batch', methods=['POST'])
+@jwt_required()
+@admin_required
+def batch_create_textbooks():
+    """
+    批量创建教材（仅管理员）
+    请求体：{"items": [...], "mode": "create" | "upsert"}
+    - create：ISBN已存在的行记为失败
+    - upsert：ISBN已存在的行按新数据更新
+    """
+    try:
+        data = get_batch_body()
+        upsert = data.get('mode') == 'upsert'
+        results = run_batch(
+            data.get('items'),
+            TextbookSchema(),
+            lambda rows: textbook_service.batch_save_textbooks(rows, upsert=upsert)
+        )
+        return bulk_response(results)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/textbooks/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def import_textbooks():
+    """
+    导入教材目录（仅管理员）
+    multipart/form-data：file 为CSV或XLSX文件，mode 为 create（默认）或 upsert
+    表头支持字段名或中文名（ISBN、教材名称、作者、出版社、教材类型、版次、出版日期、价格、描述）
+    """
+    try:
+        upload = request.files.get('file')
+        if not upload:
+            return error_response(message='请上传文件')
+        report = import_service.import_textbooks(
+            upload.stream, upload.filename, mode=request.form.get('mode', 'create')
+        )
+        return success_response(data=report, message='导入完成')
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/textbooks/batch', methods=['PUT'])
+@jwt_required()
+@admin_required
+def batch_update_textbooks():
+    """
+    批量更新教材（仅管理员）
+    请求体：{"items": [{"textbook_id": 1, "price": 39.8}, ...]}
+    """
+    try:
+        data = get_batch_body()
+        results = run_batch(data.get('items'), TextbookBatchUpdateSchema(),
+                            textbook_service.batch_update_textbooks)
+        return bulk_response(results)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
 @api_v1.route('/textbooks/<int:textbook_id>', methods=['PUT'])
 @jwt_required()
 @admin_required
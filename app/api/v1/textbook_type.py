@@ -5,8 +5,9 @@ from flask import request
 from flask_jwt_extended import jwt_required
 from app.api.v1 import api_v1
 from app.dao.textbook_type_dao import TextbookTypeDAO
-from app.utils.response import success_response, error_response
-from app.utils.decorators import admin_required
+from app.utils.response import success_response, error_response, bulk_response
+from app.utils.helpers import run_batch, get_batch_body
+from app.utils.decorators import admin_required, conditional_get
 from marshmallow import Schema, fields, ValidationError
 
 
@@ -29,13 +30,17 @@ class TextbookTypeUpdateSchema(Schema):
     parent_id = fields.Integer(allow_none=True)
 
 
+class TextbookTypeBatchUpdateSchema(TextbookTypeUpdateSchema):
+    """教材类型批量更新Schema（每行附带类型ID）"""
+    type_id = fields.Integer(required=True)
+
+
 @api_v1.route('/textbook-types', methods=['GET'])
 @jwt_required()
 def get_textbook_types():
     """获取教材类型列表（所有登录用户可查看）"""
     try:
-        types = textbook_type_dao.get_active_types()
-        result = [t.to_dict() for t in types]
+        result = textbook_type_dao.get_active_types()
         return success_response(data=result)
     except Exception as e:
         return error_response(message=str(e))
@@ -54,6 +59,7 @@ def get_textbook_types_tree():
 
 @api_v1.route('/textbook-types/<int:type_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('textbook_type')
 def get_textbook_type(type_id):
     """获取教材类型详情（所有登录用户可查看）"""
     try:
@@ -83,6 +89,39 @@ def create_textbook_type():
         return error_response(message=str(e))
 
 
+@api_v1.route('/textbook-types/batch', methods=['POST'])
+@jwt_required()
+@admin_required
+def batch_create_textbook_types():
+    """
+    批量创建教材类型（仅管理员）
+    请求体：{"items": [...], "mode": "create" | "upsert"}，upsert 按类型编码更新已存在的类型
+    """
+    try:
+        data = get_batch_body()
+        write = textbook_type_dao.upsert_many if data.get('mode') == 'upsert' else textbook_type_dao.create_many
+        results = run_batch(data.get('items'), TextbookTypeSchema(), write)
+        return bulk_response(results)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
+@api_v1.route('/textbook-types/batch', methods=['PUT'])
+@jwt_required()
+@admin_required
+def batch_update_textbook_types():
+    """
+    批量更新教材类型（仅管理员）
+    请求体：{"items": [{"type_id": 1, "description": "..."}, ...]}
+    """
+    try:
+        data = get_batch_body()
+        results = run_batch(data.get('items'), TextbookTypeBatchUpdateSchema(), textbook_type_dao.update_many)
+        return bulk_response(results)
+    except Exception as e:
+        return error_response(message=str(e))
+
+
 @api_v1.route('/textbook-types/<int:type_id>', methods=['PUT'])
 @jwt_required()
 @admin_required
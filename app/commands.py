@@ -0,0 +1,120 @@
+"""
+命令行工具（flask <命令>）
+"""
+import json
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('import-catalog')
+@click.argument('kind', type=click.Choice(['textbooks', 'publishers']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--mode', type=click.Choice(['create', 'upsert']), default='create',
+              help='create：唯一键已存在记为错误；upsert：已存在则更新')
+@click.option('--batch-size', type=int, default=None, help='每批行数，默认使用 BULK_CHUNK_SIZE')
+@click.option('--report', type=click.Path(dir_okay=False), default=None, help='错误报告输出文件（JSON）')
+@with_appcontext
+def import_catalog_command(kind, path, mode, batch_size, report):
+    """
+    导入教材或出版社目录（CSV/XLSX）
+
+    示例：flask import-catalog textbooks catalog.xlsx --mode upsert
+    """
+    from app.services.import_service import ImportService
+    
+    service = ImportService()
+    importer = service.import_textbooks if kind == 'textbooks' else service.import_publishers
+    with open(path, 'rb') as stream:
+        result = importer(stream, path, mode=mode, batch_size=batch_size)
+    
+    click.echo(f'共 {result["total"]} 行：' + '，'.join(f'{k} {v}' for k, v in result['summary'].items()))
+    if report:
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump(result['errors'], f, ensure_ascii=False, indent=2)
+        click.echo(f'错误报告已写入 {report}')
+    else:
+        for error in result['errors'][:20]:
+            click.echo(f'第{error["row"]}行：{error["message"]}')
+        if len(result['errors']) > 20:
+            click.echo(f'……共 {len(result["errors"])} 行出错，使用 --report 输出完整报告')
+
+
+@click.command('rebuild-statistics')
+@with_appcontext
+def rebuild_statistics_command():
+    """
+    全量重建按类型、按出版社、按日的统计汇总表（stat_by_type / stat_by_publisher / stat_daily）
+
+    汇总表平时由触发器增量维护，数据修复或首次部署后执行
+    """
+    from app.services.statistics_service import StatisticsService
+    
+    type_rows, publisher_rows, daily_rows = StatisticsService().rebuild_statistics()
+    click.echo(f'统计汇总表已重建：类型 {type_rows} 行，出版社 {publisher_rows} 行，按日 {daily_rows} 行')
+
+
+@click.command('compact-inventory-ledger')
+@click.option('--interval', type=int, default=None,
+              help='快照之后累计多少条流水时生成新快照，默认使用 INVENTORY_SNAPSHOT_INTERVAL')
+@with_appcontext
+def compact_inventory_ledger_command(interval):
+    """
+    为库存流水生成快照，使按时间点查询库存时累加的流水条数有上限
+
+    建议每天定时执行
+    """
+    from app.services.inventory_ledger_service import InventoryLedgerService
+    
+    count = InventoryLedgerService().compact(interval)
+    click.echo(f'已生成 {count} 个库存快照')
+
+
+@click.command('verify-inventory-ledger')
+@click.option('--reconcile', is_flag=True, help='为不一致的教材追加"调整"流水（以库存表为准）')
+@with_appcontext
+def verify_inventory_ledger_command(reconcile):
+    """核对库存表（触发器维护）与库存流水的累计结果"""
+    from app.services.inventory_ledger_service import InventoryLedgerService
+    
+    service = InventoryLedgerService()
+    mismatches = service.verify()
+    for item in mismatches[:50]:
+        click.echo(f'教材{item["textbook_id"]}：库存表 {item["inventory"]}，流水 {item["ledger"]}')
+    if len(mismatches) > 50:
+        click.echo(f'……共 {len(mismatches)} 本教材不一致')
+    if not mismatches:
+        click.echo('库存表与流水一致')
+    elif reconcile:
+        click.echo(f'已为 {service.reconcile("reconcile")} 本教材追加调整流水')
+
+
+@click.command('suggest-reorder')
+@click.option('--window-days', type=int, default=None, help='统计窗口天数，默认使用 REORDER_WINDOW_DAYS')
+@click.option('--apply', 'apply_thresholds', is_flag=True, help='把建议的最低、最高库存写回库存表')
+@click.option('--draft-orders', is_flag=True, help='为需要补货的教材生成"待审核"订单')
+@click.option('--operator', default='system', help='补货订单的订购人')
+@with_appcontext
+def suggest_reorder_command(window_days, apply_thresholds, draft_orders, operator):
+    """
+    按订购和入库历史计算补货建议（再订货点、补货量）
+
+    示例：flask suggest-reorder --apply --draft-orders --operator admin
+    """
+    from app.services.reorder_service import ReorderService
+    
+    summary = ReorderService().run(operator, window_days=window_days,
+                                   apply_thresholds=apply_thresholds, draft_orders=draft_orders)
+    click.echo(f'教材 {summary["textbooks"]} 本，有需求 {summary["with_demand"]} 本，需要补货 {summary["due"]} 本')
+    if apply_thresholds:
+        click.echo(f'已更新 {summary["thresholds_updated"]} 本教材的预警阈值')
+    if draft_orders:
+        click.echo(f'已生成 {summary["orders_created"]} 个待审核订单')
+
+
+def register_commands(app):
+    """注册命令行工具"""
+    app.cli.add_command(import_catalog_command)
+    app.cli.add_command(rebuild_statistics_command)
+    app.cli.add_command(compact_inventory_ledger_command)
+    app.cli.add_command(verify_inventory_ledger_command)
+    app.cli.add_command(suggest_reorder_command)
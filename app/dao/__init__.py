@@ -10,6 +10,8 @@ from app.dao.stock_in_dao import StockInDAO
 # from app.dao.requisition_dao import RequisitionDAO  # 已移除领用功能
 from app.dao.inventory_dao import InventoryDAO
 from app.dao.user_dao import UserDAO
+from app.dao.doc_sequence_dao import DocSequenceDAO
+from app.dao.stat_daily_dao import StatDailyDAO
 
 __all__ = [
     'BaseDAO',
@@ -20,6 +22,8 @@ __all__ = [
     'StockInDAO',
     # 'RequisitionDAO',  # 已移除领用功能
     'InventoryDAO',
-    'UserDAO'
+    'UserDAO',
+    'DocSequenceDAO',
+    'StatDailyDAO'
 ]
 
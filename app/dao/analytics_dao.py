@@ -0,0 +1,237 @@
+"""
+统计快照DAO
+教材、订单、库存的统计相关列以 NumPy 列式表常驻内存，统计接口在内存中做向量化分组汇总，
+不再每次请求在数据库中执行大表关联。
+"""
+import threading
+import time
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, func
+from app.dao.base_dao import on_tables_written, table_versions, table_stats, delete_marker
+from app.models.textbook import Textbook
+from app.models.purchase_order import PurchaseOrder
+from app.models.inventory import Inventory
+from app.extensions import db
+from app.utils.columnar import ColumnTable, Dictionary, columns
+
+# 字典编码的列（字符串 -> 小整数）
+order_status_dictionary = Dictionary(np.int8)
+
+# 快照中的表：表名 -> (主键列, [(列名, 模型列, dtype)])，dtype 为 Dictionary 时做字典编码
+SNAPSHOT_TABLES = {
+    'textbook': (Textbook.textbook_id, [
+        ('type_id', Textbook.type_id, np.int32),
+        ('publisher_id', Textbook.publisher_id, np.int32),
+        ('status', Textbook.status, np.int8),
+    ]),
+    'purchase_order': (PurchaseOrder.order_id, [
+        ('textbook_id', PurchaseOrder.textbook_id, np.int32),
+        ('order_quantity', PurchaseOrder.order_quantity, np.int32),
+        ('arrived_quantity', PurchaseOrder.arrived_quantity, np.int32),
+        ('order_status', PurchaseOrder.order_status, order_status_dictionary),
+    ]),
+    'inventory': (Inventory.textbook_id, [
+        ('current_quantity', Inventory.current_quantity, np.int32),
+    ]),
+}
+
+# 列式表（表名 -> ColumnTable）
+analytics_tables = {
+    name: ColumnTable(np.int32, {
+        field: dtype.dtype if isinstance(dtype, Dictionary) else dtype for field, _, dtype in fields
+    })
+    for name, (_, fields) in SNAPSHOT_TABLES.items()
+}
+
+# 同步状态：各表的 updated_at 水位线、已同步到的表版本和删除标记（table_version）、
+# 上次同步时间、上次核对行数的时间及之后增量同步过、尚未核对行数的表（unchecked）、
+# 本进程是否写入过相关表（stale）；totals 为按教材汇总结果的缓存
+_snapshot_state = {'ready': False, 'watermarks': {}, 'versions': {}, 'synced_at': 0.0, 'checked_at': 0.0,
+                   'unchecked': set(), 'stale': False, 'totals': None}
+_snapshot_lock = threading.RLock()
+
+
+class AnalyticsDAO:
+    """统计快照数据访问对象"""
+    
+    def ensure_snapshot(self):
+        """
+        确保快照可用：未装载时全量装载；本进程写入过相关表、或超过 ANALYTICS_SNAPSHOT_REFRESH 秒未同步时增量同步，
+        距上次核对行数超过同样间隔时顺带核对行数
+        """
+        if not _snapshot_state['ready']:
+            self.build_snapshot()
+            return
+        interval = current_app.config.get('ANALYTICS_SNAPSHOT_REFRESH', 30)
+        now = time.monotonic()
+        check_counts = now - _snapshot_state['checked_at'] >= interval
+        if check_counts or _snapshot_state['stale'] or now - _snapshot_state['synced_at'] >= interval:
+            self.sync_snapshot(check_counts=check_counts)
+    
+    def build_snapshot(self):
+        """全量装载全部表"""
+        with _snapshot_lock:
+            # 先读版本再读数据：装载期间的写入会使版本变化，下一次同步时重新读取
+            _snapshot_state['stale'] = False
+            versions = table_versions(self._version_names())
+            for name in SNAPSHOT_TABLES:
+                self._load_table(name)
+            _snapshot_state['versions'] = versions
+            now = time.monotonic()
+            _snapshot_state.update(ready=True, synced_at=now, checked_at=now)
+    
+    def sync_snapshot(self, check_counts=True):
+        """
+        增量同步：按表版本（table_version）判断哪些表有写入，版本未变的表不访问；
+        有写入的表读取 updated_at 不早于水位线的行（同一秒内的修改也会被重新读取）。
+        删除标记（delete_marker）变化的表有硬删除，重新装载；check_counts 为True时
+        另外对上次核对以来有写入的表执行 COUNT(*)，行数对不上（绕过应用的删除）时重新装载
+        :param check_counts: 是否核对行数（ensure_snapshot 只在 ANALYTICS_SNAPSHOT_REFRESH 周期到期时核对）
+        """
+        with _snapshot_lock:
+            _snapshot_state['stale'] = False
+            versions = table_versions(self._version_names())
+            synced = _snapshot_state['versions']
+            changed = [
+                name for name in SNAPSHOT_TABLES
+                if any(versions[key] != synced.get(key) for key in (name, delete_marker(name)))
+            ]
+            unchecked = _snapshot_state['unchecked']
+            for name in changed:
+                marker = delete_marker(name)
+                watermark = _snapshot_state['watermarks'].get(name)
+                if watermark is None or versions[marker] != synced.get(marker):
+                    self._load_table(name)
+                    unchecked.discard(name)
+                else:
+                    # TIMESTAMP精度为秒，用 >= 重新读取同一秒内的行，覆盖写入是幂等的
+                    updated_at = SNAPSHOT_TABLES[name][0].class_.updated_at
+                    key, data, latest_read = self._read(name, updated_at >= watermark)
+                    analytics_tables[name].upsert(key, data)
+                    self._advance(name, latest_read)
+                    unchecked.add(name)
+                synced[name] = versions[name]
+                synced[marker] = versions[marker]
+            if check_counts and unchecked:
+                for name, (_, count) in table_stats(sorted(unchecked)).items():
+                    if count != len(analytics_tables[name]):
+                        self._load_table(name)
+                unchecked.clear()
+            now = time.monotonic()
+            _snapshot_state['synced_at'] = now
+            if check_counts:
+                _snapshot_state['checked_at'] = now
+    
+    def textbook_totals(self):
+        """
+        按教材汇总（订购、到货、发放、当前库存），与教材列对齐
+        结果缓存到任一表下一次变化
+        :return: {'textbook_id', 'type_id', 'publisher_id', 'status', 'order_quantity', 'arrived_quantity',
+                  'issued_quantity', 'current_quantity', 'position'}，position[教材ID] 为该教材的下标（-1 表示不存在）
+        """
+        self.ensure_snapshot()
+        with _snapshot_lock:
+            version = tuple(table.version for table in analytics_tables.values())
+            cached = _snapshot_state['totals']
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            totals = self._compute_totals()
+            _snapshot_state['totals'] = (version, totals)
+            return totals
+    
+    def clear(self):
+        """清空快照"""
+        with _snapshot_lock:
+            _snapshot_state.update(ready=False, watermarks={}, versions={}, synced_at=0.0, checked_at=0.0,
+                                   unchecked=set(), stale=False, totals=None)
+    
+    @staticmethod
+    def _compute_totals():
+        """向量化计算按教材的汇总"""
+        textbooks = analytics_tables['textbook'].view()
+        orders = analytics_tables['purchase_order'].view()
+        inventory = analytics_tables['inventory'].view()
+        
+        ids = textbooks['key']
+        size = int(max(ids.max(initial=0), orders['textbook_id'].max(initial=0),
+                       inventory['key'].max(initial=0))) + 1
+        position = np.full(size, -1, dtype=np.int64)
+        position[ids] = np.arange(len(ids))
+        count = len(ids)
+        
+        order_rows = position[orders['textbook_id']]
+        matched = order_rows >= 0
+        order_rows = order_rows[matched]
+        arrived = orders['arrived_quantity'][matched].astype(np.int64)
+        issued_code = order_status_dictionary.code('已发放')
+        issued = np.where(orders['order_status'][matched] == issued_code, arrived, 0)
+        
+        inventory_rows = position[inventory['key']]
+        stocked = inventory_rows >= 0
+        current = np.zeros(count, dtype=np.int64)
+        current[inventory_rows[stocked]] = inventory['current_quantity'][stocked]
+        
+        return {
+            'textbook_id': ids,
+            'type_id': textbooks['type_id'],
+            'publisher_id': textbooks['publisher_id'],
+            'status': textbooks['status'],
+            'order_quantity': np.bincount(order_rows, weights=orders['order_quantity'][matched],
+                                          minlength=count).astype(np.int64),
+            'arrived_quantity': np.bincount(order_rows, weights=arrived, minlength=count).astype(np.int64),
+            'issued_quantity': np.bincount(order_rows, weights=issued, minlength=count).astype(np.int64),
+            'current_quantity': current,
+            'position': position
+        }
+    
+    @staticmethod
+    def _version_names():
+        """快照依赖的 table_version 行：各表的版本和删除标记"""
+        return [key for name in SNAPSHOT_TABLES for key in (name, delete_marker(name))]
+    
+    def _load_table(self, name):
+        """全量装载一张表"""
+        key, data, latest = self._read(name)
+        analytics_tables[name].load(key, data)
+        _snapshot_state['watermarks'][name] = latest
+    
+    @staticmethod
+    def _read(name, condition=None):
+        """
+        读取一张表的快照列
+        :param condition: 过滤条件，为None时读取全表
+        :return: (主键数组, {列名: 数组}, 读到的最大 updated_at)
+        """
+        key_column, fields = SNAPSHOT_TABLES[name]
+        query = select(key_column, *(
+            column if isinstance(dtype, Dictionary) else func.coalesce(column, 0)
+            for _, column, dtype in fields
+        ), key_column.class_.updated_at)
+        if condition is not None:
+            query = query.where(condition)
+        rows = db.session.execute(query).all()
+        arrays = columns(rows, np.int32, *(
+            object if isinstance(dtype, Dictionary) else dtype for _, _, dtype in fields
+        ))
+        data = {
+            field: dtype.encode(array.tolist()) if isinstance(dtype, Dictionary) else array
+            for (field, _, dtype), array in zip(fields, arrays[1:])
+        }
+        latest = max((row[-1] for row in rows if row[-1] is not None), default=None)
+        return arrays[0], data, latest
+    
+    @staticmethod
+    def _advance(name, latest):
+        """推进水位线"""
+        watermark = _snapshot_state['watermarks'].get(name)
+        if latest is not None and (watermark is None or latest > watermark):
+            _snapshot_state['watermarks'][name] = latest
+
+
+def _mark_snapshot_stale():
+    """教材、订单、库存写入后，下一次读取统计时增量同步快照"""
+    _snapshot_state['stale'] = True
+
+
+on_tables_written(_mark_snapshot_stale, *SNAPSHOT_TABLES)
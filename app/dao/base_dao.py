@@ -1,24 +1,176 @@
 """
 DAO基类
 """
-from app.extensions import db
-from app.utils.exceptions import DatabaseException, NotFoundException
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import inspect, select, update, bindparam, func, table, column, DateTime
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.sql.util import find_tables
+from app.extensions import db, cache
+from app.models.table_version import TableVersion
+from app.utils.exceptions import DatabaseException, NotFoundException, ValidationException
+from app.utils.pagination import Page, encode_cursor, decode_cursor, COUNT_POLICIES
+
+# 表写入监听：回调 -> 关注的表名集合（维护预警集合等内存结构）
+_table_listeners = {}
+
+
+def on_tables_written(callback, *tables):
+    """
+    注册表写入监听：invalidate_tables 涉及任一关注的表时调用 callback()（每次最多调用一次）
+    :param callback: 无参回调
+    :param tables: 关注的表名
+    """
+    _table_listeners.setdefault(callback, set()).update(tables)
+
+
+def invalidate_tables(*tables):
+    """
+    使与指定表相关的缓存失效（DAO写操作之外直接提交的修改需手动调用）
+    缓存条目以表名为标签：分页总数（前缀 count）、参考数据（前缀 ref:<表名>）及 cached 装饰器的结果
+    :param tables: 表名
+    """
+    bump_table_versions(tables)
+    cache.invalidate_tags(*tables)
+    for callback, watched in list(_table_listeners.items()):
+        if watched.intersection(tables):
+            callback()
+
+
+def bump_table_versions(tables):
+    """
+    递增表版本（table_version），在数据提交之后调用：
+    读到新版本号的请求一定能读到新数据，不会把旧数据以新版本号缓存下来
+    版本行按表名顺序加锁，避免并发写入死锁；没有版本行的表插入一行
+    :param tables: 表名
+    """
+    names = sorted(set(tables))
+    if not names:
+        return
+    for attempt in range(2):
+        try:
+            result = db.session.execute(
+                update(TableVersion)
+                .where(TableVersion.table_name.in_(names))
+                .values(version=TableVersion.version + 1)
+            )
+            if result.rowcount < len(names):
+                existing = set(db.session.scalars(
+                    select(TableVersion.table_name).where(TableVersion.table_name.in_(names))
+                ))
+                db.session.add_all([
+                    TableVersion(table_name=name, version=1) for name in names if name not in existing
+                ])
+            db.session.commit()
+            return
+        except IntegrityError:
+            # 其他进程同时插入了版本行，重新递增
+            db.session.rollback()
+        except SQLAlchemyError as e:
+            # 数据已提交，版本递增失败只记录日志，不影响写操作的结果
+            db.session.rollback()
+            current_app.logger.warning(f'表版本递增失败 {names}: {str(e)}')
+            return
+
+
+def delete_marker(name):
+    """
+    表的硬删除标记在 table_version 中的行名：硬删除提交后与表版本一同递增。
+    按 updated_at 增量同步的内存结构读不到被删除的行，据此判断需要重新装载
+    :param name: 表名
+    :return: 标记行名
+    """
+    return f'{name}:delete'
+
+
+def resolve_count_policy(count_policy, cursor):
+    """
+    未指定总数统计策略时的默认值：页码分页精确统计，游标分页不统计（深分页不再承担 COUNT）
+    :param count_policy: 调用方指定的策略或None
+    :param cursor: 游标（None表示页码分页）
+    :return: 统计策略
+    """
+    if count_policy:
+        return count_policy
+    return 'none' if cursor is not None else 'exact'
+
+
+def table_versions(tables):
+    """
+    查询各表的版本（一条按主键的查询，不扫描业务表）
+    :param tables: 表名列表
+    :return: {表名: (版本最后递增时间, 版本号)}，没有版本行的表为 (None, 0)
+    """
+    rows = db.session.execute(
+        select(TableVersion.table_name, TableVersion.updated_at, TableVersion.version)
+        .where(TableVersion.table_name.in_(list(tables)))
+    ).all()
+    found = {name: (updated_at, version) for name, updated_at, version in rows}
+    return {name: found.get(name, (None, 0)) for name in tables}
+
+
+def table_stats(tables):
+    """
+    查询各表的 MAX(updated_at) 和 COUNT(*)（多张表合并为一条语句）
+    会扫描业务表，只在 table_versions 表明有变化、且到了周期核对时间时用于发现绕过应用的硬删除
+    :param tables: 表名列表
+    :return: {表名: (最后修改时间, 行数)}
+    """
+    columns = []
+    for name in tables:
+        t = table(name, column('updated_at', DateTime))
+        columns.append(select(func.max(t.c.updated_at)).scalar_subquery())
+        columns.append(select(func.count()).select_from(t).scalar_subquery())
+    row = db.session.execute(select(*columns)).one()
+    return {name: (row[2 * i], row[2 * i + 1]) for i, name in enumerate(tables)}
 
 
 class BaseDAO:
     """DAO基类，提供通用CRUD操作"""
     
+    # 列表/详情读取时需要预加载的关联（to_dict(include_relations=True)会访问的关系）
+    eager_relations = ()
+    
+    # 写入本表时会被触发器连带修改的表（写操作后一并失效缓存）
+    dependent_tables = ()
+    
+    # 业务唯一键（如 isbn），批量写入时用于 upsert 和回查主键
+    natural_key = None
+    
     def __init__(self, model):
         self.model = model
     
-    def get_by_id(self, id):
+    def _eager_options(self):
+        """
+        生成关联预加载选项
+        - 多对一/一对一关系：joinedload，与主查询合并为一条语句
+        - 一对多集合：selectinload，整页只追加一条 IN 查询
+        """
+        options = []
+        for name in self.eager_relations:
+            attr = getattr(self.model, name)
+            if attr.property.uselist:
+                options.append(selectinload(attr))
+            else:
+                options.append(joinedload(attr))
+        return options
+    
+    def _with_relations(self, query):
+        """为查询加上关联预加载，避免序列化时逐行懒加载（N+1）"""
+        options = self._eager_options()
+        return query.options(*options) if options else query
+    
+    def get_by_id(self, id, with_relations=False):
         """
         根据ID查询
         :param id: 主键ID
+        :param with_relations: 是否预加载关联（详情接口序列化关联字段时使用）
         :return: 模型实例
         """
         try:
-            instance = self.model.query.get(id)
+            options = self._eager_options() if with_relations else None
+            instance = db.session.get(self.model, id, options=options)
             if not instance:
                 raise NotFoundException(f'{self.model.__name__}不存在')
             return instance
@@ -27,6 +179,22 @@ class BaseDAO:
         except Exception as e:
             raise DatabaseException(f'查询失败: {str(e)}')
     
+    def get_by_ids(self, ids):
+        """
+        按主键批量查询（一条 IN 查询）
+        :param ids: 主键列表，可重复
+        :return: {主键: 模型实例}，不存在的主键不在结果中
+        """
+        ids = list(set(ids))
+        if not ids:
+            return {}
+        pk = self._primary_key()
+        try:
+            instances = db.session.scalars(select(self.model).where(pk.in_(ids))).all()
+        except Exception as e:
+            raise DatabaseException(f'查询失败: {str(e)}')
+        return {getattr(instance, pk.key): instance for instance in instances}
+    
     def get_all(self, filters=None, order_by=None):
         """
         查询所有记录
@@ -55,47 +223,225 @@ class BaseDAO:
         except Exception as e:
             raise DatabaseException(f'查询失败: {str(e)}')
     
-    def paginate(self, page=1, per_page=20, filters=None, order_by=None):
+    def paginate(self, page=1, per_page=20, filters=None, order_by=None, cursor=None,
+                 with_relations=False, count_policy=None):
         """
         分页查询
         :param page: 页码
         :param per_page: 每页数量
         :param filters: 过滤条件
-        :param order_by: 排序字段
-        :return: (items, total)
+        :param order_by: 排序字段，'-'前缀表示降序
+        :param cursor: 游标（为None时使用页码分页，''表示游标模式的第一页）
+        :param with_relations: 是否预加载关联
+        :param count_policy: 总数统计策略，见 _count_total
+        :return: Page，可解包为 (items, total)
         """
         try:
-            query = self.model.query
+            query = self._filter_query(self.model.query, filters)
             
-            # 应用过滤条件
-            if filters:
-                for key, value in filters.items():
-                    if hasattr(self.model, key) and value is not None:
-                        if isinstance(value, list):
-                            query = query.filter(getattr(self.model, key).in_(value))
-                        else:
-                            query = query.filter(getattr(self.model, key) == value)
-            
-            # 应用排序
-            if order_by:
-                if isinstance(order_by, str):
-                    if order_by.startswith('-'):
-                        # 降序
-                        query = query.order_by(getattr(self.model, order_by[1:]).desc())
-                    else:
-                        # 升序
-                        query = query.order_by(getattr(self.model, order_by))
+            # 排序字段
+            sort_column = None
+            descending = False
+            if order_by and isinstance(order_by, str):
+                descending = order_by.startswith('-')
+                sort_column = getattr(self.model, order_by.lstrip('-'))
             
-            # 获取总数
-            total = query.count()
+            if with_relations:
+                query = self._with_relations(query)
             
-            # 分页
-            items = query.limit(per_page).offset((page - 1) * per_page).all()
-            
-            return items, total
+            return self._paginate_query(query, page, per_page, sort_column=sort_column,
+                                        descending=descending, cursor=cursor,
+                                        count_policy=count_policy)
+        except ValidationException:
+            raise
         except Exception as e:
             raise DatabaseException(f'分页查询失败: {str(e)}')
     
+    def iter_all(self, filters=None, chunk_size=None, with_relations=False):
+        """
+        逐条遍历满足条件的全部记录（生成器，用于导出）
+        使用服务端游标（yield_per/stream_results）分块读取，内存占用与表大小无关。
+        遍历期间同一连接不能执行其他查询，需要的关联应通过 with_relations 预加载
+        :param filters: 过滤条件，含义由 _base_query 决定
+        :param chunk_size: 每次从游标读取的行数，默认使用 EXPORT_CHUNK_SIZE 配置
+        :param with_relations: 是否预加载关联（只适用于多对一/一对一关系）
+        :return: 模型实例生成器，按主键排序
+        """
+        chunk_size = chunk_size or current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+        query = self._base_query(filters)
+        if with_relations:
+            query = self._with_relations(query)
+        # 以2.0风格执行：旧式Query带joinedload时会对结果去重，与yield_per不兼容
+        statement = query.order_by(self._primary_key()).statement
+        try:
+            for instance in db.session.scalars(statement, execution_options={'yield_per': chunk_size}):
+                yield instance
+        except SQLAlchemyError as e:
+            raise DatabaseException(f'查询失败: {str(e)}')
+    
+    def _base_query(self, filters=None):
+        """
+        构造 iter_all 使用的查询，默认按字段相等过滤
+        子类可覆盖以复用搜索条件（关键字、日期范围、数据权限等）
+        :param filters: 过滤条件
+        :return: 查询对象
+        """
+        return self._filter_query(self.model.query, filters)
+    
+    def _filter_query(self, query, filters):
+        """
+        按字段过滤：值为列表时使用 IN，值为None的条件忽略
+        :param query: 查询对象
+        :param filters: 字段名 -> 值
+        :return: 查询对象
+        """
+        for key, value in (filters or {}).items():
+            if hasattr(self.model, key) and value is not None:
+                if isinstance(value, list):
+                    query = query.filter(getattr(self.model, key).in_(value))
+                else:
+                    query = query.filter(getattr(self.model, key) == value)
+        return query
+    
+    def _primary_key(self):
+        """获取模型主键列"""
+        return self.model.__mapper__.primary_key[0]
+    
+    @staticmethod
+    def _identity(instance):
+        """获取实例的主键值（从identity map读取，提交后不会触发刷新查询）"""
+        identity = inspect(instance).identity
+        return identity[0] if identity else None
+    
+    def _paginate_query(self, query, page, per_page, sort_column=None, descending=False, cursor=None,
+                        count_policy=None):
+        """
+        对查询进行分页
+        - 页码模式：LIMIT/OFFSET
+        - 游标模式（keyset）：按 (排序键, 主键) 定位上一页末尾，深分页与第一页代价相同；
+          未指定统计策略时不统计总数，否则每一页都要执行一次 COUNT
+        :param query: 已应用过滤条件的查询
+        :param page: 页码（游标模式下忽略）
+        :param per_page: 每页数量
+        :param sort_column: 排序列，为None时游标模式按主键排序
+        :param descending: 是否降序
+        :param cursor: 游标
+        :param count_policy: 总数统计策略，见 _count_total；为None时页码模式为 exact，游标模式为 none
+        :return: Page
+        """
+        count_policy = resolve_count_policy(count_policy, cursor)
+        pk = self._primary_key()
+        key_columns = [sort_column, pk] if sort_column is not None else [pk]
+        
+        def ordered(q):
+            return q.order_by(*[c.desc() if descending else c.asc() for c in key_columns])
+        
+        total = self._count_total(query, count_policy)
+        
+        if cursor is None:
+            if sort_column is not None:
+                query = ordered(query)
+            query = query.offset((page - 1) * per_page)
+            if count_policy != 'none':
+                items = query.limit(per_page).all()
+                return Page(items, total, count_policy=count_policy)
+            # 不统计总数：多取一条判断是否还有下一页
+            rows = query.limit(per_page + 1).all()
+            return Page(rows[:per_page], None, has_next=len(rows) > per_page, count_policy=count_policy)
+        
+        if cursor:
+            values = decode_cursor(cursor, key_columns)
+            query = query.filter(self._keyset_condition(key_columns, values, descending))
+        
+        # 多取一条用于判断是否还有下一页
+        rows = ordered(query).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        next_cursor = None
+        if has_next:
+            last = items[-1]
+            next_cursor = encode_cursor([getattr(last, c.key) for c in key_columns])
+        return Page(items, total, next_cursor=next_cursor, has_next=has_next, count_policy=count_policy)
+    
+    def _count_total(self, query, count_policy=None):
+        """
+        按策略统计分页总数
+        - exact：执行 COUNT
+        - cached：按 SQL 和参数缓存 COUNT 结果，带TTL，涉及的表有写操作时失效
+        - estimated：MySQL 下用 EXPLAIN 的行数估算，其他数据库退化为 exact
+        - none：不统计，返回None（has_next 由多取一条判断）
+        :param query: 已应用过滤条件的查询
+        :param count_policy: 统计策略
+        :return: 总数或None
+        """
+        if count_policy not in COUNT_POLICIES:
+            raise ValidationException(f'不支持的总数统计策略：{count_policy}')
+        if count_policy == 'none':
+            return None
+        if count_policy == 'estimated':
+            return self._estimate_count(query)
+        if count_policy == 'cached':
+            statement = query.enable_eagerloads(False).statement
+            compiled = statement.compile(compile_kwargs={'render_postcompile': True})
+            key = ('count', str(compiled), repr(sorted(compiled.params.items())))
+            tables = sorted({t.name for t in find_tables(statement, check_columns=True) if hasattr(t, 'name')})
+            return cache.get_or_set(key, query.count, ttl='COUNT_CACHE_TTL', tags=tables)
+        return query.count()
+    
+    def _estimate_count(self, query):
+        """
+        用 EXPLAIN 估算满足条件的行数（rows * filtered%），不扫描数据
+        :param query: 已应用过滤条件的查询
+        :return: 估算的总数
+        """
+        connection = db.session.connection()
+        if connection.dialect.name != 'mysql':
+            return query.count()
+        compiled = query.enable_eagerloads(False).statement.compile(
+            dialect=connection.dialect,
+            compile_kwargs={'render_postcompile': True}
+        )
+        result = connection.exec_driver_sql(f'EXPLAIN {compiled}', compiled.params)
+        row = result.mappings().first()
+        if not row or row.get('rows') is None:
+            return query.count()
+        filtered = row.get('filtered')
+        filtered = float(filtered) if filtered is not None else 100.0
+        return int(round(int(row['rows']) * filtered / 100))
+    
+    def _after_write(self, ids=None):
+        """
+        写操作提交后的钩子：使与本表相关的缓存失效
+        子类可覆盖以维护自己的内存结构（调用super）
+        :param ids: 本次写入涉及的主键列表，未知时为None
+        """
+        invalidate_tables(self.model.__tablename__, *self.dependent_tables)
+    
+    def _cached(self, key, loader):
+        """
+        读穿透缓存：按 ('ref:表名', key) 缓存 loader 的结果，本表写操作后失效，
+        并按 REFERENCE_CACHE_TTL 过期（进程内后端借此追平其他进程的写入）
+        :param key: 查询标识（含过滤条件），需可哈希
+        :param loader: 未命中时调用；应返回字典/列表等普通数据，不要缓存ORM实例
+        :return: 缓存值（多个请求共享，调用方不要修改）
+        """
+        table = self.model.__tablename__
+        return cache.get_or_set((f'ref:{table}', key), loader, ttl='REFERENCE_CACHE_TTL', tags=(table,))
+    
+    @staticmethod
+    def _keyset_condition(columns, values, descending):
+        """
+        构造keyset条件，如 (a, b) < (:a, :b) 展开为 a < :a OR (a = :a AND b < :b)
+        """
+        condition = None
+        for column, value in reversed(list(zip(columns, values))):
+            step = column < value if descending else column > value
+            if condition is None:
+                condition = step
+            else:
+                condition = db.or_(step, db.and_(column == value, condition))
+        return condition
+    
     def create(self, data):
         """
         创建记录
@@ -106,6 +452,7 @@ class BaseDAO:
             instance = self.model(**data)
             db.session.add(instance)
             db.session.commit()
+            self._after_write([self._identity(instance)])
             return instance
         except Exception as e:
             db.session.rollback()
@@ -124,6 +471,7 @@ class BaseDAO:
                 if hasattr(instance, key) and value is not None:
                     setattr(instance, key, value)
             db.session.commit()
+            self._after_write([id])
             return instance
         except NotFoundException:
             raise
@@ -148,12 +496,214 @@ class BaseDAO:
                 # 硬删除
                 db.session.delete(instance)
                 db.session.commit()
+                bump_table_versions([delete_marker(self.model.__tablename__)])
+            self._after_write([id])
         except NotFoundException:
             raise
         except Exception as e:
             db.session.rollback()
             raise DatabaseException(f'删除失败: {str(e)}')
     
+    # ==================== 批量写入 ====================
+    
+    def create_many(self, rows, chunk_size=None):
+        """
+        批量创建（分块 executemany，整批只提交一次）
+        :param rows: 数据字典列表
+        :param chunk_size: 每块行数，默认使用 BULK_CHUNK_SIZE 配置
+        :return: 逐行结果列表，见 _bulk_outcome
+        """
+        def write_chunk(start, chunk):
+            for group in self._group_by_columns(chunk):
+                db.session.execute(db.insert(self.model.__table__), group)
+            ids = self._lookup_ids(chunk)
+            return [
+                self._bulk_outcome(start + offset, 'created', ids.get(self._natural_value(row)))
+                for offset, row in enumerate(chunk)
+            ]
+        
+        return self._run_bulk(rows, chunk_size, write_chunk)
+    
+    def upsert_many(self, rows, key=None, update_fields=None, chunk_size=None):
+        """
+        批量创建或更新（按唯一键，MySQL 为 INSERT ... ON DUPLICATE KEY UPDATE）
+        :param rows: 数据字典列表，每行必须包含唯一键
+        :param key: 唯一键字段名，默认使用 natural_key
+        :param update_fields: 键冲突时更新的字段，默认为行中除唯一键外的全部字段
+        :param chunk_size: 每块行数，默认使用 BULK_CHUNK_SIZE 配置
+        :return: 逐行结果列表，status 为 created 或 updated
+        """
+        key = key or self.natural_key
+        if not key:
+            raise ValidationException(f'{self.model.__name__}未定义唯一键，无法批量更新')
+        key_column = getattr(self.model, key)
+        
+        def write_chunk(start, chunk):
+            keys = [row.get(key) for row in chunk]
+            if any(value is None for value in keys):
+                raise ValidationException(f'缺少唯一键字段：{key}')
+            # 预先查出已存在的键，用于区分新建/更新
+            existing = set(db.session.scalars(select(key_column).where(key_column.in_(keys))))
+            for group in self._group_by_columns(chunk):
+                db.session.execute(self._upsert_statement(group[0].keys(), key, update_fields), group)
+            ids = self._lookup_ids(chunk, key)
+            outcomes = []
+            for offset, row in enumerate(chunk):
+                status = 'updated' if row[key] in existing else 'created'
+                existing.add(row[key])
+                outcomes.append(self._bulk_outcome(start + offset, status, ids.get(row[key])))
+            return outcomes
+        
+        return self._run_bulk(rows, chunk_size, write_chunk)
+    
+    def update_many(self, rows, chunk_size=None):
+        """
+        按主键批量更新（executemany，整批只提交一次）
+        与 update 一致，值为None的字段不更新
+        :param rows: 数据字典列表，每行必须包含主键字段
+        :param chunk_size: 每块行数，默认使用 BULK_CHUNK_SIZE 配置
+        :return: 逐行结果列表，status 为 updated 或 not_found
+        """
+        pk = self._primary_key()
+        columns = self.model.__table__.columns
+        
+        def write_chunk(start, chunk):
+            ids = [row.get(pk.key) for row in chunk]
+            if any(value is None for value in ids):
+                raise ValidationException(f'缺少主键字段：{pk.key}')
+            existing = set(db.session.scalars(select(pk).where(pk.in_(ids))))
+            now = datetime.now()
+            outcomes = []
+            groups = {}
+            for offset, row in enumerate(chunk):
+                if row[pk.key] not in existing:
+                    outcomes.append(self._bulk_outcome(start + offset, 'not_found', row[pk.key]))
+                    continue
+                values = {k: v for k, v in row.items() if k in columns and k != pk.key and v is not None}
+                if 'updated_at' in columns:
+                    values['updated_at'] = now
+                params = {f'v_{k}': v for k, v in values.items()}
+                params['pk_value'] = row[pk.key]
+                groups.setdefault(tuple(sorted(values)), []).append(params)
+                outcomes.append(self._bulk_outcome(start + offset, 'updated', row[pk.key]))
+            for fields, params in groups.items():
+                if not fields:
+                    continue
+                statement = update(self.model.__table__).where(
+                    pk == bindparam('pk_value')
+                ).values({field: bindparam(f'v_{field}') for field in fields})
+                db.session.execute(statement, params)
+            return outcomes
+        
+        return self._run_bulk(rows, chunk_size, write_chunk)
+    
+    def _run_bulk(self, rows, chunk_size, write_chunk):
+        """
+        分块执行批量写入
+        - 每块在一个保存点内执行；出错时回滚该块并逐行重试，定位出错的行
+        - 全部完成后统一提交一次，再按涉及的主键触发 _after_write
+        :param rows: 数据字典列表
+        :param chunk_size: 每块行数
+        :param write_chunk: 写入函数 (起始下标, 行列表) -> 逐行结果列表
+        :return: 逐行结果列表
+        """
+        chunk_size = chunk_size or current_app.config.get('BULK_CHUNK_SIZE', 500)
+        results = []
+        try:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                try:
+                    with db.session.begin_nested():
+                        results.extend(write_chunk(start, chunk))
+                except (SQLAlchemyError, ValidationException):
+                    for offset, row in enumerate(chunk):
+                        try:
+                            with db.session.begin_nested():
+                                results.extend(write_chunk(start + offset, [row]))
+                        except (SQLAlchemyError, ValidationException) as e:
+                            message = str(getattr(e, 'orig', None) or e)
+                            results.append(self._bulk_outcome(start + offset, 'failed', message=message))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise DatabaseException(f'批量写入失败: {str(e)}')
+        
+        written = [r['id'] for r in results if r['status'] in ('created', 'updated')]
+        if written:
+            self._after_write(None if None in written else written)
+        return results
+    
+    @staticmethod
+    def _bulk_outcome(index, status, id=None, message=None):
+        """
+        单行批量写入结果
+        :param index: 行在输入列表中的下标
+        :param status: created / updated / not_found / failed
+        :param id: 主键
+        :param message: 失败原因
+        """
+        outcome = {'index': index, 'status': status, 'id': id}
+        if message:
+            outcome['message'] = message
+        return outcome
+    
+    @staticmethod
+    def _group_by_columns(rows):
+        """按字段集合分组（executemany 要求同一批参数的字段一致）"""
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        return list(groups.values())
+    
+    def _natural_value(self, row):
+        """取行数据中的业务唯一键值"""
+        return row.get(self.natural_key) if self.natural_key else None
+    
+    def _lookup_ids(self, rows, key=None):
+        """
+        按唯一键回查主键（MySQL的executemany不返回每行的自增ID）
+        :return: 唯一键值 -> 主键
+        """
+        key = key or self.natural_key
+        if not key:
+            return {}
+        key_column = getattr(self.model, key)
+        keys = [row.get(key) for row in rows]
+        result = db.session.execute(
+            select(key_column, self._primary_key()).where(key_column.in_(keys))
+        )
+        return dict(result.all())
+    
+    def _upsert_statement(self, fields, key, update_fields=None):
+        """
+        生成按唯一键冲突更新的INSERT语句
+        :param fields: 插入的字段
+        :param key: 唯一键字段名
+        :param update_fields: 冲突时更新的字段，默认为除唯一键外的全部字段
+        """
+        table = self.model.__table__
+        fields = set(update_fields or fields) - {key, self._primary_key().key, 'created_at'}
+        if 'updated_at' in table.columns:
+            fields.add('updated_at')
+        fields = sorted(fields) or [key]
+        
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            statement = insert(table)
+            return statement.on_duplicate_key_update({f: statement.inserted[f] for f in fields})
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            statement = insert(table)
+            return statement.on_conflict_do_update(
+                index_elements=[key],
+                set_={f: statement.excluded[f] for f in fields}
+            )
+        raise DatabaseException(f'批量更新不支持当前数据库：{dialect}')
+    
     def count(self, filters=None):
         """
         统计数量
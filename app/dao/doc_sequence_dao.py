@@ -0,0 +1,126 @@
+"""
+单号序列DAO
+"""
+import os
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.exc import IntegrityError
+from app.dao.base_dao import BaseDAO
+from app.models.doc_sequence import DocSequence
+from app.extensions import db
+
+
+class DocSequenceDAO(BaseDAO):
+    """单号序列数据访问对象"""
+    
+    def __init__(self):
+        super().__init__(DocSequence)
+    
+    def reserve(self, prefix, day, size, number_column):
+        """
+        从序列行预留一段连续序号 [start, start + size)
+        在独立连接的短事务中执行并立即提交，不受当前业务事务回滚的影响：
+        UPDATE 持有行锁直到提交，多个进程、节点并发预留时各自拿到互不重叠的号段
+        :param prefix: 单号前缀
+        :param day: 日期（YYYYMMDD）
+        :param size: 号段长度
+        :param number_column: 单号列（如 PurchaseOrder.order_no），当天序列行不存在时据此接续已有单号
+        :return: 号段起始序号
+        """
+        table = self.model.__table__
+        condition = (table.c.seq_prefix == prefix) & (table.c.seq_date == day)
+        for _ in range(3):
+            try:
+                with db.engine.begin() as connection:
+                    updated = connection.execute(
+                        update(table).where(condition).values(next_value=table.c.next_value + size)
+                    ).rowcount
+                    if updated:
+                        end = connection.execute(select(table.c.next_value).where(condition)).scalar()
+                        return end - size
+                    start = self._last_issued(connection, prefix, day, number_column) + 1
+                    connection.execute(insert(table).values(
+                        seq_prefix=prefix, seq_date=day, next_value=start + size
+                    ))
+                    return start
+            except IntegrityError:
+                # 其他进程同时创建了当天的序列行，重试走 UPDATE
+                continue
+        raise RuntimeError(f'单号序列 {prefix}{day} 预留失败')
+    
+    @staticmethod
+    def _last_issued(connection, prefix, day, number_column):
+        """当天已使用的最大序号（兼容启用序列表之前按存储过程生成的单号）"""
+        pattern = f'{prefix}{day}'
+        last = connection.execute(
+            select(number_column)
+            .where(number_column.like(f'{pattern}%'))
+            .order_by(func.length(number_column).desc(), number_column.desc())
+            .limit(1)
+        ).scalar()
+        if last is None:
+            return 0
+        suffix = last[len(pattern):]
+        return int(suffix) if suffix.isdigit() else 0
+
+
+class DocNumberAllocator:
+    """
+    单号分配器：单号格式为 前缀 + YYYYMMDD + 序号（至少4位）
+    每个进程按 DOC_SEQUENCE_BLOCK 向 doc_sequence 预留一段序号，在内存中依次发放，
+    号段用完或跨天时才访问数据库；进程退出时未发放的序号作废，因此单号可能不连续，
+    多个进程交替发放时也不保证按时间递增
+    """
+    
+    def __init__(self):
+        self._blocks = {}  # prefix -> [日期, 下一个序号, 号段结束]
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+    
+    def next_number(self, prefix, number_column, width=4):
+        """
+        分配一个单号
+        :param prefix: 单号前缀
+        :param number_column: 单号列，用于当天首次预留时接续已有单号
+        :param width: 序号最小位数
+        :return: 单号
+        """
+        return self.next_numbers(prefix, number_column, 1, width)[0]
+    
+    def next_numbers(self, prefix, number_column, count, width=4):
+        """
+        一次分配多个单号（批量入库等）：当前号段够用时直接发放，
+        否则一次预留 count + DOC_SEQUENCE_BLOCK - 1 个序号，剩余部分留作新的号段
+        :param prefix: 单号前缀
+        :param number_column: 单号列
+        :param count: 单号个数
+        :param width: 序号最小位数
+        :return: 单号列表
+        """
+        if count <= 0:
+            return []
+        day = datetime.now().strftime('%Y%m%d')
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 出的子进程不能沿用父进程预留的号段
+                self._blocks = {}
+                self._pid = os.getpid()
+            block = self._blocks.get(prefix)
+            if block is None or block[0] != day or block[2] - block[1] < count:
+                size = count + current_app.config.get('DOC_SEQUENCE_BLOCK', 20) - 1
+                start = DocSequenceDAO().reserve(prefix, day, size, number_column)
+                block = self._blocks[prefix] = [day, start, start + size]
+            values = range(block[1], block[1] + count)
+            block[1] += count
+        return [f'{prefix}{day}{value:0{width}d}' for value in values]
+    
+    def reset(self):
+        """丢弃本进程预留的号段"""
+        with self._lock:
+            self._blocks = {}
+
+
+# 进程内共享的单号分配器
+doc_number_allocator = DocNumberAllocator()
@@ -1,15 +1,37 @@
 """
 库存DAO
 """
-from sqlalchemy import text
-from app.dao.base_dao import BaseDAO
+import threading
+import time
+from datetime import date
+from flask import current_app
+from sqlalchemy import select, update, bindparam, func, or_
+from app.dao.base_dao import BaseDAO, on_tables_written
 from app.models.inventory import Inventory
+from app.models.textbook import Textbook
 from app.extensions import db
+from app.utils.exceptions import DatabaseException
+from app.utils.warning_set import WarningSet
+
+# 库存预警集合（库存不足/过多的启用教材），写操作后增量更新
+inventory_warning_set = WarningSet()
+
+# 同步状态：库存表、教材表的 updated_at 水位线与上次同步时间（用于追平其他进程和触发器的修改）
+_warning_state = {'inventory': None, 'textbook': None, 'synced_at': 0.0}
+_warning_lock = threading.Lock()
+
+_WARNING_COLUMNS = (
+    Inventory.textbook_id, Textbook.isbn, Textbook.textbook_name, Textbook.publisher_id, Textbook.type_id,
+    Textbook.status, Inventory.current_quantity, Inventory.min_quantity, Inventory.max_quantity,
+    Inventory.updated_at, Textbook.updated_at.label('textbook_updated_at')
+)
 
 
 class InventoryDAO(BaseDAO):
     """库存数据访问对象"""
     
+    eager_relations = ('textbook',)
+    
     def __init__(self):
         super().__init__(Inventory)
     
@@ -21,56 +43,101 @@ class InventoryDAO(BaseDAO):
         """根据教材ID查询库存（别名方法）"""
         return self.get_by_textbook(textbook_id)
     
-    def get_low_stock(self, page=1, per_page=20):
+    def get_low_stock(self, page=1, per_page=20, cursor=None, count_policy=None):
         """
         获取库存不足的教材
         :param page: 页码
         :param per_page: 每页数量
-        :return: (items, total)
+        :param cursor: 分页游标（为None时使用页码分页）
+        :param count_policy: 总数统计策略（exact/cached/estimated/none，默认见 _paginate_query）
+        :return: Page，可解包为 (items, total)
         """
-        query = self.model.query.filter(
+        query = self._with_relations(self.model.query.filter(
             self.model.current_quantity < self.model.min_quantity
-        )
-        total = query.count()
-        items = query.order_by(self.model.current_quantity).limit(per_page).offset(
-            (page - 1) * per_page
-        ).all()
-        return items, total
+        ))
+        return self._paginate_query(query, page, per_page, sort_column=self.model.current_quantity,
+                                    cursor=cursor,
+                                    count_policy=count_policy)
     
-    def get_high_stock(self, page=1, per_page=20):
+    def get_high_stock(self, page=1, per_page=20, cursor=None, count_policy=None):
         """
         获取库存过多的教材
         :param page: 页码
         :param per_page: 每页数量
-        :return: (items, total)
+        :param cursor: 分页游标（为None时使用页码分页）
+        :param count_policy: 总数统计策略（exact/cached/estimated/none，默认见 _paginate_query）
+        :return: Page，可解包为 (items, total)
         """
-        query = self.model.query.filter(
+        query = self._with_relations(self.model.query.filter(
             self.model.current_quantity > self.model.max_quantity
-        )
-        total = query.count()
-        items = query.order_by(
-            self.model.current_quantity.desc()
-        ).limit(per_page).offset((page - 1) * per_page).all()
-        return items, total
+        ))
+        return self._paginate_query(query, page, per_page, sort_column=self.model.current_quantity,
+                                    descending=True, cursor=cursor,
+                                    count_policy=count_policy)
     
     def get_warnings(self):
-        """获取所有预警库存（使用视图v_inventory_warning）"""
-        result = db.session.execute(text("""
-            SELECT 
-                textbook_id,
-                isbn,
-                textbook_name,
-                publisher_name,
-                type_name,
-                current_quantity,
-                min_quantity,
-                max_quantity,
-                warning_status
-            FROM v_inventory_warning
-            ORDER BY warning_level ASC, gap_quantity DESC
-        """))
-        rows = result.fetchall()
-        return rows
+        """
+        获取所有预警库存（读内存中的预警集合，条件与视图 v_inventory_warning 一致）
+        :return: 预警条目列表，按预警级别升序、缺口/超量数量降序
+        """
+        self.ensure_warning_set()
+        return inventory_warning_set.items()
+    
+    def ensure_warning_set(self):
+        """
+        确保预警集合可用：未装载时全量装载，
+        超过 INVENTORY_WARNING_REFRESH 秒未同步时按 updated_at 增量同步
+        """
+        if not inventory_warning_set.ready:
+            self.build_warning_set()
+            return
+        interval = current_app.config.get('INVENTORY_WARNING_REFRESH', 5)
+        if time.monotonic() - _warning_state['synced_at'] >= interval:
+            self.sync_warning_set()
+    
+    def build_warning_set(self):
+        """全量装载预警集合"""
+        with _warning_lock:
+            watermarks = db.session.execute(
+                select(func.max(Inventory.updated_at), func.max(Textbook.updated_at))
+                .select_from(Inventory).join(Textbook, Inventory.textbook_id == Textbook.textbook_id)
+            ).one()
+            rows = db.session.execute(self._warning_query().where(
+                Textbook.status == 1,
+                or_(Inventory.current_quantity < Inventory.min_quantity,
+                    Inventory.current_quantity > Inventory.max_quantity)
+            )).all()
+            inventory_warning_set.load(rows)
+            _warning_state.update(inventory=watermarks[0], textbook=watermarks[1], synced_at=time.monotonic())
+    
+    def sync_warning_set(self):
+        """
+        按 updated_at 水位线增量同步：重新判定库存或教材有变化的行，产生进入/离开预警的事件
+        """
+        with _warning_lock:
+            conditions = []
+            if _warning_state['inventory'] is not None:
+                # TIMESTAMP精度为秒，用 >= 重新处理同一秒内的行，重复判定是幂等的
+                conditions.append(Inventory.updated_at >= _warning_state['inventory'])
+            if _warning_state['textbook'] is not None:
+                conditions.append(Textbook.updated_at >= _warning_state['textbook'])
+            query = self._warning_query()
+            if len(conditions) == 2:
+                query = query.where(or_(*conditions))
+            rows = db.session.execute(query).all()
+            inventory_warning_set.apply(rows)
+            for row in rows:
+                for key, value in (('inventory', row.updated_at), ('textbook', row.textbook_updated_at)):
+                    if value is not None and (_warning_state[key] is None or value > _warning_state[key]):
+                        _warning_state[key] = value
+            _warning_state['synced_at'] = time.monotonic()
+    
+    @staticmethod
+    def _warning_query():
+        """预警判定所需的库存和教材字段"""
+        return select(*_WARNING_COLUMNS).select_from(Inventory).join(
+            Textbook, Inventory.textbook_id == Textbook.textbook_id
+        )
     
     def get_zero_stock(self):
         """获取零库存教材"""
@@ -89,3 +156,99 @@ class InventoryDAO(BaseDAO):
         ).scalar()
         return float(result) if result else 0.0
 
+    
+    def deduct(self, textbook_id, quantity):
+        """
+        扣减库存（出库）：单条条件 UPDATE，库存不足时不修改，并发扣减不会丢失更新
+        不提交事务，由调用方提交
+        :param textbook_id: 教材ID
+        :param quantity: 扣减数量
+        :return: 是否扣减成功
+        """
+        return self.deduct_many({textbook_id: quantity}) == 1
+    
+    def deduct_many(self, quantities):
+        """
+        批量扣减库存（executemany），条件同 deduct
+        :param quantities: {教材ID: 扣减数量}
+        :return: 扣减成功的行数
+        """
+        if not quantities:
+            return 0
+        table = self.model.__table__
+        statement = update(table).where(
+            table.c.textbook_id == bindparam('tid'),
+            table.c.current_quantity >= bindparam('qty')
+        ).values(
+            current_quantity=table.c.current_quantity - bindparam('qty'),
+            total_out_quantity=table.c.total_out_quantity + bindparam('qty'),
+            last_out_date=date.today()
+        )
+        params = [{'tid': tid, 'qty': qty} for tid, qty in sorted(quantities.items())]
+        return db.session.execute(statement, params).rowcount
+    
+    def reorder_inputs(self):
+        """
+        补货建议的教材输入：启用教材的出版社、库存和当前预警阈值，按教材ID升序
+        :return: [(教材ID, 出版社ID, 当前库存, 最低库存, 最高库存)]
+        """
+        return db.session.execute(
+            select(
+                Textbook.textbook_id, Textbook.publisher_id, func.coalesce(Inventory.current_quantity, 0),
+                Inventory.min_quantity, Inventory.max_quantity
+            ).select_from(Textbook).outerjoin(Inventory, Inventory.textbook_id == Textbook.textbook_id)
+            .where(Textbook.status == 1)
+            .order_by(Textbook.textbook_id)
+        ).all()
+    
+    def update_thresholds(self, thresholds):
+        """
+        批量修改预警阈值（executemany 并提交），没有库存记录的教材不处理
+        :param thresholds: {教材ID: (最低库存, 最高库存)}
+        :return: 更新的行数
+        """
+        if not thresholds:
+            return 0
+        table = self.model.__table__
+        statement = update(table).where(table.c.textbook_id == bindparam('tid')).values(
+            min_quantity=bindparam('min_qty'),
+            max_quantity=bindparam('max_qty')
+        )
+        params = [
+            {'tid': tid, 'min_qty': min_qty, 'max_qty': max_qty}
+            for tid, (min_qty, max_qty) in sorted(thresholds.items())
+        ]
+        try:
+            updated = db.session.execute(statement, params).rowcount
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise DatabaseException(f'更新预警阈值失败: {str(e)}')
+        self._after_write()
+        return updated
+    
+    def lock_quantities(self, textbook_ids):
+        """
+        按 textbook_id 顺序锁定库存行（SELECT ... FOR UPDATE）并返回当前数量
+        多个事务总按同一顺序加锁，批量出库之间不会死锁
+        :param textbook_ids: 教材ID列表
+        :return: {教材ID: 当前库存数量}，没有库存记录的教材不在结果中
+        """
+        if not textbook_ids:
+            return {}
+        rows = db.session.execute(
+            select(self.model.textbook_id, self.model.current_quantity)
+            .where(self.model.textbook_id.in_(set(textbook_ids)))
+            .order_by(self.model.textbook_id)
+            .with_for_update()
+        )
+        return {textbook_id: quantity or 0 for textbook_id, quantity in rows}
+
+
+def _refresh_warning_set():
+    """库存、教材写入后增量同步预警集合（未装载时不处理，首次读取时全量装载）"""
+    if inventory_warning_set.ready:
+        InventoryDAO().sync_warning_set()
+
+
+on_tables_written(_refresh_warning_set, 'inventory', 'textbook')
@@ -0,0 +1,171 @@
+"""
+库存流水DAO
+"""
+from sqlalchemy import select, insert, func, and_, or_
+from app.dao.base_dao import BaseDAO
+from app.models.inventory_movement import InventoryMovement
+from app.models.inventory_snapshot import InventorySnapshot
+from app.models.inventory import Inventory
+from app.models.textbook import Textbook
+from app.extensions import db
+
+# 余额字段：流水变化量字段 -> 快照/库存累计字段
+BALANCE_FIELDS = (
+    ('quantity_change', 'current_quantity'),
+    ('in_change', 'total_in_quantity'),
+    ('out_change', 'total_out_quantity'),
+)
+
+# 汇总快照之后的流水时，每条查询包含的教材数（每本教材一个索引范围条件）
+PENDING_CHUNK_SIZE = 500
+
+
+class InventoryMovementDAO(BaseDAO):
+    """库存流水数据访问对象（流水只追加，不修改、不删除）"""
+    
+    def __init__(self):
+        super().__init__(InventoryMovement)
+    
+    def record_many(self, movements):
+        """
+        追加流水（executemany，不提交事务，与引起库存变动的修改在同一事务中提交）
+        :param movements: 流水字典列表（textbook_id、movement_type、quantity_change、in_change、out_change、
+                          ref_type、ref_id、operator）
+        """
+        if movements:
+            db.session.execute(insert(self.model.__table__), movements)
+    
+    def balances_as_of(self, at=None, textbook_ids=None):
+        """
+        按时间点查询库存：每本教材取 at 之前最近的快照，再加上快照之后、at 之前的流水
+        快照按 INVENTORY_SNAPSHOT_INTERVAL 条流水压缩一次，需要累加的流水条数有上限
+        :param at: 时间点（datetime），为None时查询当前
+        :param textbook_ids: 教材ID列表，为None时查询全部
+        :return: {教材ID: {'current_quantity', 'total_in_quantity', 'total_out_quantity', 'last_movement_id'}}
+        """
+        snapshots = db.session.execute(select(self._latest_snapshots(at, textbook_ids))).all()
+        balances = {
+            row.textbook_id: {
+                'current_quantity': row.current_quantity,
+                'total_in_quantity': row.total_in_quantity,
+                'total_out_quantity': row.total_out_quantity,
+                'last_movement_id': row.last_movement_id
+            }
+            for row in snapshots
+        }
+        for row in self._pending_totals(self._after_ids(snapshots, textbook_ids), at):
+            balance = balances.setdefault(row.textbook_id, {
+                'current_quantity': 0, 'total_in_quantity': 0, 'total_out_quantity': 0
+            })
+            for change, field in BALANCE_FIELDS:
+                balance[field] += int(getattr(row, change) or 0)
+            balance['last_movement_id'] = row.last_movement_id
+        return balances
+    
+    def compact(self, interval):
+        """
+        快照压缩：快照之后累计了 interval 条及以上流水的教材，在最新一条流水处生成新快照
+        :param interval: 触发压缩的流水条数
+        :return: 新生成的快照数
+        """
+        snapshots = db.session.execute(select(self._latest_snapshots())).all()
+        previous = {row.textbook_id: row for row in snapshots}
+        rows = []
+        for row in self._pending_totals(self._after_ids(snapshots), having_count=interval):
+            base = previous.get(row.textbook_id)
+            snapshot = {
+                'textbook_id': row.textbook_id,
+                'last_movement_id': row.last_movement_id,
+                'snapshot_at': row.snapshot_at
+            }
+            for change, field in BALANCE_FIELDS:
+                snapshot[field] = (getattr(base, field) if base else 0) + int(getattr(row, change) or 0)
+            rows.append(snapshot)
+        if rows:
+            db.session.execute(insert(InventorySnapshot.__table__), rows)
+        db.session.commit()
+        return len(rows)
+    
+    def inventory_balances(self):
+        """
+        库存表中触发器维护的数量
+        :return: {教材ID: {'current_quantity', 'total_in_quantity', 'total_out_quantity'}}
+        """
+        rows = db.session.execute(select(
+            Inventory.textbook_id, Inventory.current_quantity,
+            Inventory.total_in_quantity, Inventory.total_out_quantity
+        ))
+        return {
+            row.textbook_id: {field: getattr(row, field) or 0 for _, field in BALANCE_FIELDS}
+            for row in rows
+        }
+    
+    @staticmethod
+    def _latest_snapshots(at=None, textbook_ids=None):
+        """
+        每本教材在 at 之前（含）的最新快照
+        :return: 子查询
+        """
+        latest = select(
+            InventorySnapshot.textbook_id,
+            func.max(InventorySnapshot.last_movement_id).label('last_movement_id')
+        )
+        if at is not None:
+            latest = latest.where(InventorySnapshot.snapshot_at <= at)
+        if textbook_ids is not None:
+            latest = latest.where(InventorySnapshot.textbook_id.in_(textbook_ids))
+        latest = latest.group_by(InventorySnapshot.textbook_id).subquery()
+        return select(InventorySnapshot).join(latest, and_(
+            InventorySnapshot.textbook_id == latest.c.textbook_id,
+            InventorySnapshot.last_movement_id == latest.c.last_movement_id
+        )).subquery()
+    
+    @staticmethod
+    def _after_ids(snapshots, textbook_ids=None):
+        """
+        每本教材需要从哪条流水之后开始累加：有快照的教材为快照的最后流水ID，没有快照的教材为0
+        :param snapshots: 快照行
+        :param textbook_ids: 教材ID列表，为None时为全部教材
+        :return: {教材ID: 流水ID}
+        """
+        if textbook_ids is None:
+            textbook_ids = db.session.scalars(select(Textbook.textbook_id))
+        after_ids = dict.fromkeys(textbook_ids, 0)
+        after_ids.update((row.textbook_id, row.last_movement_id) for row in snapshots)
+        return after_ids
+    
+    @staticmethod
+    def _pending_totals(after_ids, at=None, having_count=None):
+        """
+        快照之后（at 之前）的流水按教材汇总
+        由快照驱动：每本教材一个 textbook_id = ? AND movement_id > ? 条件，
+        在 (textbook_id, movement_id) 索引上各是一段范围扫描，已压缩进快照的历史流水不会被读取；
+        没有快照的教材从0开始（这些教材的流水都还未压缩）。教材按 PENDING_CHUNK_SIZE 本一批查询
+        :param after_ids: {教材ID: 从该流水ID之后开始累加}
+        :param at: 时间点，为None时不限
+        :param having_count: 只返回流水条数不少于该值的教材
+        :return: 汇总行列表（textbook_id、quantity_change、in_change、out_change、last_movement_id、snapshot_at）
+        """
+        movement = InventoryMovement
+        items = sorted(after_ids.items())
+        rows = []
+        for start in range(0, len(items), PENDING_CHUNK_SIZE):
+            ranges = [
+                and_(movement.textbook_id == textbook_id, movement.movement_id > after_id)
+                for textbook_id, after_id in items[start:start + PENDING_CHUNK_SIZE]
+            ]
+            query = select(
+                movement.textbook_id,
+                func.sum(movement.quantity_change).label('quantity_change'),
+                func.sum(movement.in_change).label('in_change'),
+                func.sum(movement.out_change).label('out_change'),
+                func.max(movement.movement_id).label('last_movement_id'),
+                func.max(movement.created_at).label('snapshot_at')
+            ).where(or_(*ranges))
+            if at is not None:
+                query = query.where(movement.created_at <= at)
+            query = query.group_by(movement.textbook_id)
+            if having_count:
+                query = query.having(func.count() >= having_count)
+            rows.extend(db.session.execute(query))
+        return rows
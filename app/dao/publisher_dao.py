@@ -3,11 +3,14 @@
 """
 from app.dao.base_dao import BaseDAO
 from app.models.publisher import Publisher
+from app.extensions import db
 
 
 class PublisherDAO(BaseDAO):
     """出版社数据访问对象"""
     
+    natural_key = 'publisher_name'
+    
     def __init__(self):
         super().__init__(Publisher)
     
@@ -15,24 +18,38 @@ class PublisherDAO(BaseDAO):
         """根据名称查询"""
         return self.model.query.filter_by(publisher_name=name).first()
     
-    def search_by_keyword(self, keyword, page=1, per_page=20):
+    def search_by_keyword(self, keyword, page=1, per_page=20, cursor=None, count_policy=None):
         """
         关键字搜索
         :param keyword: 搜索关键字
         :param page: 页码
         :param per_page: 每页数量
-        :return: (items, total)
+        :param cursor: 分页游标（为None时使用页码分页）
+        :param count_policy: 总数统计策略（exact/cached/estimated/none，默认见 _paginate_query）
+        :return: Page，可解包为 (items, total)
         """
         query = self.model.query.filter(
             self.model.publisher_name.like(f'%{keyword}%')
         )
-        total = query.count()
-        items = query.limit(per_page).offset((page - 1) * per_page).all()
-        return items, total
+        return self._paginate_query(query, page, per_page, cursor=cursor,
+                                    count_policy=count_policy)
     
     def get_active_publishers(self):
-        """获取所有启用的出版社"""
-        return self.model.query.filter_by(status=1).order_by(
-            self.model.publisher_name
-        ).all()
+        """
+        获取所有启用的出版社（读缓存）
+        :return: 出版社字典列表
+        """
+        return self._cached('active', lambda: [
+            publisher.to_dict() for publisher in
+            self.model.query.filter_by(status=1).order_by(self.model.publisher_name)
+        ])
+    
+    def get_name_map(self):
+        """
+        出版社ID -> 名称（包含停用的出版社，读缓存）
+        :return: 字典
+        """
+        return self._cached('names', lambda: dict(
+            db.session.query(self.model.publisher_id, self.model.publisher_name).all()
+        ))
 
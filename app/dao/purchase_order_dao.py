@@ -1,35 +1,110 @@
 """
 订购DAO
 """
+from datetime import date
+from sqlalchemy import select, update, bindparam, case, func, or_, literal, String
 from app.dao.base_dao import BaseDAO
+from app.utils.exceptions import DatabaseException, NotFoundException
 from app.models.purchase_order import PurchaseOrder
+from app.models.user import User
 from app.extensions import db
 
 
 class PurchaseOrderDAO(BaseDAO):
     """订购数据访问对象"""
     
+    eager_relations = ('textbook',)
+    # 批量创建后按订单编号回查主键
+    natural_key = 'order_no'
+    # 在途（未到齐）订单的状态
+    open_statuses = ('待审核', '已审核', '已订购', '部分到货')
+    
     def __init__(self):
         super().__init__(PurchaseOrder)
     
+    def teacher_visibility_clause(self, username):
+        """
+        教师可见订单的过滤条件：订购人是自己，或订购人是启用状态的普通用户
+        用关联子查询（EXISTS）表达，由数据库按 user.username 唯一索引逐行判断，
+        不再把全部普通用户名拼成 IN 列表
+        :param username: 当前教师用户名
+        :return: SQL条件表达式
+        """
+        normal_user = db.exists().where(
+            User.username == self.model.order_person,
+            User.role == '普通用户',
+            User.status == 1
+        )
+        return db.or_(self.model.order_person == username, normal_user)
+    
+    def get_with_teacher_visibility(self, order_id, username):
+        """
+        查询订单并同时判断教师是否可见（一条SQL）
+        :param order_id: 订单ID
+        :param username: 当前教师用户名
+        :return: (订单实例, 是否可见)
+        :raises NotFoundException: 订单不存在
+        """
+        try:
+            row = self._with_relations(
+                db.session.query(
+                    self.model,
+                    self.teacher_visibility_clause(username).label('visible')
+                )
+            ).filter(self.model.order_id == order_id).first()
+        except Exception as e:
+            raise DatabaseException(f'查询失败: {str(e)}')
+        if row is None:
+            raise NotFoundException('PurchaseOrder不存在')
+        return row[0], bool(row[1])
+    
+    def mark_delivered(self, quantities, username):
+        """
+        把"已到货"订单改为"已发放"并在备注中追加发放记录（executemany，不提交事务）
+        条件包含状态和到货数量，订单已被并发修改时该行不更新
+        :param quantities: {订单ID: 发放数量（即到货数量）}
+        :param username: 发放人
+        :return: 更新的行数
+        """
+        if not quantities:
+            return 0
+        table = self.model.__table__
+        note = bindparam('note', type_=String)
+        statement = update(table).where(
+            table.c.order_id == bindparam('oid'),
+            table.c.order_status == '已到货',
+            table.c.arrived_quantity == bindparam('qty')
+        ).values(
+            order_status='已发放',
+            remarks=case(
+                (or_(table.c.remarks.is_(None), table.c.remarks == ''), note),
+                else_=table.c.remarks + literal('\n') + note
+            )
+        )
+        today = date.today()
+        params = [
+            {'oid': order_id, 'qty': qty, 'note': f'[{today}] 由 {username} 发放，数量：{qty}'}
+            for order_id, qty in sorted(quantities.items())
+        ]
+        return db.session.execute(statement, params).rowcount
+    
     def get_by_order_no(self, order_no):
         """根据订单号查询"""
         return self.model.query.filter_by(order_no=order_no).first()
     
-    def get_by_status(self, status, page=1, per_page=20):
+    def get_by_status(self, status, page=1, per_page=20, cursor=None, count_policy=None):
         """
         按状态查询
         :param status: 订单状态
         :param page: 页码
         :param per_page: 每页数量
-        :return: (items, total)
+        :param cursor: 分页游标（为None时使用页码分页）
+        :param count_policy: 总数统计策略（exact/cached/estimated/none，默认见 _paginate_query）
+        :return: Page，可解包为 (items, total)
         """
-        query = self.model.query.filter_by(order_status=status)
-        total = query.count()
-        items = query.order_by(
-            self.model.order_date.desc()
-        ).limit(per_page).offset((page - 1) * per_page).all()
-        return items, total
+        query = self._with_relations(self.model.query.filter_by(order_status=status))
+        return self._paginate_query(query, page, per_page, sort_column=self.model.order_date,
+                                    descending=True, cursor=cursor, count_policy=count_policy)
     
     def get_by_textbook(self, textbook_id):
         """获取指定教材的所有订单"""
@@ -40,12 +115,42 @@ class PurchaseOrderDAO(BaseDAO):
     def get_pending_orders(self):
         """获取待处理的订单（待审核、已审核、已订购）"""
         return self.model.query.filter(
-            self.model.order_status.in_(['待审核', '已审核', '已订购', '部分到货'])
+            self.model.order_status.in_(self.open_statuses)
         ).order_by(self.model.order_date).all()
     
+    def demand_since(self, start_date, exclude_remarks=None):
+        """
+        订购需求明细（补货建议的输入，只取三列）
+        :param start_date: 起始订购日期（含）
+        :param exclude_remarks: 备注等于该值的订单不计入需求（系统生成的补货订单）
+        :return: [(教材ID, 订购日期, 订购数量)]
+        """
+        query = select(
+            self.model.textbook_id, self.model.order_date, self.model.order_quantity
+        ).where(
+            self.model.order_date >= start_date,
+            self.model.order_status != '已取消'
+        )
+        if exclude_remarks is not None:
+            query = query.where(or_(self.model.remarks.is_(None), self.model.remarks != exclude_remarks))
+        return db.session.execute(query).all()
+    
+    def open_quantities(self):
+        """
+        各教材在途数量（未到齐订单的 订购数量 - 已到货数量）
+        :return: {教材ID: 在途数量}
+        """
+        rows = db.session.execute(
+            select(
+                self.model.textbook_id,
+                func.sum(self.model.order_quantity - func.coalesce(self.model.arrived_quantity, 0))
+            ).where(self.model.order_status.in_(self.open_statuses)).group_by(self.model.textbook_id)
+        )
+        return {textbook_id: int(quantity or 0) for textbook_id, quantity in rows}
+    
     def search(self, keyword=None, status=None, start_date=None, end_date=None, 
                order_person=None, current_username=None, allowed_roles=None, 
-               page=1, per_page=20):
+               page=1, per_page=20, cursor=None, count_policy=None):
         """
         多条件搜索
         :param keyword: 搜索关键字
@@ -57,7 +162,26 @@ class PurchaseOrderDAO(BaseDAO):
         :param allowed_roles: 允许查看的角色列表（用于教师权限过滤）
         :param page: 页码
         :param per_page: 每页数量
-        :return: (items, total)
+        :param cursor: 分页游标（为None时使用页码分页）
+        :param count_policy: 总数统计策略（exact/cached/estimated/none，默认见 _paginate_query）
+        :return: Page，可解包为 (items, total)
+        """
+        query = self._search_query(keyword=keyword, status=status, start_date=start_date,
+                                   end_date=end_date, order_person=order_person,
+                                   current_username=current_username, allowed_roles=allowed_roles)
+        query = self._with_relations(query)
+        return self._paginate_query(query, page, per_page, sort_column=self.model.order_date,
+                                    descending=True, cursor=cursor, count_policy=count_policy)
+    
+    def _base_query(self, filters=None):
+        """导出使用与列表相同的搜索条件和数据权限过滤"""
+        return self._search_query(**(filters or {}))
+    
+    def _search_query(self, keyword=None, status=None, start_date=None, end_date=None,
+                      order_person=None, current_username=None, allowed_roles=None):
+        """
+        构造搜索条件（参数含义见 search）
+        :return: 查询对象
         """
         query = self.model.query
         
@@ -82,27 +206,9 @@ class PurchaseOrderDAO(BaseDAO):
         if order_person:
             query = query.filter_by(order_person=order_person)
         
-        # 教师特殊权限：查看自己和普通用户的订单
+        # 教师特殊权限：查看order_person是自己或普通用户的订单
         if current_username and allowed_roles:
-            # 教师可以查看order_person是自己或普通用户的订单
-            # 需要通过订购人的用户名查询用户角色
-            from app.models.user import User
-            
-            # 获取普通用户的用户名列表
-            normal_users = db.session.query(User.username).filter_by(role='普通用户', status=1).all()
-            normal_usernames = [u[0] for u in normal_users]
-            
-            # 过滤条件：订购人是当前用户或者是普通用户
-            query = query.filter(
-                db.or_(
-                    self.model.order_person == current_username,
-                    self.model.order_person.in_(normal_usernames)
-                )
-            )
+            query = query.filter(self.teacher_visibility_clause(current_username))
         
-        total = query.count()
-        items = query.order_by(
-            self.model.order_date.desc()
-        ).limit(per_page).offset((page - 1) * per_page).all()
-        return items, total
+        return query
 
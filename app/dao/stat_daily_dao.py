@@ -0,0 +1,40 @@
+"""
+按日统计汇总DAO
+"""
+from sqlalchemy import select, text, func
+from app.dao.base_dao import BaseDAO
+from app.models.stat_daily import StatDaily
+from app.extensions import db
+
+# 汇总的数量字段
+STAT_DAILY_FIELDS = ('order_count', 'order_quantity', 'stock_in_count', 'arrived_quantity', 'issued_quantity')
+
+
+class StatDailyDAO(BaseDAO):
+    """按日统计汇总数据访问对象"""
+    
+    def __init__(self):
+        super().__init__(StatDaily)
+    
+    def get_range(self, start_date, end_date):
+        """
+        读取日期范围内的汇总行（按主键范围扫描，每天最多一行）
+        :param start_date: 开始日期（含）
+        :param end_date: 结束日期（含）
+        :return: 按日期升序的行列表，没有业务的日期没有行
+        """
+        columns = [getattr(self.model, field) for field in STAT_DAILY_FIELDS]
+        return db.session.execute(
+            select(self.model.stat_date, *columns)
+            .where(self.model.stat_date.between(start_date, end_date))
+            .order_by(self.model.stat_date)
+        ).all()
+    
+    def rebuild(self):
+        """
+        全量重建（存储过程 sp_rebuild_daily_statistics）
+        :return: 重建后的行数
+        """
+        db.session.execute(text("CALL sp_rebuild_daily_statistics()"))
+        db.session.commit()
+        return db.session.execute(select(func.count()).select_from(self.model)).scalar()
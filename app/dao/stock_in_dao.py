@@ -1,14 +1,23 @@
 """
 入库DAO
 """
+from sqlalchemy import select
 from app.dao.base_dao import BaseDAO
 from app.models.stock_in import StockIn
+from app.models.purchase_order import PurchaseOrder
+from app.models.textbook import Textbook
 from app.extensions import db
 
 
 class StockInDAO(BaseDAO):
     """入库数据访问对象"""
     
+    eager_relations = ('textbook', 'order')
+    # 入库/删除入库触发器会更新订单到货数量和库存
+    dependent_tables = ('purchase_order', 'inventory')
+    # 批量入库后按入库单号回查主键
+    natural_key = 'stock_in_no'
+    
     def __init__(self):
         super().__init__(StockIn)
     
@@ -28,8 +37,24 @@ class StockInDAO(BaseDAO):
             self.model.stock_in_date.desc()
         ).all()
     
+    def lead_times_since(self, start_date):
+        """
+        到货周期明细（补货建议的输入）：入库记录及其订单的订购日期、教材的出版社
+        :param start_date: 起始入库日期（含）
+        :return: [(出版社ID, 订购日期, 入库日期, 实际入库数量)]
+        """
+        return db.session.execute(
+            select(
+                Textbook.publisher_id, PurchaseOrder.order_date,
+                self.model.stock_in_date, self.model.actual_quantity
+            ).select_from(self.model)
+            .join(PurchaseOrder, self.model.order_id == PurchaseOrder.order_id)
+            .join(Textbook, self.model.textbook_id == Textbook.textbook_id)
+            .where(self.model.stock_in_date >= start_date)
+        ).all()
+    
     def search(self, keyword=None, start_date=None, end_date=None, 
-               page=1, per_page=20):
+               page=1, per_page=20, cursor=None, count_policy=None):
         """
         多条件搜索
         :param keyword: 搜索关键字
@@ -37,7 +62,23 @@ class StockInDAO(BaseDAO):
         :param end_date: 结束日期
         :param page: 页码
         :param per_page: 每页数量
-        :return: (items, total)
+        :param cursor: 分页游标（为None时使用页码分页）
+        :param count_policy: 总数统计策略（exact/cached/estimated/none，默认见 _paginate_query）
+        :return: Page，可解包为 (items, total)
+        """
+        query = self._with_relations(self._search_query(keyword, start_date, end_date))
+        return self._paginate_query(query, page, per_page, sort_column=self.model.stock_in_date,
+                                    descending=True, cursor=cursor,
+                                    count_policy=count_policy)
+    
+    def _base_query(self, filters=None):
+        """导出使用与列表相同的搜索条件"""
+        return self._search_query(**(filters or {}))
+    
+    def _search_query(self, keyword=None, start_date=None, end_date=None):
+        """
+        构造搜索条件（参数含义见 search）
+        :return: 查询对象
         """
         query = self.model.query
         
@@ -55,9 +96,5 @@ class StockInDAO(BaseDAO):
         if end_date:
             query = query.filter(self.model.stock_in_date <= end_date)
         
-        total = query.count()
-        items = query.order_by(
-            self.model.stock_in_date.desc()
-        ).limit(per_page).offset((page - 1) * per_page).all()
-        return items, total
+        return query
 
@@ -1,14 +1,43 @@
 """
 教材DAO
 """
-from app.dao.base_dao import BaseDAO
+import threading
+import time
+from bisect import bisect_right
+from flask import current_app
+from app.dao.base_dao import BaseDAO, resolve_count_policy
 from app.models.textbook import Textbook
+from app.models.inventory import Inventory
 from app.extensions import db
+from app.utils.ngram_index import NgramIndex
+from app.utils.exceptions import ValidationException
+from app.utils.pagination import Page, encode_cursor, decode_cursor, COUNT_POLICIES
+
+# 教材关键字倒排索引（名称/ISBN/作者），只收录启用状态的教材
+textbook_search_index = NgramIndex({'textbook_name': 3, 'isbn': 2, 'author': 1})
+
+# 索引同步状态：updated_at 水位线与上次同步时间（用于多进程部署下增量追平其他进程的写入）
+_index_state = {'watermark': None, 'synced_at': 0.0}
+_index_lock = threading.RLock()
+
+_INDEX_COLUMNS = (
+    Textbook.textbook_id, Textbook.textbook_name, Textbook.isbn, Textbook.author,
+    Textbook.publisher_id, Textbook.type_id, Textbook.status, Textbook.updated_at
+)
 
 
 class TextbookDAO(BaseDAO):
     """教材数据访问对象"""
     
+    # 列表只读查询（as_rows=True）在教材字段之外附带的关联字段
+    # （出版社、类型名称由服务层从参考数据缓存补充，不再连表）
+    ROW_EXTRA_COLUMNS = ('current_quantity',)
+    
+    eager_relations = ('publisher', 'textbook_type', 'inventory')
+    # 新增教材触发器会初始化库存记录
+    dependent_tables = ('inventory',)
+    natural_key = 'isbn'
+    
     def __init__(self):
         super().__init__(Textbook)
     
@@ -17,15 +46,47 @@ class TextbookDAO(BaseDAO):
         return self.model.query.filter_by(isbn=isbn).first()
     
     def search(self, keyword=None, publisher_id=None, type_id=None, 
-               page=1, per_page=20):
+               page=1, per_page=20, cursor=None, count_policy=None, as_rows=False):
         """
         多条件搜索
-        :param keyword: 搜索关键字（教材名称或作者）
+        启用倒排索引（TEXTBOOK_SEARCH_INDEX）时，关键字搜索由索引给出候选ID并排序，
+        数据库只按主键取当前页
+        :param keyword: 搜索关键字（教材名称、作者或ISBN）
         :param publisher_id: 出版社ID
         :param type_id: 类型ID
         :param page: 页码
         :param per_page: 每页数量
-        :return: (items, total)
+        :param cursor: 分页游标（为None时使用页码分页）
+        :param count_policy: 总数统计策略（exact/cached/estimated/none，默认见 _paginate_query）
+        :param as_rows: 为True时返回 Core 结果行（教材字段 + ROW_EXTRA_COLUMNS），不构建ORM实例
+        :return: Page，可解包为 (items, total)
+        """
+        if keyword and current_app.config.get('TEXTBOOK_SEARCH_INDEX'):
+            self.ensure_search_index()
+            return self._search_indexed(keyword, publisher_id, type_id, page, per_page, cursor,
+                                        count_policy, as_rows)
+        
+        query = self._search_query(keyword, publisher_id, type_id)
+        query = self._as_rows(query) if as_rows else self._with_relations(query)
+        return self._paginate_query(query, page, per_page, cursor=cursor,
+                                    count_policy=count_policy)
+    
+    def _as_rows(self, query):
+        """将教材查询改为按列取值：教材全部字段 + 当前库存"""
+        return query.outerjoin(Inventory, Inventory.textbook_id == Textbook.textbook_id) \
+            .with_entities(
+                *Textbook.__table__.columns,
+                Inventory.current_quantity.label('current_quantity')
+            )
+    
+    def _base_query(self, filters=None):
+        """导出使用与列表相同的搜索条件（关键字按 LIKE 过滤）"""
+        return self._search_query(**(filters or {}))
+    
+    def _search_query(self, keyword=None, publisher_id=None, type_id=None):
+        """
+        构造搜索条件（参数含义见 search），只包含启用状态的教材
+        :return: 查询对象
         """
         query = self.model.query.filter_by(status=1)
         
@@ -47,9 +108,121 @@ class TextbookDAO(BaseDAO):
         if type_id:
             query = query.filter_by(type_id=type_id)
         
-        total = query.count()
-        items = query.limit(per_page).offset((page - 1) * per_page).all()
-        return items, total
+        return query
+    
+    def _search_indexed(self, keyword, publisher_id, type_id, page, per_page, cursor,
+                        count_policy=None, as_rows=False):
+        """
+        基于倒排索引的关键字搜索
+        结果按 (得分降序, ID升序) 排列，游标为上一页最后一条的 (得分, ID)
+        命中列表已在内存中，总数没有额外开销：count_policy 为 none（游标分页的默认值）时不返回总数，
+        其余策略（cached/estimated）都返回精确总数
+        """
+        count_policy = resolve_count_policy(count_policy, cursor)
+        if count_policy not in COUNT_POLICIES:
+            raise ValidationException(f'不支持的总数统计策略：{count_policy}')
+        ranked = textbook_search_index.search(
+            keyword, filters={'publisher_id': publisher_id, 'type_id': type_id}
+        )
+        total = len(ranked)
+        
+        if cursor is None:
+            start = (page - 1) * per_page
+        elif cursor:
+            score, last_id = decode_cursor(cursor, [int, int])
+            start = bisect_right(ranked, (-score, last_id), key=lambda r: (-r[0], r[1]))
+        else:
+            start = 0
+        window = ranked[start:start + per_page]
+        has_next = start + per_page < total
+        
+        items = []
+        if window:
+            ids = [doc_id for _, doc_id in window]
+            query = self.model.query.filter(self.model.textbook_id.in_(ids))
+            rows = (self._as_rows(query) if as_rows else self._with_relations(query)).all()
+            by_id = {row.textbook_id: row for row in rows}
+            items = [by_id[i] for i in ids if i in by_id]
+        
+        next_cursor = None
+        if cursor is not None and has_next and window:
+            next_cursor = encode_cursor(list(window[-1]))
+        if count_policy == 'none':
+            return Page(items, None, next_cursor=next_cursor, has_next=has_next, count_policy='none')
+        return Page(items, total, next_cursor=next_cursor,
+                    has_next=has_next if cursor is not None else None)
+    
+    def ensure_search_index(self):
+        """
+        确保倒排索引可用：未构建时全量构建（启动预热尚未完成时等待预热结果），
+        超过 TEXTBOOK_SEARCH_INDEX_REFRESH 秒未同步时按 updated_at 增量同步
+        """
+        if not textbook_search_index.ready:
+            with _index_lock:
+                if not textbook_search_index.ready:
+                    self.build_search_index()
+            return
+        interval = current_app.config.get('TEXTBOOK_SEARCH_INDEX_REFRESH', 30)
+        if time.monotonic() - _index_state['synced_at'] >= interval:
+            self.sync_search_index()
+    
+    def build_search_index(self):
+        """从教材表全量构建倒排索引"""
+        with _index_lock:
+            started = time.monotonic()
+            rows = db.session.query(*_INDEX_COLUMNS).filter(Textbook.status == 1).all()
+            textbook_search_index.clear()
+            for row in rows:
+                self._index_row(row)
+            _index_state['watermark'] = max((r.updated_at for r in rows if r.updated_at), default=None)
+            _index_state['synced_at'] = time.monotonic()
+            textbook_search_index.ready = True
+            current_app.logger.info(
+                f'教材搜索索引构建完成：{len(rows)} 条，耗时 {time.monotonic() - started:.2f}s'
+            )
+    
+    def sync_search_index(self):
+        """按 updated_at 水位线增量同步（追平其他进程或触发器对教材表的修改）"""
+        with _index_lock:
+            query = db.session.query(*_INDEX_COLUMNS)
+            if _index_state['watermark'] is not None:
+                # TIMESTAMP精度为秒，用 >= 重新处理同一秒内的行，重复索引是幂等的
+                query = query.filter(Textbook.updated_at >= _index_state['watermark'])
+            rows = query.all()
+            for row in rows:
+                self._index_row(row)
+                if row.updated_at and (_index_state['watermark'] is None
+                                       or row.updated_at > _index_state['watermark']):
+                    _index_state['watermark'] = row.updated_at
+            _index_state['synced_at'] = time.monotonic()
+    
+    def _refresh_search_index(self, ids):
+        """按主键重新索引指定教材（写操作后调用）"""
+        if not textbook_search_index.ready:
+            return
+        if ids is None:
+            self.sync_search_index()
+            return
+        rows = db.session.query(*_INDEX_COLUMNS).filter(Textbook.textbook_id.in_(ids)).all()
+        for row in rows:
+            self._index_row(row)
+    
+    @staticmethod
+    def _index_row(row):
+        """将一行教材写入索引，停用的教材从索引中移除"""
+        if row.status != 1:
+            textbook_search_index.remove(row.textbook_id)
+            return
+        textbook_search_index.add(
+            row.textbook_id,
+            {'textbook_name': row.textbook_name, 'isbn': row.isbn, 'author': row.author},
+            {'publisher_id': row.publisher_id, 'type_id': row.type_id}
+        )
+    
+    def _after_write(self, ids=None):
+        """写操作后同步更新倒排索引"""
+        super()._after_write(ids)
+        self._refresh_search_index(ids)
     
     def get_by_publisher(self, publisher_id):
         """获取指定出版社的所有教材"""
@@ -65,3 +238,21 @@ class TextbookDAO(BaseDAO):
             status=1
         ).all()
 
+
+def warm_search_index(app):
+    """
+    应用启动时在后台线程构建倒排索引，第一次搜索不再承担全量构建的耗时
+    构建完成前到达的搜索会等待构建结果；预热失败时记录日志，由第一次搜索重新构建
+    :param app: Flask应用
+    """
+    def build():
+        with app.app_context():
+            try:
+                TextbookDAO().ensure_search_index()
+            except Exception as e:
+                app.logger.warning(f'教材搜索索引预热失败，将在首次搜索时构建：{e}')
+            finally:
+                db.session.remove()
+    
+    threading.Thread(target=build, name='textbook-search-index', daemon=True).start()
+
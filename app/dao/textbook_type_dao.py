@@ -3,11 +3,14 @@
 """
 from app.dao.base_dao import BaseDAO
 from app.models.textbook_type import TextbookType
+from app.extensions import db
 
 
 class TextbookTypeDAO(BaseDAO):
     """教材类型数据访问对象"""
     
+    natural_key = 'type_code'
+    
     def __init__(self):
         super().__init__(TextbookType)
     
@@ -24,17 +27,42 @@ class TextbookTypeDAO(BaseDAO):
         return self.model.query.filter_by(parent_id=parent_id, status=1).all()
     
     def get_tree(self):
-        """获取树形结构"""
-        root_types = self.get_root_types()
+        """
+        获取树形结构（读缓存）
+        一次查询取出全部启用的类型，在内存中按 parent_id 组装任意深度的树；
+        父类型停用时其子树不输出
+        :return: 根类型字典列表，每个节点的子类型在 children 中
+        """
+        return self._cached('tree', self._build_tree)
+    
+    def _build_tree(self):
+        """按 parent_id 组装类型树"""
+        types = self.model.query.filter_by(status=1).order_by(self.model.type_id).all()
+        nodes = {t.type_id: dict(t.to_dict(), children=[]) for t in types}
         tree = []
-        for root in root_types:
-            node = root.to_dict(include_children=True)
-            tree.append(node)
+        for node in nodes.values():
+            if node['parent_id'] is None:
+                tree.append(node)
+            elif node['parent_id'] in nodes:
+                nodes[node['parent_id']]['children'].append(node)
         return tree
     
     def get_active_types(self):
-        """获取所有启用的类型"""
-        return self.model.query.filter_by(status=1).order_by(
-            self.model.type_code
-        ).all()
+        """
+        获取所有启用的类型（读缓存）
+        :return: 类型字典列表
+        """
+        return self._cached('active', lambda: [
+            textbook_type.to_dict() for textbook_type in
+            self.model.query.filter_by(status=1).order_by(self.model.type_code)
+        ])
+    
+    def get_name_map(self):
+        """
+        类型ID -> 名称（包含停用的类型，读缓存）
+        :return: 字典
+        """
+        return self._cached('names', lambda: dict(
+            db.session.query(self.model.type_id, self.model.type_name).all()
+        ))
 
@@ -1,8 +1,73 @@
 """
 用户DAO
 """
+from bisect import bisect_left
+from sqlalchemy import update
 from app.dao.base_dao import BaseDAO
 from app.models.user import User
+from app.extensions import db
+from app.utils.exceptions import DatabaseException, NotFoundException
+from app.utils.pagination import Page
+
+# 用户目录包含的字段（不含密码等敏感信息）
+DIRECTORY_FIELDS = ('user_id', 'username', 'real_name', 'role', 'department', 'status')
+
+
+class UserDirectory:
+    """
+    用户目录（只读快照）：用户名 -> 用户ID、姓名、角色、部门、状态
+    条目按用户名排序，支持按用户名/姓名前缀检索和分页；构建后不再修改，可在请求间共享
+    """
+    
+    def __init__(self, rows):
+        self._entries = sorted((dict(zip(DIRECTORY_FIELDS, row)) for row in rows),
+                               key=lambda e: e['username'])
+        self._by_username = {e['username']: e for e in self._entries}
+        self._usernames = [e['username'] for e in self._entries]
+        self._real_names = sorted((e['real_name'], i) for i, e in enumerate(self._entries) if e['real_name'])
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, username):
+        """
+        按用户名查询（包含停用的用户）
+        :return: 用户字典，不存在时返回None
+        """
+        return self._by_username.get(username)
+    
+    def role_of(self, username):
+        """用户角色，用户不存在时返回None"""
+        entry = self._by_username.get(username)
+        return entry['role'] if entry else None
+    
+    def search(self, prefix=None, roles=None, active_only=True):
+        """
+        检索用户
+        :param prefix: 用户名或姓名前缀
+        :param roles: 角色列表，为None时不限
+        :param active_only: 是否只返回启用的用户
+        :return: 按用户名排序的用户字典列表
+        """
+        if prefix:
+            indexes = set(range(*self._prefix_range(self._usernames, prefix)))
+            start, end = self._prefix_range(self._real_names, (prefix,))
+            indexes.update(i for _, i in self._real_names[start:end])
+            entries = [self._entries[i] for i in sorted(indexes)]
+        else:
+            entries = self._entries
+        return [
+            e for e in entries
+            if (roles is None or e['role'] in roles) and (not active_only or e['status'] == 1)
+        ]
+    
+    @staticmethod
+    def _prefix_range(keys, prefix):
+        """有序列表中以 prefix 开头的区间 [start, end)"""
+        if isinstance(prefix, tuple):
+            text = prefix[0]
+            return bisect_left(keys, (text,)), bisect_left(keys, (text + '\uffff',))
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + '\uffff')
 
 
 class UserDAO(BaseDAO):
@@ -35,8 +100,86 @@ class UserDAO(BaseDAO):
         """获取所有用户（别名方法）"""
         return self.get_active_users()
     
+    def update(self, id, data):
+        """
+        更新用户
+        只有用户目录中的字段（用户名、姓名、角色、部门、状态）变化时才使用户目录失效并递增用户表版本，
+        修改密码、联系方式等不影响目录和订单可见性
+        :param id: 用户ID
+        :param data: 更新数据字典
+        :return: 更新后的实例
+        """
+        try:
+            instance = self.get_by_id(id)
+            directory_changed = False
+            for key, value in data.items():
+                if hasattr(instance, key) and value is not None:
+                    if key in DIRECTORY_FIELDS and getattr(instance, key) != value:
+                        directory_changed = True
+                    setattr(instance, key, value)
+            db.session.commit()
+            if directory_changed:
+                self._after_write([id])
+            return instance
+        except NotFoundException:
+            raise
+        except Exception as e:
+            db.session.rollback()
+            raise DatabaseException(f'更新失败: {str(e)}')
+    
+    def update_last_login(self, user_id, last_login):
+        """
+        记录最后登录时间
+        单条 UPDATE，不触发 _after_write（不使用户目录失效、不递增用户表版本），updated_at 保持不变
+        :param user_id: 用户ID
+        :param last_login: 登录时间
+        """
+        try:
+            db.session.execute(
+                update(User)
+                .where(User.user_id == user_id)
+                .values(last_login=last_login, updated_at=User.updated_at)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise DatabaseException(f'更新失败: {str(e)}')
+    
+    def get_directory(self):
+        """
+        获取用户目录（读缓存，用户表写入后失效）
+        :return: UserDirectory
+        """
+        return self._cached('directory', lambda: UserDirectory(
+            db.session.query(*(getattr(self.model, f) for f in DIRECTORY_FIELDS)).all()
+        ))
+    
+    def search_directory(self, prefix=None, roles=None, pin_username=None, page=1, per_page=None):
+        """
+        从用户目录检索启用的用户（订购人下拉选择）
+        :param prefix: 用户名或姓名前缀
+        :param roles: 角色列表，为None时不限
+        :param pin_username: 置顶的用户（如当前用户，不受角色限制，只在第一页出现）
+        :param page: 页码
+        :param per_page: 每页数量，为None时不分页
+        :return: Page
+        """
+        directory = self.get_directory()
+        entries = directory.search(prefix=prefix, roles=roles)
+        if pin_username:
+            pinned = directory.get(pin_username)
+            entries = [e for e in entries if e['username'] != pin_username]
+            if pinned and (not prefix or pinned['username'].startswith(prefix)
+                           or (pinned['real_name'] or '').startswith(prefix)):
+                entries.insert(0, pinned)
+        total = len(entries)
+        if per_page:
+            start = (page - 1) * per_page
+            entries = entries[start:start + per_page]
+        return Page(entries, total)
+    
     def search(self, keyword=None, role=None, department=None, 
-               page=1, per_page=20):
+               page=1, per_page=20, cursor=None, count_policy=None):
         """
         多条件搜索
         :param keyword: 搜索关键字
@@ -44,7 +187,9 @@ class UserDAO(BaseDAO):
         :param department: 部门
         :param page: 页码
         :param per_page: 每页数量
-        :return: (items, total)
+        :param cursor: 分页游标（为None时使用页码分页）
+        :param count_policy: 总数统计策略（exact/cached/estimated/none，默认见 _paginate_query）
+        :return: Page，可解包为 (items, total)
         """
         query = self.model.query
         
@@ -63,9 +208,7 @@ class UserDAO(BaseDAO):
         if department:
             query = query.filter_by(department=department)
         
-        total = query.count()
-        items = query.order_by(
-            self.model.created_at.desc()
-        ).limit(per_page).offset((page - 1) * per_page).all()
-        return items, total
+        return self._paginate_query(query, page, per_page, sort_column=self.model.created_at,
+                                    descending=True, cursor=cursor,
+                                    count_policy=count_policy)
 
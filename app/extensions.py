@@ -4,6 +4,7 @@ Flask扩展初始化
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from app.utils.cache import Cache
 
 # 数据库ORM
 db = SQLAlchemy()
@@ -14,3 +15,6 @@ jwt = JWTManager()
 # 数据库迁移
 migrate = Migrate()
 
+# 缓存（后端由 CACHE_BACKEND 配置）
+cache = Cache()
+
@@ -10,6 +10,11 @@ from app.models.stock_in import StockIn
 # from app.models.requisition import Requisition  # 已移除领用功能
 from app.models.inventory import Inventory
 from app.models.user import User
+from app.models.doc_sequence import DocSequence
+from app.models.inventory_movement import InventoryMovement
+from app.models.inventory_snapshot import InventorySnapshot
+from app.models.stat_daily import StatDaily
+from app.models.table_version import TableVersion
 
 __all__ = [
     'BaseModel',
@@ -20,6 +25,11 @@ __all__ = [
     'StockIn',
     # 'Requisition',  # 已移除领用功能
     'Inventory',
-    'User'
+    'User',
+    'DocSequence',
+    'InventoryMovement',
+    'InventorySnapshot',
+    'StatDaily',
+    'TableVersion'
 ]
 
@@ -3,6 +3,7 @@
 """
 from datetime import datetime
 from app.extensions import db
+from app.utils.serializer import compile_serializer
 
 
 class BaseModel(db.Model):
@@ -21,21 +22,11 @@ class BaseModel(db.Model):
     def to_dict(self, exclude=None):
         """
         将模型转换为字典
+        使用按模型生成并缓存的序列化函数，日期、时间、金额字段一次转换完成
         :param exclude: 需要排除的字段列表
         :return: 字典
         """
-        if exclude is None:
-            exclude = []
-        
-        data = {}
-        for column in self.__table__.columns:
-            if column.name not in exclude:
-                value = getattr(self, column.name)
-                # 处理日期时间类型
-                if isinstance(value, datetime):
-                    value = value.strftime('%Y-%m-%d %H:%M:%S')
-                data[column.name] = value
-        return data
+        return compile_serializer(type(self), tuple(exclude or ()))(self)
     
     def save(self):
         """保存到数据库"""
@@ -0,0 +1,18 @@
+"""
+单号序列模型
+"""
+from app.extensions import db
+from app.models.base import BaseModel
+
+
+class DocSequence(BaseModel):
+    """单号序列表：每个单号前缀每天一行，next_value 为下一个未分配的序号"""
+    
+    __tablename__ = 'doc_sequence'
+    
+    seq_prefix = db.Column(db.String(10), primary_key=True, comment='单号前缀（PO/SI）')
+    seq_date = db.Column(db.String(8), primary_key=True, comment='日期（YYYYMMDD）')
+    next_value = db.Column(db.BigInteger, nullable=False, default=1, comment='下一个未分配的序号')
+    
+    def __repr__(self):
+        return f'<DocSequence {self.seq_prefix}{self.seq_date} {self.next_value}>'
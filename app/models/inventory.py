@@ -27,12 +27,6 @@ class Inventory(BaseModel):
         """转换为字典"""
         data = super().to_dict()
         
-        # 转换日期
-        if self.last_in_date:
-            data['last_in_date'] = self.last_in_date.strftime('%Y-%m-%d')
-        if self.last_out_date:
-            data['last_out_date'] = self.last_out_date.strftime('%Y-%m-%d')
-        
         # 计算库存状态
         if self.current_quantity < self.min_quantity:
             data['inventory_status'] = '库存不足'
@@ -0,0 +1,34 @@
+"""
+库存流水模型
+"""
+from app.extensions import db
+from app.models.base import BaseModel
+
+# 流水类型
+MOVEMENT_TYPES = ('期初', '入库', '入库冲销', '发放', '调整')
+
+
+class InventoryMovement(BaseModel):
+    """库存流水表（只追加）：每次库存变动一行，created_at 为发生时间"""
+    
+    __tablename__ = 'inventory_movement'
+    
+    # SQLite 只有 INTEGER PRIMARY KEY 自增
+    movement_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'),
+                            primary_key=True, autoincrement=True, comment='流水ID')
+    textbook_id = db.Column(db.Integer, db.ForeignKey('textbook.textbook_id'), nullable=False, comment='教材ID')
+    movement_type = db.Column(db.Enum(*MOVEMENT_TYPES), nullable=False, comment='流水类型')
+    quantity_change = db.Column(db.Integer, nullable=False, default=0, comment='当前库存变化量')
+    in_change = db.Column(db.Integer, nullable=False, default=0, comment='累计入库变化量')
+    out_change = db.Column(db.Integer, nullable=False, default=0, comment='累计出库变化量')
+    ref_type = db.Column(db.String(20), comment='来源单据类型（stock_in/purchase_order/reconcile/inventory）')
+    ref_id = db.Column(db.Integer, comment='来源单据ID')
+    operator = db.Column(db.String(50), comment='操作人')
+    
+    __table_args__ = (
+        db.Index('idx_movement_textbook', 'textbook_id', 'movement_id'),
+        db.Index('idx_movement_created', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f'<InventoryMovement {self.movement_id} {self.movement_type} {self.quantity_change}>'
@@ -0,0 +1,26 @@
+"""
+库存快照模型
+"""
+from app.extensions import db
+from app.models.base import BaseModel
+
+
+class InventorySnapshot(BaseModel):
+    """库存快照表：某教材截至 last_movement_id（含）的累计库存，用于按时间点查询"""
+    
+    __tablename__ = 'inventory_snapshot'
+    
+    textbook_id = db.Column(db.Integer, db.ForeignKey('textbook.textbook_id'), primary_key=True, comment='教材ID')
+    last_movement_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False,
+                                 comment='快照包含的最后一条流水ID')
+    snapshot_at = db.Column(db.DateTime, nullable=False, comment='快照时点（最后一条流水的发生时间）')
+    current_quantity = db.Column(db.Integer, nullable=False, default=0, comment='当前库存数量')
+    total_in_quantity = db.Column(db.Integer, nullable=False, default=0, comment='累计入库数量')
+    total_out_quantity = db.Column(db.Integer, nullable=False, default=0, comment='累计出库数量')
+    
+    __table_args__ = (
+        db.Index('idx_snapshot_textbook_time', 'textbook_id', 'snapshot_at'),
+    )
+    
+    def __repr__(self):
+        return f'<InventorySnapshot textbook_id={self.textbook_id} movement={self.last_movement_id}>'
@@ -36,12 +36,6 @@ class PurchaseOrder(BaseModel):
         """转换为字典"""
         data = super().to_dict()
         
-        # 转换日期
-        if self.order_date:
-            data['order_date'] = self.order_date.strftime('%Y-%m-%d')
-        if self.expected_date:
-            data['expected_date'] = self.expected_date.strftime('%Y-%m-%d')
-        
         # 包含关联信息
         if include_relations and self.textbook:
             data['textbook_name'] = self.textbook.textbook_name
@@ -0,0 +1,21 @@
+"""
+按日统计汇总模型
+"""
+from app.extensions import db
+from app.models.base import BaseModel
+
+
+class StatDaily(BaseModel):
+    """按日统计汇总表：每天一行，由订单、入库、库存流水的触发器增量维护"""
+    
+    __tablename__ = 'stat_daily'
+    
+    stat_date = db.Column(db.Date, primary_key=True, comment='日期')
+    order_count = db.Column(db.Integer, nullable=False, default=0, comment='订单数（按订购日期）')
+    order_quantity = db.Column(db.Integer, nullable=False, default=0, comment='订购数量（按订购日期）')
+    stock_in_count = db.Column(db.Integer, nullable=False, default=0, comment='入库单数（按入库日期）')
+    arrived_quantity = db.Column(db.Integer, nullable=False, default=0, comment='实际入库数量（按入库日期）')
+    issued_quantity = db.Column(db.Integer, nullable=False, default=0, comment='发放数量（按发放日期）')
+    
+    def __repr__(self):
+        return f'<StatDaily {self.stat_date}>'
@@ -32,10 +32,6 @@ class StockIn(BaseModel):
         """转换为字典"""
         data = super().to_dict()
         
-        # 转换日期
-        if self.stock_in_date:
-            data['stock_in_date'] = self.stock_in_date.strftime('%Y-%m-%d')
-        
         # 包含关联信息
         if include_relations:
             if self.textbook:
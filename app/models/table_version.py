@@ -0,0 +1,17 @@
+"""
+表版本模型
+"""
+from app.extensions import db
+from app.models.base import BaseModel
+
+
+class TableVersion(BaseModel):
+    """表版本：每张表一行，DAO 写操作提交后递增，用于条件GET的 ETag 和内存结构的变化检测"""
+    
+    __tablename__ = 'table_version'
+    
+    table_name = db.Column(db.String(64), primary_key=True, comment='表名')
+    version = db.Column(db.BigInteger, nullable=False, default=0, comment='版本号（每次写入后加一）')
+    
+    def __repr__(self):
+        return f'<TableVersion {self.table_name} {self.version}>'
@@ -35,12 +35,6 @@ class Textbook(BaseModel):
     def to_dict(self, include_relations=False):
         """转换为字典"""
         data = super().to_dict()
-        # 转换价格为float
-        if self.price:
-            data['price'] = float(self.price)
-        # 转换出版日期
-        if self.publication_date:
-            data['publication_date'] = self.publication_date.strftime('%Y-%m-%d')
         
         # 包含关联信息
         if include_relations:
@@ -40,13 +40,7 @@ class User(BaseModel):
     def to_dict(self, exclude_password=True):
         """转换为字典"""
         exclude_fields = ['password'] if exclude_password else []
-        data = super().to_dict(exclude=exclude_fields)
-        
-        # 转换最后登录时间
-        if self.last_login:
-            data['last_login'] = self.last_login.strftime('%Y-%m-%d %H:%M:%S')
-        
-        return data
+        return super().to_dict(exclude=exclude_fields)
     
     def to_jwt_identity(self):
         """生成JWT身份信息"""
@@ -38,3 +38,8 @@ class PublisherUpdateSchema(Schema):
     address = fields.Str(allow_none=True)
     email = fields.Str(allow_none=True)
 
+
+class PublisherBatchUpdateSchema(PublisherUpdateSchema):
+    """出版社批量更新Schema（每行附带出版社ID）"""
+    
+    publisher_id = fields.Int(required=True)
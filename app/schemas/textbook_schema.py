@@ -1,7 +1,7 @@
 """
 教材Schema
 """
-from marshmallow import Schema, fields, validates
+from marshmallow import Schema, fields, validates, ValidationError
 from app.utils.validators import validate_isbn, validate_positive_number
 from datetime import date
 
@@ -45,3 +45,8 @@ class TextbookUpdateSchema(Schema):
     price = fields.Decimal(as_string=True)
     description = fields.Str(allow_none=True)
 
+
+class TextbookBatchUpdateSchema(TextbookUpdateSchema):
+    """教材批量更新Schema（每行附带教材ID）"""
+    
+    textbook_id = fields.Int(required=True)
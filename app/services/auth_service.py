@@ -33,9 +33,8 @@ class AuthService:
         if not user.check_password(password):
             raise AuthException('用户名或密码错误')
         
-        # 更新最后登录时间
-        user.last_login = datetime.now()
-        self.user_dao.update(user.user_id, {'last_login': user.last_login})
+        # 更新最后登录时间（不影响用户目录和用户表版本）
+        self.user_dao.update_last_login(user.user_id, datetime.now())
         
         # 生成JWT Token (identity使用user_id，additional_claims存储其他信息)
         identity = str(user.user_id)
@@ -0,0 +1,299 @@
+"""
+目录导入服务
+流式读取出版社提供的教材/出版社目录（CSV 或 XLSX），按批校验并分块批量写入，
+返回逐行错误报告。整个导入过程内存占用只与批大小有关，不按行查询数据库。
+"""
+import csv
+import io
+import os
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from flask import current_app
+from marshmallow import ValidationError
+from app.dao.textbook_dao import TextbookDAO
+from app.dao.publisher_dao import PublisherDAO
+from app.extensions import db
+from app.utils.exceptions import ValidationException
+from app.utils.validators import validate_isbn, validate_phone, validate_email
+
+
+# 表头别名（中文表头 -> 字段名），字段名本身也可直接作为表头
+TEXTBOOK_HEADERS = {
+    'ISBN': 'isbn',
+    '教材名称': 'textbook_name',
+    '作者': 'author',
+    '出版社': 'publisher_name',
+    '教材类型': 'type_name',
+    '类型编码': 'type_code',
+    '版次': 'edition',
+    '出版日期': 'publication_date',
+    '价格': 'price',
+    '单价': 'price',
+    '描述': 'description',
+    '简介': 'description'
+}
+
+PUBLISHER_HEADERS = {
+    '出版社': 'publisher_name',
+    '出版社名称': 'publisher_name',
+    '联系人': 'contact_person',
+    '联系电话': 'contact_phone',
+    '地址': 'address',
+    '邮箱': 'email'
+}
+
+IMPORT_MODES = ('create', 'upsert')
+
+
+class ImportService:
+    """目录导入服务类"""
+
+    def __init__(self):
+        self.textbook_dao = TextbookDAO()
+        self.publisher_dao = PublisherDAO()
+
+    def import_textbooks(self, stream, filename, mode='create', batch_size=None):
+        """
+        导入教材目录
+        出版社、教材类型按名称解析为ID（导入前一次性加载映射表）
+        :param stream: 文件对象（二进制）
+        :param filename: 文件名，按扩展名识别 CSV/XLSX
+        :param mode: create（ISBN已存在记为错误）或 upsert（ISBN已存在则更新）
+        :param batch_size: 每批行数，默认使用 BULK_CHUNK_SIZE 配置
+        :return: 导入报告，见 _run_import
+        """
+        from app.models.publisher import Publisher
+        from app.models.textbook_type import TextbookType
+
+        publishers = dict(db.session.query(Publisher.publisher_name, Publisher.publisher_id).all())
+        types = dict(db.session.query(TextbookType.type_name, TextbookType.type_id).all())
+        type_codes = dict(db.session.query(TextbookType.type_code, TextbookType.type_id).all())
+
+        def convert(raw):
+            errors = {}
+            row = {}
+
+            row['isbn'] = isbn = _text(raw.get('isbn'))
+            try:
+                validate_isbn(isbn or '')
+            except ValidationError as e:
+                errors['isbn'] = e.messages
+
+            name = _text(raw.get('textbook_name'))
+            if not name:
+                errors['textbook_name'] = ['教材名称不能为空']
+            elif len(name) > 200:
+                errors['textbook_name'] = ['教材名称不能超过200个字符']
+            row['textbook_name'] = name
+
+            publisher_name = _text(raw.get('publisher_name'))
+            row['publisher_id'] = publishers.get(publisher_name) or _int(raw.get('publisher_id'))
+            if not row['publisher_id']:
+                errors['publisher_name'] = [f'出版社不存在：{publisher_name or ""}']
+
+            type_name = _text(raw.get('type_name'))
+            row['type_id'] = (types.get(type_name) or type_codes.get(_text(raw.get('type_code')))
+                              or _int(raw.get('type_id')))
+            if not row['type_id']:
+                errors['type_name'] = [f'教材类型不存在：{type_name or ""}']
+
+            try:
+                row['price'] = _decimal(raw.get('price'))
+                if row['price'] is None or row['price'] <= 0:
+                    errors['price'] = ['价格必须大于0']
+            except ValueError:
+                errors['price'] = ['价格格式错误']
+
+            try:
+                row['publication_date'] = _date(raw.get('publication_date'))
+            except ValueError:
+                errors['publication_date'] = ['出版日期格式错误，应为YYYY-MM-DD']
+
+            for field in ('author', 'edition', 'description'):
+                row[field] = _text(raw.get(field))
+            return row, errors
+
+        return self._run_import(stream, filename, TEXTBOOK_HEADERS, convert,
+                                self.textbook_dao, mode, batch_size)
+
+    def import_publishers(self, stream, filename, mode='create', batch_size=None):
+        """
+        导入出版社目录
+        :param stream: 文件对象（二进制）
+        :param filename: 文件名，按扩展名识别 CSV/XLSX
+        :param mode: create（名称已存在记为错误）或 upsert（名称已存在则更新）
+        :param batch_size: 每批行数，默认使用 BULK_CHUNK_SIZE 配置
+        :return: 导入报告，见 _run_import
+        """
+        def convert(raw):
+            errors = {}
+            row = {'publisher_name': _text(raw.get('publisher_name'))}
+            if not row['publisher_name']:
+                errors['publisher_name'] = ['出版社名称不能为空']
+            elif len(row['publisher_name']) > 100:
+                errors['publisher_name'] = ['出版社名称不能超过100个字符']
+            for field, validator in (('contact_phone', validate_phone), ('email', validate_email)):
+                row[field] = _text(raw.get(field))
+                try:
+                    validator(row[field])
+                except ValidationError as e:
+                    errors[field] = e.messages
+            for field in ('contact_person', 'address'):
+                row[field] = _text(raw.get(field))
+            return row, errors
+
+        return self._run_import(stream, filename, PUBLISHER_HEADERS, convert,
+                                self.publisher_dao, mode, batch_size)
+
+    def _run_import(self, stream, filename, headers, convert, dao, mode, batch_size):
+        """
+        导入主流程：逐批读取 -> 校验 -> 查重（每批一条查询） -> 批量写入
+        :param headers: 表头别名映射
+        :param convert: 行转换函数，原始行 -> (数据字典, 错误字典)
+        :param dao: 目标DAO（需定义 natural_key）
+        :return: {'total', 'summary', 'errors'}，errors 为出错行列表（行号从表头下一行起算为2）
+        """
+        if mode not in IMPORT_MODES:
+            raise ValidationException(f'导入模式只能是：{", ".join(IMPORT_MODES)}')
+        batch_size = batch_size or current_app.config.get('BULK_CHUNK_SIZE', 500)
+        key = dao.natural_key
+        key_column = getattr(dao.model, key)
+
+        summary = {}
+        errors = []
+        seen = set()
+        total = 0
+
+        def record(status, line_no=None, value=None, message=None):
+            summary[status] = summary.get(status, 0) + 1
+            if line_no is not None:
+                errors.append({'row': line_no, key: value, 'status': status, 'message': message})
+
+        rows = _iter_rows(stream, filename, headers)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            total += len(batch)
+
+            valid, line_nos = [], []
+            for line_no, raw in batch:
+                row, row_errors = convert(raw)
+                value = row.get(key)
+                if not row_errors and value in seen:
+                    row_errors = {key: ['文件中重复']}
+                if row_errors:
+                    record('invalid', line_no, value, _join_errors(row_errors))
+                    continue
+                seen.add(value)
+                # 空单元格不写入：新建时使用默认值，upsert 时不覆盖已有数据
+                valid.append({k: v for k, v in row.items() if v is not None})
+                line_nos.append(line_no)
+
+            if valid and mode == 'create':
+                # 每批一条查询检查唯一键是否已存在
+                keys = [row[key] for row in valid]
+                existing = set(db.session.scalars(db.select(key_column).where(key_column.in_(keys))))
+                for row, line_no in zip(valid, line_nos):
+                    if row[key] in existing:
+                        record('invalid', line_no, row[key], f'{key}已存在')
+                line_nos = [n for row, n in zip(valid, line_nos) if row[key] not in existing]
+                valid = [row for row in valid if row[key] not in existing]
+
+            if not valid:
+                continue
+            outcomes = dao.upsert_many(valid, chunk_size=len(valid)) if mode == 'upsert' \
+                else dao.create_many(valid, chunk_size=len(valid))
+            for outcome in outcomes:
+                if outcome['status'] == 'failed':
+                    row = valid[outcome['index']]
+                    record('failed', line_nos[outcome['index']], row[key], outcome.get('message'))
+                else:
+                    record(outcome['status'])
+            # 每批提交后清空会话，保持内存占用稳定
+            db.session.expunge_all()
+
+        errors.sort(key=lambda e: e['row'])
+        return {'total': total, 'summary': summary, 'errors': errors}
+
+
+def _iter_rows(stream, filename, headers):
+    """
+    按文件类型逐行读取，表头映射为字段名
+    :return: 生成器，产出 (行号, 行字典)
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        rows = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    elif extension == '.xlsx':
+        rows = _iter_xlsx(stream)
+    else:
+        raise ValidationException('仅支持CSV或XLSX文件')
+
+    header = next(rows, None)
+    if not header:
+        raise ValidationException('文件为空')
+    fields = [headers.get(_text(name), _text(name)) for name in header]
+    for line_no, values in enumerate(rows, start=2):
+        if not any(value not in (None, '') for value in values):
+            continue
+        yield line_no, dict(zip(fields, values))
+
+
+def _iter_xlsx(stream):
+    """以只读模式逐行读取XLSX第一个工作表"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValidationException('导入XLSX文件需要安装openpyxl')
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for values in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(values)
+    finally:
+        workbook.close()
+
+
+def _join_errors(errors):
+    """将字段错误字典拼接为一行说明"""
+    return '；'.join(f'{field}: {"，".join(messages)}' for field, messages in errors.items())
+
+
+def _text(value):
+    """单元格值转为去除首尾空白的字符串，空值返回None"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _int(value):
+    """单元格值转为整数，无法转换时返回None"""
+    try:
+        return int(_text(value)) if _text(value) else None
+    except ValueError:
+        return None
+
+
+def _decimal(value):
+    """单元格值转为Decimal"""
+    text = _text(value)
+    if text is None:
+        return None
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise ValueError(text)
+
+
+def _date(value):
+    """单元格值转为日期，支持Excel日期单元格和YYYY-MM-DD字符串"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(value)
+    return datetime.strptime(text, '%Y-%m-%d').date() if text else None
@@ -0,0 +1,103 @@
+"""
+库存流水服务
+"""
+from datetime import datetime, date, time
+from flask import current_app
+from sqlalchemy import select
+from app.dao.inventory_movement_dao import InventoryMovementDAO, BALANCE_FIELDS
+from app.extensions import db
+from app.models.textbook import Textbook
+from app.utils.exceptions import ValidationException
+
+
+class InventoryLedgerService:
+    """库存流水服务类"""
+    
+    def __init__(self):
+        self.movement_dao = InventoryMovementDAO()
+    
+    def get_inventory_as_of(self, at, textbook_id=None):
+        """
+        查询某一时点的库存
+        :param at: 日期（YYYY-MM-DD，表示当天结束时）或时间（YYYY-MM-DD HH:MM:SS）
+        :param textbook_id: 教材ID，为None时返回全部教材
+        :return: 教材库存列表
+        """
+        moment = self._parse_moment(at)
+        balances = self.movement_dao.balances_as_of(
+            moment, [textbook_id] if textbook_id is not None else None
+        )
+        textbooks = dict(db.session.execute(
+            select(Textbook.textbook_id, Textbook.textbook_name).where(Textbook.textbook_id.in_(balances))
+        ).all()) if balances else {}
+        return [
+            {
+                'textbook_id': textbook_id,
+                'textbook_name': textbooks.get(textbook_id),
+                'current_quantity': balance['current_quantity'],
+                'total_in_quantity': balance['total_in_quantity'],
+                'total_out_quantity': balance['total_out_quantity']
+            }
+            for textbook_id, balance in sorted(balances.items())
+        ]
+    
+    def verify(self):
+        """
+        核对触发器维护的库存数量与流水累计结果
+        :return: 不一致的教材列表，每项含 inventory（库存表）和 ledger（流水）两组数量
+        """
+        ledger = self.movement_dao.balances_as_of()
+        inventory = self.movement_dao.inventory_balances()
+        empty = {field: 0 for _, field in BALANCE_FIELDS}
+        mismatches = []
+        for textbook_id in sorted(set(ledger) | set(inventory)):
+            stored = inventory.get(textbook_id, empty)
+            expected = {field: ledger.get(textbook_id, empty)[field] for _, field in BALANCE_FIELDS}
+            if stored != expected:
+                mismatches.append({'textbook_id': textbook_id, 'inventory': stored, 'ledger': expected})
+        return mismatches
+    
+    def reconcile(self, operator=None):
+        """
+        对账调整：为不一致的教材追加"调整"流水，使流水与库存表一致（以库存表为准）
+        :param operator: 操作人
+        :return: 调整的教材数
+        """
+        mismatches = self.verify()
+        self.movement_dao.record_many([
+            {
+                'textbook_id': item['textbook_id'],
+                'movement_type': '调整',
+                'quantity_change': item['inventory']['current_quantity'] - item['ledger']['current_quantity'],
+                'in_change': item['inventory']['total_in_quantity'] - item['ledger']['total_in_quantity'],
+                'out_change': item['inventory']['total_out_quantity'] - item['ledger']['total_out_quantity'],
+                'ref_type': 'reconcile',
+                'operator': operator
+            }
+            for item in mismatches
+        ])
+        db.session.commit()
+        return len(mismatches)
+    
+    def compact(self, interval=None):
+        """
+        快照压缩
+        :param interval: 快照之后累计多少条流水时生成新快照，默认使用 INVENTORY_SNAPSHOT_INTERVAL
+        :return: 新生成的快照数
+        """
+        interval = interval or current_app.config.get('INVENTORY_SNAPSHOT_INTERVAL', 200)
+        return self.movement_dao.compact(interval)
+    
+    @staticmethod
+    def _parse_moment(value):
+        """解析时间点参数，只给日期时取当天结束时"""
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime.combine(value, time.max)
+        try:
+            if len(value) == 10:
+                return datetime.combine(date.fromisoformat(value), time.max)
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValidationException('时间格式应为 YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS')
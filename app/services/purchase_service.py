@@ -2,9 +2,13 @@
 订购服务
 """
 from datetime import datetime
-from sqlalchemy import text
 from app.dao.purchase_order_dao import PurchaseOrderDAO
+from app.dao.inventory_dao import InventoryDAO
+from app.dao.inventory_movement_dao import InventoryMovementDAO
+from app.dao.doc_sequence_dao import doc_number_allocator
+from app.dao.base_dao import invalidate_tables
 from app.extensions import db
+from app.models.purchase_order import PurchaseOrder
 from app.utils.exceptions import BusinessException
 
 
@@ -13,21 +17,19 @@ class PurchaseService:
     
     def __init__(self):
         self.purchase_dao = PurchaseOrderDAO()
+        self.inventory_dao = InventoryDAO()
+        self.movement_dao = InventoryMovementDAO()
     
     def generate_order_no(self):
-        """生成订单编号"""
-        # 调用存储过程生成订单编号
-        result = db.session.execute(
-            text("CALL sp_generate_order_no(@order_no)")
-        )
-        order_no = db.session.execute(text("SELECT @order_no")).scalar()
-        return order_no
+        """生成订单编号（PO + YYYYMMDD + 序号），通常从本进程预留的号段中分配，不访问数据库"""
+        return doc_number_allocator.next_number('PO', PurchaseOrder.order_no)
     
     def get_order_list(self, page=1, per_page=20, status=None, 
                        start_date=None, end_date=None, keyword=None, order_person=None,
-                       current_username=None, allowed_roles=None):
+                       current_username=None, allowed_roles=None, cursor=None,
+                       count_policy=None):
         """获取订单列表"""
-        items, total = self.purchase_dao.search(
+        page_result = self.purchase_dao.search(
             keyword=keyword,
             status=status,
             start_date=start_date,
@@ -36,17 +38,37 @@ class PurchaseService:
             current_username=current_username,
             allowed_roles=allowed_roles,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=cursor,
+            count_policy=count_policy
         )
         
-        result = [item.to_dict(include_relations=True) for item in items]
-        return result, total
+        result = [item.to_dict(include_relations=True) for item in page_result.items]
+        return page_result.with_items(result)
+    
+    def iter_orders(self, **filters):
+        """
+        逐条产出订单数据（用于导出），过滤条件与 get_order_list 相同
+        :return: 订单字典生成器
+        """
+        for order in self.purchase_dao.iter_all(filters, with_relations=True):
+            yield order.to_dict(include_relations=True)
     
     def get_order_detail(self, order_id):
         """获取订单详情"""
-        order = self.purchase_dao.get_by_id(order_id)
+        order = self.purchase_dao.get_by_id(order_id, with_relations=True)
         return order.to_dict(include_relations=True)
     
+    def get_order_detail_for_teacher(self, order_id, username):
+        """
+        获取订单详情并判断教师是否有权查看
+        :param order_id: 订单ID
+        :param username: 当前教师用户名
+        :return: (订单字典, 是否可见)
+        """
+        order, visible = self.purchase_dao.get_with_teacher_visibility(order_id, username)
+        return order.to_dict(include_relations=True), visible
+    
     def create_order(self, data):
         """创建订单"""
         # 生成订单编号
@@ -72,6 +94,107 @@ class PurchaseService:
         self.purchase_dao.update(order_id, {'order_status': '已审核'})
         return {'message': '审核成功'}
     
+    def deliver_order(self, order_id, username):
+        """
+        发放订单：库存扣减到货数量，订单状态变为"已发放"
+        扣减库存和修改订单各是一条条件 UPDATE，在一个短事务中完成；
+        库存不足或订单已被并发发放时整体回滚
+        :param order_id: 订单ID
+        :param username: 发放人
+        :return: 发放数量
+        """
+        order = self.purchase_dao.get_by_id(order_id)
+        quantity = order.arrived_quantity
+        self._check_deliverable(order)
+        try:
+            if not self.inventory_dao.deduct(order.textbook_id, quantity):
+                raise BusinessException('库存不足，无法发放')
+            if not self.purchase_dao.mark_delivered({order_id: quantity}, username):
+                raise BusinessException('订单状态已变化，请刷新后重试')
+            self.movement_dao.record_many([self._delivery_movement(order, quantity, username)])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        invalidate_tables('purchase_order', 'inventory')
+        return quantity
+    
+    def deliver_orders(self, order_ids, username):
+        """
+        批量发放订单
+        库存行按 textbook_id 顺序一次锁定，同一教材的订单按订单ID顺序依次扣减，
+        库存不足的订单记为失败，其余订单在一个事务中发放
+        :param order_ids: 订单ID列表
+        :param username: 发放人
+        :return: 逐个订单的结果列表，status 为 delivered / not_found / failed
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        orders = self.purchase_dao.get_by_ids(order_ids)
+        results = {}
+        candidates = []
+        for index, order_id in enumerate(order_ids):
+            order = orders.get(order_id)
+            if order is None:
+                results[order_id] = {'index': index, 'status': 'not_found', 'id': order_id}
+                continue
+            try:
+                self._check_deliverable(order)
+            except BusinessException as e:
+                results[order_id] = {'index': index, 'status': 'failed', 'id': order_id, 'message': e.message}
+                continue
+            results[order_id] = {'index': index, 'status': 'delivered', 'id': order_id}
+            candidates.append(order)
+        
+        try:
+            stock = self.inventory_dao.lock_quantities([order.textbook_id for order in candidates])
+            deductions, delivered = {}, {}
+            for order in sorted(candidates, key=lambda o: (o.textbook_id, o.order_id)):
+                available = stock.get(order.textbook_id, 0) - deductions.get(order.textbook_id, 0)
+                if available < order.arrived_quantity:
+                    results[order.order_id].update(status='failed', message='库存不足，无法发放')
+                    continue
+                deductions[order.textbook_id] = deductions.get(order.textbook_id, 0) + order.arrived_quantity
+                delivered[order.order_id] = order.arrived_quantity
+            
+            if delivered:
+                self.inventory_dao.deduct_many(deductions)
+                if self.purchase_dao.mark_delivered(delivered, username) != len(delivered):
+                    raise BusinessException('部分订单状态已变化，请刷新后重试')
+                self.movement_dao.record_many([
+                    self._delivery_movement(order, delivered[order.order_id], username)
+                    for order in candidates if order.order_id in delivered
+                ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        if delivered:
+            invalidate_tables('purchase_order', 'inventory')
+        return sorted(results.values(), key=lambda r: r['index'])
+    
+    @staticmethod
+    def _delivery_movement(order, quantity, username):
+        """发放对应的库存流水"""
+        return {
+            'textbook_id': order.textbook_id,
+            'movement_type': '发放',
+            'quantity_change': -quantity,
+            'in_change': 0,
+            'out_change': quantity,
+            'ref_type': 'purchase_order',
+            'ref_id': order.order_id,
+            'operator': username
+        }
+    
+    @staticmethod
+    def _check_deliverable(order):
+        """校验订单是否可以发放"""
+        if order.order_status != '已到货':
+            raise BusinessException('只有"已到货"状态的订单才能发放')
+        if order.arrived_quantity <= 0:
+            raise BusinessException('订单没有可发放的数量')
+    
     def cancel_order(self, order_id, reason=None):
         """取消订单"""
         order = self.purchase_dao.get_by_id(order_id)
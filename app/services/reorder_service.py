@@ -0,0 +1,192 @@
+"""
+补货建议服务
+"""
+from datetime import date, timedelta
+import numpy as np
+from flask import current_app
+from app.dao.inventory_dao import InventoryDAO
+from app.dao.purchase_order_dao import PurchaseOrderDAO
+from app.dao.stock_in_dao import StockInDAO
+from app.dao.doc_sequence_dao import doc_number_allocator
+from app.models.purchase_order import PurchaseOrder
+from app.utils.exceptions import ValidationException
+from app.utils.columnar import columns
+from app.utils.reorder import ReorderEngine
+
+# 系统生成的补货订单备注（这些订单不计入消耗速度）
+REORDER_DRAFT_REMARK = '补货建议自动生成'
+
+
+class ReorderService:
+    """补货建议服务类"""
+    
+    def __init__(self):
+        self.inventory_dao = InventoryDAO()
+        self.purchase_dao = PurchaseOrderDAO()
+        self.stock_in_dao = StockInDAO()
+    
+    def compute(self, window_days=None):
+        """
+        计算全部启用教材的补货建议（数据各一条查询载入，计算一次向量化完成）
+        :param window_days: 统计窗口天数，默认使用 REORDER_WINDOW_DAYS
+        :return: 按教材ID升序的数组字典：textbook_id、current_quantity、open_quantity、min_quantity、
+                 max_quantity（当前阈值，没有库存记录时为-1）、velocity、lead_days、suggested_min、
+                 suggested_max、reorder_quantity（现在应补货的数量，不需要补货时为0）
+        """
+        config = current_app.config
+        if window_days is None:
+            window_days = config.get('REORDER_WINDOW_DAYS', 180)
+        if window_days <= 0:
+            raise ValidationException('统计窗口天数必须大于0')
+        engine = ReorderEngine(
+            window_days=window_days,
+            review_days=config.get('REORDER_REVIEW_DAYS', 30),
+            service_z=config.get('REORDER_SERVICE_Z', 1.65),
+            default_lead_days=config.get('REORDER_DEFAULT_LEAD_DAYS', 14)
+        )
+        start = date.today() - timedelta(days=window_days - 1)
+        origin = np.datetime64(start, 'D')
+        
+        textbook_ids, publisher_ids, current, min_quantity, max_quantity = columns(
+            [(tid, pid, qty, -1 if low is None else low, -1 if high is None else high)
+             for tid, pid, qty, low, high in self.inventory_dao.reorder_inputs()],
+            np.int64, np.int64, np.int64, np.int64, np.int64
+        )
+        demand_ids, order_dates, quantities = columns(
+            self.purchase_dao.demand_since(start, exclude_remarks=REORDER_DRAFT_REMARK),
+            np.int64, 'datetime64[D]', np.int64
+        )
+        receipt_publishers, receipt_order_dates, receipt_dates, receipt_quantities = columns(
+            self.stock_in_dao.lead_times_since(start),
+            np.int64, 'datetime64[D]', 'datetime64[D]', np.int64
+        )
+        result = engine.compute(
+            textbook_ids, publisher_ids,
+            (demand_ids, (order_dates - origin).astype(np.int64), quantities),
+            (receipt_publishers, (receipt_dates - receipt_order_dates).astype(np.int64), receipt_quantities)
+        )
+        
+        open_quantity = np.zeros(len(textbook_ids), dtype=np.int64)
+        open_orders = self.purchase_dao.open_quantities()
+        if open_orders and len(textbook_ids):
+            ids = np.fromiter(open_orders.keys(), dtype=np.int64, count=len(open_orders))
+            values = np.fromiter(open_orders.values(), dtype=np.int64, count=len(open_orders))
+            position = np.minimum(np.searchsorted(textbook_ids, ids), len(textbook_ids) - 1)
+            found = textbook_ids[position] == ids
+            open_quantity[position[found]] = values[found]
+        
+        suggested_min = result['reorder_point']
+        suggested_max = suggested_min + result['order_quantity']
+        available = current + open_quantity
+        due = result['has_demand'] & (available <= suggested_min)
+        return {
+            'textbook_id': textbook_ids,
+            'current_quantity': current,
+            'open_quantity': open_quantity,
+            'min_quantity': min_quantity,
+            'max_quantity': max_quantity,
+            'velocity': result['velocity'],
+            'lead_days': result['lead_days'],
+            'has_demand': result['has_demand'],
+            'suggested_min': suggested_min,
+            'suggested_max': suggested_max,
+            'reorder_quantity': np.where(due, suggested_max - available, 0)
+        }
+    
+    def get_suggestions(self, window_days=None, due_only=True):
+        """
+        补货建议列表
+        :param window_days: 统计窗口天数
+        :param due_only: 只返回现在需要补货的教材（库存 + 在途 ≤ 建议最低库存），否则返回全部有需求的教材
+        :return: 建议列表，按补货数量降序
+        """
+        result = self.compute(window_days)
+        mask = result['reorder_quantity'] > 0 if due_only else result['has_demand']
+        order = np.flatnonzero(mask)
+        order = order[np.argsort(-result['reorder_quantity'][order], kind='stable')]
+        return [
+            {
+                'textbook_id': int(result['textbook_id'][i]),
+                'current_quantity': int(result['current_quantity'][i]),
+                'open_quantity': int(result['open_quantity'][i]),
+                'min_quantity': self._threshold(result['min_quantity'][i]),
+                'max_quantity': self._threshold(result['max_quantity'][i]),
+                'daily_demand': round(float(result['velocity'][i]), 3),
+                'lead_days': round(float(result['lead_days'][i]), 1),
+                'suggested_min': int(result['suggested_min'][i]),
+                'suggested_max': int(result['suggested_max'][i]),
+                'reorder_quantity': int(result['reorder_quantity'][i])
+            }
+            for i in order
+        ]
+    
+    def apply_thresholds(self, result):
+        """
+        把建议的最低、最高库存批量写回库存表（只修改有需求且阈值变化的教材）
+        :param result: compute 的结果
+        :return: 更新的行数
+        """
+        changed = result['has_demand'] & (result['min_quantity'] >= 0) & (
+            (result['min_quantity'] != result['suggested_min']) | (result['max_quantity'] != result['suggested_max'])
+        )
+        thresholds = {
+            int(tid): (int(low), int(high))
+            for tid, low, high in zip(result['textbook_id'][changed], result['suggested_min'][changed],
+                                      result['suggested_max'][changed])
+        }
+        return self.inventory_dao.update_thresholds(thresholds)
+    
+    def draft_orders(self, result, username):
+        """
+        为需要补货的教材生成"待审核"订单（一次分配订单号，executemany 写入）
+        在途数量已包含未审核的补货订单，重复执行不会重复下单
+        :param result: compute 的结果
+        :param username: 订购人
+        :return: 逐行结果列表（见 BaseDAO.create_many）
+        """
+        due = np.flatnonzero(result['reorder_quantity'] > 0)
+        if not len(due):
+            return []
+        today = date.today()
+        numbers = doc_number_allocator.next_numbers('PO', PurchaseOrder.order_no, len(due))
+        rows = [
+            {
+                'order_no': number,
+                'textbook_id': int(result['textbook_id'][i]),
+                'order_quantity': int(result['reorder_quantity'][i]),
+                'order_date': today,
+                'expected_date': today + timedelta(days=int(np.ceil(result['lead_days'][i]))),
+                'order_person': username,
+                'order_status': '待审核',
+                'arrived_quantity': 0,
+                'remarks': REORDER_DRAFT_REMARK
+            }
+            for i, number in zip(due, numbers)
+        ]
+        return self.purchase_dao.create_many(rows)
+    
+    def run(self, username, window_days=None, apply_thresholds=False, draft_orders=False):
+        """
+        计算补货建议，并按需写回阈值、生成补货订单
+        :return: {'textbooks': 参与计算的教材数, 'with_demand': 有需求的教材数, 'due': 需要补货的教材数,
+                  'thresholds_updated': 更新阈值的教材数, 'orders_created': 生成的订单数}
+        """
+        result = self.compute(window_days)
+        summary = {
+            'textbooks': int(len(result['textbook_id'])),
+            'with_demand': int(result['has_demand'].sum()),
+            'due': int((result['reorder_quantity'] > 0).sum()),
+            'thresholds_updated': 0,
+            'orders_created': 0
+        }
+        if draft_orders:
+            outcomes = self.draft_orders(result, username)
+            summary['orders_created'] = sum(1 for outcome in outcomes if outcome['status'] == 'created')
+        if apply_thresholds:
+            summary['thresholds_updated'] = self.apply_thresholds(result)
+        return summary
+    
+    @staticmethod
+    def _threshold(value):
+        """阈值输出（没有库存记录时为None）"""
+        return None if value < 0 else int(value)
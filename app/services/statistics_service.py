@@ -1,9 +1,31 @@
 """
 统计服务
 """
-from sqlalchemy import text
-from app.extensions import db
-from app.dao.inventory_dao import InventoryDAO
+import queue
+from datetime import date, timedelta
+import numpy as np
+from flask import current_app
+from sqlalchemy import text, select, func, or_
+from app.extensions import db, cache
+from app.dao.inventory_dao import InventoryDAO, inventory_warning_set
+from app.dao.publisher_dao import PublisherDAO
+from app.dao.textbook_type_dao import TextbookTypeDAO
+from app.dao.stat_daily_dao import StatDailyDAO, STAT_DAILY_FIELDS
+from app.dao.analytics_dao import AnalyticsDAO
+from app.models.textbook import Textbook
+from app.utils.exceptions import ValidationException
+
+# 仪表盘中"待处理订单"包含的状态
+PENDING_ORDER_STATUSES = ('待审核', '已审核', '已订购')
+
+# 仪表盘汇总涉及的表，任一表经DAO写入后汇总失效
+DASHBOARD_TABLES = ('textbook', 'purchase_order', 'inventory')
+
+# 按类型、出版社、教材统计的数量字段
+QUANTITY_FIELDS = ('order_quantity', 'arrived_quantity', 'issued_quantity', 'current_quantity')
+
+# 按日期范围统计的时间粒度
+DATE_GRANULARITIES = ('day', 'week', 'month')
 
 
 class StatisticsService:
@@ -11,10 +33,84 @@ class StatisticsService:
     
     def __init__(self):
         self.inventory_dao = InventoryDAO()
+        self.publisher_dao = PublisherDAO()
+        self.textbook_type_dao = TextbookTypeDAO()
+        self.stat_daily_dao = StatDailyDAO()
+        self.analytics_dao = AnalyticsDAO()
     
     def get_statistics_by_type(self):
-        """按类型统计"""
-        result = db.session.execute(text("CALL sp_statistics_by_type()"))
+        """
+        按类型统计（启用的类型，按类型编码排序）
+        默认在内存统计快照上分组汇总；STATISTICS_SNAPSHOT=false 时读取触发器维护的汇总表 stat_by_type
+        """
+        if not current_app.config.get('STATISTICS_SNAPSHOT', True):
+            return self._statistics_by_type_sql()
+        types = self.textbook_type_dao.get_active_types()
+        groups = self._group_totals('type_id', [t['type_id'] for t in types])
+        return [
+            dict({'type_id': t['type_id'], 'type_name': t['type_name'], 'type_code': t['type_code']}, **group)
+            for t, group in zip(types, groups)
+        ]
+    
+    def get_statistics_by_publisher(self):
+        """
+        按出版社统计（启用的出版社，按名称排序）
+        默认在内存统计快照上分组汇总；STATISTICS_SNAPSHOT=false 时读取触发器维护的汇总表 stat_by_publisher
+        """
+        if not current_app.config.get('STATISTICS_SNAPSHOT', True):
+            return self._statistics_by_publisher_sql()
+        publishers = self.publisher_dao.get_active_publishers()
+        groups = self._group_totals('publisher_id', [p['publisher_id'] for p in publishers])
+        return [
+            dict({'publisher_id': p['publisher_id'], 'publisher_name': p['publisher_name']}, **group)
+            for p, group in zip(publishers, groups)
+        ]
+    
+    def _group_totals(self, field, group_ids):
+        """
+        把按教材的汇总按类型或出版社分组（只统计启用的教材）
+        :param field: 分组字段 type_id / publisher_id
+        :param group_ids: 输出的分组ID列表
+        :return: 与 group_ids 对齐的汇总字典列表（textbook_count 及各数量字段）
+        """
+        totals = self.analytics_dao.textbook_totals()
+        group_ids = np.asarray(group_ids, dtype=np.int64)
+        count = len(group_ids)
+        if not count:
+            return []
+        order = np.argsort(group_ids)
+        sorted_ids = group_ids[order]
+        enabled = totals['status'] == 1
+        keys = totals[field][enabled]
+        index = np.minimum(np.searchsorted(sorted_ids, keys), count - 1)
+        matched = sorted_ids[index] == keys
+        groups = order[index[matched]]
+        
+        sums = {'textbook_count': np.bincount(groups, minlength=count)}
+        for name in QUANTITY_FIELDS:
+            sums[name] = np.bincount(groups, weights=totals[name][enabled][matched], minlength=count)
+        return [
+            {name: int(values[i]) for name, values in sums.items()}
+            for i in range(count)
+        ]
+    
+    def _statistics_by_type_sql(self):
+        """按类型统计（读取触发器维护的汇总表 stat_by_type）"""
+        result = db.session.execute(text("""
+            SELECT 
+                tt.type_id,
+                tt.type_name,
+                tt.type_code,
+                COALESCE(s.textbook_count, 0),
+                COALESCE(s.order_quantity, 0),
+                COALESCE(s.arrived_quantity, 0),
+                COALESCE(s.issued_quantity, 0),
+                COALESCE(s.current_quantity, 0)
+            FROM textbook_type tt
+            LEFT JOIN stat_by_type s ON s.type_id = tt.type_id
+            WHERE tt.status = 1
+            ORDER BY tt.type_code
+        """))
         rows = result.fetchall()
         
         data = []
@@ -32,9 +128,22 @@ class StatisticsService:
         
         return data
     
-    def get_statistics_by_publisher(self):
-        """按出版社统计"""
-        result = db.session.execute(text("CALL sp_statistics_by_publisher()"))
+    def _statistics_by_publisher_sql(self):
+        """按出版社统计（读取触发器维护的汇总表 stat_by_publisher）"""
+        result = db.session.execute(text("""
+            SELECT 
+                p.publisher_id,
+                p.publisher_name,
+                COALESCE(s.textbook_count, 0),
+                COALESCE(s.order_quantity, 0),
+                COALESCE(s.arrived_quantity, 0),
+                COALESCE(s.issued_quantity, 0),
+                COALESCE(s.current_quantity, 0)
+            FROM publisher p
+            LEFT JOIN stat_by_publisher s ON s.publisher_id = p.publisher_id
+            WHERE p.status = 1
+            ORDER BY p.publisher_name
+        """))
         rows = result.fetchall()
         
         data = []
@@ -52,9 +161,34 @@ class StatisticsService:
         return data
     
     def get_statistics_by_textbook(self, textbook_id):
-        """按教材统计"""
+        """
+        按教材统计
+        默认读取内存统计快照中的按教材汇总；STATISTICS_SNAPSHOT=false 时调用存储过程 sp_statistics_by_textbook
+        :return: 统计字典，教材不存在时返回None
+        """
+        if not current_app.config.get('STATISTICS_SNAPSHOT', True):
+            return self._statistics_by_textbook_sql(textbook_id)
+        totals = self.analytics_dao.textbook_totals()
+        position = totals['position']
+        index = position[textbook_id] if 0 <= textbook_id < len(position) else -1
+        textbook = db.session.get(Textbook, textbook_id) if index >= 0 else None
+        if textbook is None:
+            return None
+        data = {
+            'textbook_id': textbook.textbook_id,
+            'isbn': textbook.isbn,
+            'textbook_name': textbook.textbook_name,
+            'author': textbook.author,
+            'publisher_name': self.publisher_dao.get_name_map().get(textbook.publisher_id),
+            'type_name': self.textbook_type_dao.get_name_map().get(textbook.type_id)
+        }
+        data.update((name, int(totals[name][index])) for name in QUANTITY_FIELDS)
+        return data
+    
+    def _statistics_by_textbook_sql(self, textbook_id):
+        """按教材统计（存储过程 sp_statistics_by_textbook）"""
         result = db.session.execute(
-            text(f"CALL sp_statistics_by_textbook({textbook_id})")
+            text("CALL sp_statistics_by_textbook(:textbook_id)"), {'textbook_id': textbook_id}
         )
         rows = result.fetchall()
         
@@ -74,81 +208,213 @@ class StatisticsService:
             }
         return None
     
-    def get_statistics_by_date_range(self, start_date, end_date):
-        """按日期范围统计"""
-        result = db.session.execute(
-            text(f"CALL sp_statistics_by_date_range('{start_date}', '{end_date}')")
-        )
-        rows = result.fetchall()
+    def get_statistics_by_date_range(self, start_date, end_date, granularity='month'):
+        """
+        按日期范围统计（读取触发器维护的按日汇总表 stat_daily，再按粒度合并）
+        订购按订购日期、入库按入库日期、发放按发放日期归入时间段；多年的范围也只读取几千行汇总
+        :param start_date: 开始日期（YYYY-MM-DD）
+        :param end_date: 结束日期（YYYY-MM-DD）
+        :param granularity: 时间粒度 day / week（周一开始）/ month
+        :return: 按时间段升序的列表（没有业务的时间段数量为0），每项含 period、start_date、end_date
+                 及订单数、订购数量、入库单数、到货数量、发放数量
+        :raises ValidationException: 参数不合法，或时间段数量超过 STATISTICS_MAX_BUCKETS
+        """
+        start = self._parse_date(start_date)
+        end = self._parse_date(end_date)
+        if start > end:
+            raise ValidationException('开始日期不能晚于结束日期')
+        if granularity not in DATE_GRANULARITIES:
+            raise ValidationException(f'时间粒度只能是：{", ".join(DATE_GRANULARITIES)}')
+        count = self._period_count(start, end, granularity)
+        max_buckets = current_app.config.get('STATISTICS_MAX_BUCKETS', 3660)
+        if count > max_buckets:
+            raise ValidationException(f'时间段数量（{count}）超过上限{max_buckets}，请缩小日期范围或改用更粗的时间粒度')
         
-        data = []
-        for row in rows:
-            data.append({
-                'month': row[0],
-                'order_quantity': row[1],
-                'arrived_quantity': row[2],
-                'issued_quantity': row[3]
-            })
+        buckets = {}
+        period = self._period_start(start, granularity)
+        while period is not None and period <= end:
+            following = self._next_period(period, granularity)
+            last_day = end if following is None or following > end else following - timedelta(days=1)
+            buckets[period] = {
+                'period': period.strftime('%Y-%m') if granularity == 'month' else period.isoformat(),
+                'start_date': max(period, start).isoformat(),
+                'end_date': last_day.isoformat(),
+                **{field: 0 for field in STAT_DAILY_FIELDS}
+            }
+            period = following
         
-        return data
+        for row in self.stat_daily_dao.get_range(start, end):
+            bucket = buckets[self._period_start(row.stat_date, granularity)]
+            for field in STAT_DAILY_FIELDS:
+                bucket[field] += getattr(row, field) or 0
+        return list(buckets.values())
+    
+    @staticmethod
+    def _parse_date(value):
+        """解析日期参数"""
+        if isinstance(value, date):
+            return value
+        try:
+            return date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValidationException('日期格式应为 YYYY-MM-DD')
+    
+    @staticmethod
+    def _period_start(day, granularity):
+        """日期所在时间段的第一天"""
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        return day
+    
+    @classmethod
+    def _period_count(cls, start, end, granularity):
+        """[start, end] 覆盖的时间段数量"""
+        if granularity == 'week':
+            return (cls._period_start(end, granularity) - cls._period_start(start, granularity)).days // 7 + 1
+        if granularity == 'month':
+            return (end.year - start.year) * 12 + end.month - start.month + 1
+        return (end - start).days + 1
+    
+    @staticmethod
+    def _next_period(period, granularity):
+        """下一个时间段的第一天，超出 date 的取值范围（9999-12-31 所在的时间段）时返回None"""
+        try:
+            if granularity == 'week':
+                return period + timedelta(days=7)
+            if granularity == 'month':
+                return (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+            return period + timedelta(days=1)
+        except OverflowError:
+            return None
     
     def get_inventory_warnings(self):
-        """获取库存预警（使用视图v_inventory_warning）"""
-        result = db.session.execute(text("""
-            SELECT 
-                textbook_id,
-                isbn,
-                textbook_name,
-                publisher_name,
-                type_name,
-                current_quantity,
-                min_quantity,
-                max_quantity,
-                warning_status
-            FROM v_inventory_warning
-            ORDER BY warning_level ASC, gap_quantity DESC
-        """))
-        rows = result.fetchall()
-        
-        data = []
-        for row in rows:
-            data.append({
-                'textbook_id': row[0],
-                'isbn': row[1],
-                'textbook_name': row[2],
-                'publisher_name': row[3],
-                'type_name': row[4],
-                'current_quantity': row[5],
-                'min_quantity': row[6],
-                'max_quantity': row[7],
-                'status': row[8]  # warning_status 映射为 status，保持接口一致
-            })
-        
-        return data
+        """
+        获取库存预警（读内存中增量维护的预警集合，排序与视图 v_inventory_warning 一致）
+        出版社、类型名称从参考数据缓存补充
+        """
+        return [self._warning_item(entry) for entry in self.inventory_dao.get_warnings()]
+    
+    def stream_inventory_warnings(self, last_event_id=None):
+        """
+        库存预警推送（Server-Sent Events）
+        - 连接时先发送 snapshot 事件（全量预警列表）；带 Last-Event-ID 重连且缓冲中仍有后续事件时只补发变化
+        - 之后推送 enter（进入预警）、leave（离开预警）、update（仍在预警但数量变化）事件
+        - 空闲时每 INVENTORY_WARNING_REFRESH 秒增量同步一次（追平其他进程的修改）并发送心跳
+        :param last_event_id: 客户端收到的最后一个事件ID
+        :return: SSE 文本生成器
+        """
+        interval = current_app.config.get('INVENTORY_WARNING_REFRESH', 5)
+        self.inventory_dao.ensure_warning_set()
+        subscription = inventory_warning_set.subscribe()
+        try:
+            replay = None
+            if last_event_id is not None:
+                replay = inventory_warning_set.events_since(last_event_id)
+            if replay is None:
+                sent = inventory_warning_set.last_event_id
+                yield self._sse('snapshot', self.get_inventory_warnings(), sent)
+            else:
+                sent = last_event_id
+                for event in replay:
+                    yield self._sse(event['event'], self._warning_item(event['data']), event['id'])
+                    sent = event['id']
+            # 长连接期间不占用数据库连接
+            db.session.remove()
+            
+            while not subscription.overflowed:
+                try:
+                    event = subscription.get(timeout=interval)
+                except queue.Empty:
+                    self.inventory_dao.ensure_warning_set()
+                    db.session.remove()
+                    yield ': keepalive\n\n'
+                    continue
+                if event['id'] <= sent:
+                    continue
+                yield self._sse(event['event'], self._warning_item(event['data']), event['id'])
+                sent = event['id']
+            # 消费过慢导致事件丢失：通知客户端重新连接获取全量
+            yield self._sse('reset', None, sent)
+        finally:
+            inventory_warning_set.unsubscribe(subscription)
+    
+    def _warning_item(self, entry):
+        """预警条目转换为接口格式"""
+        return {
+            'textbook_id': entry['textbook_id'],
+            'isbn': entry['isbn'],
+            'textbook_name': entry['textbook_name'],
+            'publisher_name': self.publisher_dao.get_name_map().get(entry['publisher_id']),
+            'type_name': self.textbook_type_dao.get_name_map().get(entry['type_id']),
+            'current_quantity': entry['current_quantity'],
+            'min_quantity': entry['min_quantity'],
+            'max_quantity': entry['max_quantity'],
+            'status': entry['status'],
+            'warning_level': entry['warning_level'],
+            'gap_quantity': entry['gap_quantity']
+        }
+    
+    @staticmethod
+    def _sse(event, data, event_id):
+        """格式化一条 SSE 消息"""
+        payload = current_app.json.dumps(data)
+        return f'id: {event_id}\nevent: {event}\ndata: {payload}\n\n'
+    
+    def rebuild_statistics(self):
+        """
+        全量重建统计汇总表（存储过程 sp_rebuild_statistics、sp_rebuild_daily_statistics）
+        :return: 重建后的 (类型行数, 出版社行数, 按日汇总行数)
+        """
+        db.session.execute(text("CALL sp_rebuild_statistics()"))
+        db.session.commit()
+        type_rows = db.session.execute(text("SELECT COUNT(*) FROM stat_by_type")).scalar()
+        publisher_rows = db.session.execute(text("SELECT COUNT(*) FROM stat_by_publisher")).scalar()
+        daily_rows = self.stat_daily_dao.rebuild()
+        return type_rows, publisher_rows, daily_rows
     
     def get_dashboard_data(self):
-        """获取仪表盘数据"""
-        # 获取各种统计数据
+        """
+        获取仪表盘数据
+        汇总结果缓存在 cache 中：教材、订单、库存经DAO写入（含入库触发器连带的修改）后立即失效，
+        另按 DASHBOARD_REFRESH 秒过期以追平未经DAO的写入；命中时不访问数据库
+        """
+        return dict(self._compute_dashboard_summary())
+    
+    @cache.cached(ttl='DASHBOARD_REFRESH', tags=DASHBOARD_TABLES, prefix='dashboard')
+    def _compute_dashboard_summary(self):
+        """一条语句（四个标量子查询）计算仪表盘汇总"""
         from app.models.textbook import Textbook
         from app.models.purchase_order import PurchaseOrder
+        from app.models.inventory import Inventory
         
-        textbook_count = Textbook.query.filter_by(status=1).count()
-        pending_orders = PurchaseOrder.query.filter(
-            PurchaseOrder.order_status.in_(['待审核', '已审核', '已订购'])
-        ).count()
-        
-        # 库存总价值
-        inventory_value = self.inventory_dao.get_total_value()
-        
-        # 库存预警数量
-        warnings = self.inventory_dao.get_warnings()
-        warning_count = len(warnings)
+        textbook_count = select(func.count()).select_from(Textbook).where(Textbook.status == 1)
+        pending_orders = select(func.count()).select_from(PurchaseOrder).where(
+            PurchaseOrder.order_status.in_(PENDING_ORDER_STATUSES)
+        )
+        inventory_value = select(func.sum(Textbook.price * Inventory.current_quantity)).select_from(
+            Inventory).join(Textbook, Inventory.textbook_id == Textbook.textbook_id)
+        # 与视图 v_inventory_warning 的条件一致
+        warning_count = select(func.count()).select_from(Inventory).join(
+            Textbook, Inventory.textbook_id == Textbook.textbook_id
+        ).where(
+            Textbook.status == 1,
+            or_(Inventory.current_quantity < Inventory.min_quantity,
+                Inventory.current_quantity > Inventory.max_quantity)
+        )
+        row = db.session.execute(select(
+            textbook_count.scalar_subquery(),
+            pending_orders.scalar_subquery(),
+            inventory_value.scalar_subquery(),
+            warning_count.scalar_subquery()
+        )).one()
         
         return {
-            'textbook_count': textbook_count,
-            'pending_orders': pending_orders,
+            'textbook_count': row[0],
+            'pending_orders': row[1],
             'pending_requisitions': 0,  # 已移除领用功能，保留字段以兼容前端
-            'inventory_value': inventory_value,
-            'warning_count': warning_count
+            'inventory_value': float(row[2]) if row[2] else 0.0,
+            'warning_count': row[3]
         }
 
@@ -1,9 +1,10 @@
 """
 入库服务
 """
-from sqlalchemy import text
 from app.dao.stock_in_dao import StockInDAO
 from app.dao.purchase_order_dao import PurchaseOrderDAO
+from app.dao.doc_sequence_dao import doc_number_allocator
+from app.models.stock_in import StockIn
 from app.extensions import db
 from app.utils.exceptions import BusinessException
 
@@ -16,30 +17,36 @@ class StockInService:
         self.purchase_dao = PurchaseOrderDAO()
     
     def generate_stock_in_no(self):
-        """生成入库单号"""
-        # 调用存储过程生成入库单号
-        db.session.execute(text("CALL sp_generate_stock_in_no(@stock_in_no)"))
-        result = db.session.execute(text("SELECT @stock_in_no"))
-        stock_in_no = result.scalar()
-        return stock_in_no
+        """生成入库单号（SI + YYYYMMDD + 序号），通常从本进程预留的号段中分配，不访问数据库"""
+        return doc_number_allocator.next_number('SI', StockIn.stock_in_no)
     
     def get_stock_in_list(self, page=1, per_page=20, keyword=None, 
-                          start_date=None, end_date=None):
+                          start_date=None, end_date=None, cursor=None, count_policy=None):
         """获取入库列表"""
-        items, total = self.stock_in_dao.search(
+        page_result = self.stock_in_dao.search(
             keyword=keyword,
             start_date=start_date,
             end_date=end_date,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=cursor,
+            count_policy=count_policy
         )
         
-        result = [item.to_dict(include_relations=True) for item in items]
-        return result, total
+        result = [item.to_dict(include_relations=True) for item in page_result.items]
+        return page_result.with_items(result)
+    
+    def iter_stock_ins(self, **filters):
+        """
+        逐条产出入库数据（用于导出），过滤条件与 get_stock_in_list 相同
+        :return: 入库字典生成器
+        """
+        for stock_in in self.stock_in_dao.iter_all(filters, with_relations=True):
+            yield stock_in.to_dict(include_relations=True)
     
     def get_stock_in_detail(self, stock_in_id):
         """获取入库详情"""
-        stock_in = self.stock_in_dao.get_by_id(stock_in_id)
+        stock_in = self.stock_in_dao.get_by_id(stock_in_id, with_relations=True)
         return stock_in.to_dict(include_relations=True)
     
     def create_stock_in(self, data):
@@ -69,6 +76,48 @@ class StockInService:
         
         return stock_in.to_dict(include_relations=True)
     
+    def batch_create_stock_ins(self, rows):
+        """
+        批量入库（整批到货）
+        一次查询预加载涉及的订单，在内存中按订单累计校验剩余数量，一次分配全部入库单号，
+        再 executemany 写入并只提交一次（触发器逐行更新库存和订单）
+        :param rows: 已校验的入库数据列表
+        :return: 逐行结果列表，status 为 created 或 failed
+        """
+        orders = self.purchase_dao.get_by_ids(row['order_id'] for row in rows)
+        # 本批次内已占用的各订单数量
+        pending = {}
+        accepted, positions, results = [], [], []
+        for index, row in enumerate(rows):
+            order = orders.get(row['order_id'])
+            if order is None:
+                message = '订单不存在'
+            elif order.order_status == '已取消':
+                message = '订单已取消，不能入库'
+            else:
+                remaining = order.order_quantity - order.arrived_quantity - pending.get(order.order_id, 0)
+                if row['actual_quantity'] > remaining:
+                    message = f'入库数量超出订单剩余数量（剩余：{remaining}）'
+                else:
+                    message = None
+                    pending[order.order_id] = pending.get(order.order_id, 0) + row['actual_quantity']
+            if message:
+                results.append({'index': index, 'status': 'failed', 'id': None, 'message': message})
+            else:
+                accepted.append(row)
+                positions.append(index)
+        
+        if accepted:
+            numbers = doc_number_allocator.next_numbers('SI', StockIn.stock_in_no, len(accepted))
+            for row, number in zip(accepted, numbers):
+                row['stock_in_no'] = number
+            for outcome in self.stock_in_dao.create_many(accepted):
+                outcome['index'] = positions[outcome['index']]
+                results.append(outcome)
+        
+        results.sort(key=lambda r: r['index'])
+        return results
+    
     def update_stock_in(self, stock_in_id, data):
         """更新入库单"""
         stock_in = self.stock_in_dao.update(stock_in_id, data)
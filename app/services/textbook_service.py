@@ -3,7 +3,11 @@
 """
 from app.dao.textbook_dao import TextbookDAO
 from app.dao.inventory_dao import InventoryDAO
+from app.dao.publisher_dao import PublisherDAO
+from app.dao.textbook_type_dao import TextbookTypeDAO
+from app.models.textbook import Textbook
 from app.utils.exceptions import ValidationException, NotFoundException
+from app.utils.serializer import serialize_rows
 
 
 class TextbookService:
@@ -12,38 +16,52 @@ class TextbookService:
     def __init__(self):
         self.textbook_dao = TextbookDAO()
         self.inventory_dao = InventoryDAO()
+        self.publisher_dao = PublisherDAO()
+        self.textbook_type_dao = TextbookTypeDAO()
     
     def get_textbook_list(self, page=1, per_page=20, keyword=None, 
-                          publisher_id=None, type_id=None):
-        """获取教材列表"""
-        filters = {'status': 1}
-        if publisher_id:
-            filters['publisher_id'] = publisher_id
-        if type_id:
-            filters['type_id'] = type_id
-        
-        items, total = self.textbook_dao.paginate(
+                          publisher_id=None, type_id=None, cursor=None, count_policy=None):
+        """
+        获取教材列表
+        只读列表直接按列查询并序列化结果行，不构建ORM实例；
+        日期和金额保持原始类型，由JSON编码器统一转换；
+        出版社、类型名称从参考数据缓存补充
+        """
+        page_result = self.textbook_dao.search(
+            keyword=keyword,
+            publisher_id=publisher_id,
+            type_id=type_id,
             page=page,
             per_page=per_page,
-            filters=filters
+            cursor=cursor,
+            count_policy=count_policy,
+            as_rows=True
         )
-        
-        result = []
-        for item in items:
-            data = item.to_dict(include_relations=True)
-            result.append(data)
-        
-        return result, total
+        result = serialize_rows(Textbook, page_result.items, extra=TextbookDAO.ROW_EXTRA_COLUMNS,
+                                convert=False)
+        publishers = self.publisher_dao.get_name_map()
+        types = self.textbook_type_dao.get_name_map()
+        for item in result:
+            item['publisher_name'] = publishers.get(item['publisher_id'])
+            item['type_name'] = types.get(item['type_id'])
+        return page_result.with_items(result)
+    
+    def iter_textbooks(self, **filters):
+        """
+        逐条产出教材数据（用于导出），过滤条件与 get_textbook_list 相同
+        :return: 教材字典生成器
+        """
+        for textbook in self.textbook_dao.iter_all(filters, with_relations=True):
+            yield textbook.to_dict(include_relations=True)
     
     def get_textbook_detail(self, textbook_id):
         """获取教材详情"""
-        textbook = self.textbook_dao.get_by_id(textbook_id)
+        textbook = self.textbook_dao.get_by_id(textbook_id, with_relations=True)
         data = textbook.to_dict(include_relations=True)
         
-        # 获取库存信息
-        inventory = self.inventory_dao.get_by_textbook(textbook_id)
-        if inventory:
-            data['inventory'] = inventory.to_dict()
+        # 获取库存信息（已随教材一并预加载）
+        if textbook.inventory:
+            data['inventory'] = textbook.inventory.to_dict()
         
         return data
     
@@ -61,6 +79,25 @@ class TextbookService:
         textbook = self.textbook_dao.update(textbook_id, data)
         return textbook.to_dict(include_relations=True)
     
+    def batch_save_textbooks(self, rows, upsert=False):
+        """
+        批量创建教材
+        :param rows: 教材数据列表
+        :param upsert: 为True时ISBN已存在的教材按新数据更新，否则记为失败
+        :return: 逐行结果列表
+        """
+        if upsert:
+            return self.textbook_dao.upsert_many(rows)
+        return self.textbook_dao.create_many(rows)
+    
+    def batch_update_textbooks(self, rows):
+        """
+        按教材ID批量更新
+        :param rows: 含 textbook_id 的更新数据列表
+        :return: 逐行结果列表
+        """
+        return self.textbook_dao.update_many(rows)
+    
     def delete_textbook(self, textbook_id):
         """删除教材（软删除）"""
         self.textbook_dao.delete(textbook_id, soft=True)
@@ -176,8 +176,8 @@ class API {
         return await this.request(`/statistics/by-textbook/${id}`);
     }
 
-    async getStatisticsByDate(startDate, endDate) {
-        return await this.request(`/statistics/by-date?start_date=${startDate}&end_date=${endDate}`);
+    async getStatisticsByDate(startDate, endDate, granularity = 'month') {
+        return await this.request(`/statistics/by-date?start_date=${startDate}&end_date=${endDate}&granularity=${granularity}`);
     }
 
     async getInventoryWarnings() {
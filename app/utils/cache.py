@@ -0,0 +1,448 @@
+"""
+缓存工具
+- TTLCache：线程安全的进程内 LRU + TTL 缓存（带标签失效）
+- Cache：应用级缓存扩展（app.extensions.cache），后端可选进程内（memory）或 Redis（redis），
+  提供 cached 装饰器、按标签（表名）失效和按键前缀的命中统计
+"""
+import functools
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+CACHE_BACKENDS = ('memory', 'redis')
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    线程安全的进程内 LRU + TTL 缓存
+    - 超过容量时淘汰最久未使用的条目
+    - 条目可以带标签（如表名），写操作后按标签批量失效
+    - 指定 weigh 时容量按条目权重之和计算（如结果列表的长度），单个超过容量的条目不缓存
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, on_evict=None, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict  # 容量淘汰时的回调，参数为被淘汰的键
+        self.weigh = weigh  # 条目权重函数，参数为缓存值；为None时每个条目权重为1
+        self._data = OrderedDict()  # key -> (value, expires_at, tags)
+        self._tags = {}  # tag -> set(key)
+        self._weights = {}  # key -> 权重
+        self._weight = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        读取缓存
+        :param key: 缓存键
+        :param default: 未命中时的返回值
+        :return: 缓存值或default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        """
+        写入缓存
+        :param key: 缓存键
+        :param value: 缓存值
+        :param ttl: 过期秒数，默认使用实例ttl，0或None表示使用默认值
+        :param tags: 标签列表，用于按标签失效
+        """
+        ttl = ttl or self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        tags = frozenset(tags)
+        weight = self.weigh(value) if self.weigh is not None else 1
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if weight > self.maxsize:
+                return
+            self._data[key] = (value, expires_at, tags)
+            self._weights[key] = weight
+            self._weight += weight
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._weight > self.maxsize:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+                if self.on_evict is not None:
+                    self.on_evict(oldest)
+
+    def delete(self, key):
+        """删除指定缓存"""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def invalidate_tag(self, tag):
+        """
+        使带有指定标签的缓存全部失效
+        :param tag: 标签（通常为表名）
+        """
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self._weights.clear()
+            self._weight = 0
+
+    def stats(self):
+        """
+        缓存统计
+        :return: 命中、未命中、淘汰次数及当前条目数
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data)
+            }
+
+    def _remove(self, key):
+        """删除条目并维护标签索引（调用方需持有锁）"""
+        _, _, tags = self._data.pop(key)
+        self._weight -= self._weights.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def key_prefix(key):
+    """缓存键的前缀（统计分组）：元组取第一个元素，字符串取第一个冒号之前的部分"""
+    if isinstance(key, tuple):
+        return str(key[0]) if key else ''
+    return str(key).split(':', 1)[0]
+
+
+class MemoryBackend:
+    """
+    进程内后端（LRU + TTL），缓存值直接共享，不做序列化
+    每个标签有一个失效代数，get_or_set 写回前核对代数，避免写回失效之前读到的旧值
+    """
+
+    name = 'memory'
+
+    def __init__(self, maxsize, ttl, on_evict=None):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=on_evict)
+        self._generations = {}  # tag -> 失效次数
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key, _MISSING)
+
+    def generations(self, tags):
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(self, key, value, ttl, tags, generations=None):
+        with self._lock:
+            if generations is not None and generations != tuple(self._generations.get(tag, 0) for tag in tags):
+                return False
+            self._cache.set(key, value, ttl=ttl, tags=tags)
+            return True
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                self._cache.invalidate_tag(tag)
+
+    def clear(self):
+        self._cache.clear()
+
+    def info(self):
+        return {'backend': self.name, 'size': self._cache.stats()['size'], 'maxsize': self._cache.maxsize}
+
+
+# 写入缓存值并登记到标签集合（原子执行）
+# KEYS: 缓存键, 标签集合键 * n, 标签代数键 * n
+# ARGV: 值, 过期秒数（0 表示不过期）, n, 是否核对代数（1/0）, 读取时的代数 * n
+# - 核对代数时，任一标签在读取之后失效过则不写入，返回0
+# - 标签集合的过期时间不短于其中任一成员：新建的集合设置过期时间，已有的只延长；
+#   有不过期的成员时集合也不过期
+_REDIS_SET_SCRIPT = """
+local n = tonumber(ARGV[3])
+if ARGV[4] == '1' then
+    for i = 1, n do
+        if (redis.call('GET', KEYS[1 + n + i]) or '0') ~= ARGV[4 + i] then
+            return 0
+        end
+    end
+end
+local ttl = tonumber(ARGV[2])
+if ttl > 0 then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ttl)
+else
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+for i = 1, n do
+    local tag_key = KEYS[1 + i]
+    local created = redis.call('EXISTS', tag_key) == 0
+    redis.call('SADD', tag_key, KEYS[1])
+    if ttl <= 0 then
+        redis.call('PERSIST', tag_key)
+    else
+        local remaining = redis.call('TTL', tag_key)
+        if created or (remaining >= 0 and remaining < ttl) then
+            redis.call('EXPIRE', tag_key, ttl)
+        end
+    end
+end
+return 1
+"""
+
+
+class RedisBackend:
+    """
+    Redis 后端（多进程、多节点共享）
+    值用 pickle 序列化；每个标签对应一个集合，记录带该标签的键，失效时一并删除。
+    标签集合随成员过期；每个标签另有一个失效代数，get_or_set 写回前核对，
+    其他进程在读取之后使标签失效时不写回旧值。
+    需要安装 redis（pip install redis）
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, namespace, ttl):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis 需要安装redis')
+        self._client = redis.Redis.from_url(url)
+        self._namespace = namespace
+        self._ttl = ttl
+        self._set_script = self._client.register_script(_REDIS_SET_SCRIPT)
+
+    def _key(self, key):
+        if isinstance(key, tuple):
+            digest = hashlib.sha1(repr(key[1:]).encode('utf-8')).hexdigest()
+            return f'{self._namespace}{key_prefix(key)}:{digest}'
+        return f'{self._namespace}{key}'
+
+    def _tag_key(self, tag):
+        return f'{self._namespace}tag:{tag}'
+
+    def _generation_key(self, tag):
+        return f'{self._namespace}gen:{tag}'
+
+    def get(self, key):
+        data = self._client.get(self._key(key))
+        return _MISSING if data is None else pickle.loads(data)
+
+    def generations(self, tags):
+        if not tags:
+            return ()
+        values = self._client.mget([self._generation_key(tag) for tag in tags])
+        return tuple(int(value or 0) for value in values)
+
+    def set(self, key, value, ttl, tags, generations=None):
+        ttl = ttl or self._ttl
+        keys = [self._key(key)]
+        keys += [self._tag_key(tag) for tag in tags]
+        keys += [self._generation_key(tag) for tag in tags]
+        args = [pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), int(ttl or 0), len(tags),
+                0 if generations is None else 1, *(generations or ())]
+        return bool(self._set_script(keys=keys, args=args))
+
+    def delete(self, key):
+        self._client.delete(self._key(key))
+
+    def invalidate_tags(self, tags):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipe = self._client.pipeline()
+            pipe.incr(self._generation_key(tag))
+            pipe.smembers(tag_key)
+            pipe.delete(tag_key)
+            _, names, _ = pipe.execute()
+            if names:
+                self._client.delete(*names)
+
+    def clear(self):
+        names = list(self._client.scan_iter(match=f'{self._namespace}*', count=1000))
+        for start in range(0, len(names), 1000):
+            self._client.delete(*names[start:start + 1000])
+
+    def info(self):
+        return {'backend': self.name, 'namespace': self._namespace}
+
+
+class Cache:
+    """
+    应用级缓存扩展
+
+    配置项：
+    - CACHE_BACKEND：memory（默认，进程内）/ redis（多进程共享，写操作失效对所有进程生效）
+    - CACHE_DEFAULT_TTL：默认过期秒数
+    - CACHE_MAXSIZE：进程内后端的最大条目数
+    - CACHE_REDIS_URL、CACHE_KEY_PREFIX：Redis 地址与键名前缀
+
+    缓存键为元组 (前缀, ...) 或字符串 '前缀:...'，命中统计按前缀分组
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self._stats = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """按配置创建后端"""
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        if backend not in CACHE_BACKENDS:
+            raise ValueError(f'CACHE_BACKEND只能是：{", ".join(CACHE_BACKENDS)}')
+        ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        if backend == 'redis':
+            self.backend = RedisBackend(app.config.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+                                        app.config.get('CACHE_KEY_PREFIX', 'textbook:'), ttl)
+        else:
+            self.backend = MemoryBackend(app.config.get('CACHE_MAXSIZE', 4096), ttl,
+                                         on_evict=lambda key: self._count(key, 'evictions'))
+        self._stats = {}
+        app.extensions['cache'] = self
+
+    def _count(self, key, field):
+        """按键前缀累加统计"""
+        with self._lock:
+            stats = self._stats.setdefault(key_prefix(key), {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0})
+            stats[field] += 1
+
+    def get(self, key, default=None):
+        """
+        读取缓存
+        :param key: 缓存键
+        :param default: 未命中时的返回值
+        """
+        value = self.backend.get(key)
+        if value is _MISSING:
+            self._count(key, 'misses')
+            return default
+        self._count(key, 'hits')
+        return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        """
+        写入缓存
+        :param key: 缓存键
+        :param value: 缓存值（进程内后端直接共享该对象，调用方不要修改）
+        :param ttl: 过期秒数，或配置项名称（如 'COUNT_CACHE_TTL'），为None时使用默认值
+        :param tags: 标签（通常为表名），用于 invalidate_tags
+        """
+        self.backend.set(key, value, self._resolve_ttl(ttl), tuple(tags))
+        self._count(key, 'sets')
+
+    def get_or_set(self, key, loader, ttl=None, tags=()):
+        """
+        读穿透：未命中时调用 loader 并写入缓存
+        调用 loader 之前记下各标签的失效代数，期间任一标签失效过（其他线程、进程的写操作）
+        则只返回结果、不写回，避免旧值在失效之后留在缓存中
+        :param loader: 无参函数
+        :return: 缓存值
+        """
+        value = self.backend.get(key)
+        if value is not _MISSING:
+            self._count(key, 'hits')
+            return value
+        self._count(key, 'misses')
+        tags = tuple(tags)
+        generations = self.backend.generations(tags)
+        value = loader()
+        if self.backend.set(key, value, self._resolve_ttl(ttl), tags, generations):
+            self._count(key, 'sets')
+        return value
+
+    def delete(self, key):
+        """删除指定缓存"""
+        self.backend.delete(key)
+
+    def invalidate_tags(self, *tags):
+        """
+        使带有任一标签的缓存失效（DAO写操作后按表名调用）
+        :param tags: 标签
+        """
+        self.backend.invalidate_tags(tags)
+
+    def clear(self):
+        """清空缓存和统计"""
+        self.backend.clear()
+        with self._lock:
+            self._stats = {}
+
+    def cached(self, key_fn=None, ttl=None, tags=(), prefix=None):
+        """
+        缓存函数（服务/DAO方法）返回值的装饰器
+        :param key_fn: 由调用参数生成键的函数（参数与被装饰函数相同），默认使用全部位置参数和关键字参数
+                       （方法的 self 不参与）
+        :param ttl: 过期秒数或配置项名称
+        :param tags: 标签，写入这些表后失效
+        :param prefix: 键前缀（统计分组），默认为函数的限定名
+        """
+        def decorator(f):
+            name = prefix or f.__qualname__
+            is_method = '.' in f.__qualname__.rsplit('<locals>.', 1)[-1]
+
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                if key_fn is not None:
+                    key = key_fn(*args, **kwargs)
+                else:
+                    key = (args[1:] if is_method else args, tuple(sorted(kwargs.items())))
+                return self.get_or_set((name, key), lambda: f(*args, **kwargs), ttl=ttl, tags=tags)
+
+            wrapper.uncached = f
+            return wrapper
+
+        return decorator
+
+    def stats(self):
+        """
+        缓存统计
+        :return: {'backend': 后端信息, 'prefixes': {前缀: {hits, misses, sets, evictions, hit_rate}}}
+        """
+        with self._lock:
+            prefixes = {}
+            for name, stats in self._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                prefixes[name] = dict(stats, hit_rate=round(stats['hits'] / lookups, 4) if lookups else None)
+        return {'backend': self.backend.info() if self.backend else None, 'prefixes': prefixes}
+
+    @staticmethod
+    def _resolve_ttl(ttl):
+        """ttl 为字符串时按配置项读取"""
+        if isinstance(ttl, str):
+            return current_app.config.get(ttl)
+        return ttl
@@ -0,0 +1,185 @@
+"""
+列式内存表（NumPy）
+- columns：查询结果行转换为按列的数组
+- Dictionary：字符串列的字典编码（值 -> 小整数编码）
+- ColumnTable：按主键增量维护的列式表，供统计在内存中做向量化分组汇总
+"""
+import threading
+from datetime import date
+from operator import itemgetter
+import numpy as np
+
+DATE_DTYPE = np.dtype('datetime64[D]')
+# date.toordinal() 与 datetime64[D]（1970-01-01 起的天数）之间的差值
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def columns(rows, *dtypes):
+    """
+    把查询结果行转换为按列的数组
+    逐列用 np.fromiter 读取，不经过 zip(*rows) 转置；日期列按序数转换，
+    比 np.array(日期列表) 逐个解析快一个数量级以上
+    :param rows: 行列表（元组）
+    :param dtypes: 每一列的 dtype，日期列使用 'datetime64[D]'
+    :return: 数组列表
+    """
+    count = len(rows)
+    arrays = []
+    for index, dtype in enumerate(map(np.dtype, dtypes)):
+        values = map(itemgetter(index), rows)
+        if dtype == DATE_DTYPE:
+            ordinals = np.fromiter(map(date.toordinal, values), dtype=np.int64, count=count)
+            arrays.append((ordinals - _EPOCH_ORDINAL).astype(DATE_DTYPE))
+        else:
+            arrays.append(np.fromiter(values, dtype=dtype, count=count))
+    return arrays
+
+
+class Dictionary:
+    """字符串字典编码：每个不同的值分配一个从0开始的编码，编码只增不改"""
+
+    def __init__(self, dtype=np.int16):
+        self.dtype = dtype
+        self.values = []
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def code(self, value):
+        """
+        值的编码（不存在时返回-1，不分配新编码）
+        :param value: 原始值
+        """
+        return self._codes.get(value, -1)
+
+    def encode(self, values):
+        """
+        批量编码，遇到新值时分配编码
+        :param values: 原始值序列
+        :return: 编码数组
+        """
+        with self._lock:
+            codes = self._codes
+            for value in set(values) - codes.keys():
+                codes[value] = len(self.values)
+                self.values.append(value)
+        return np.fromiter(map(codes.__getitem__, values), dtype=self.dtype, count=len(values))
+
+
+class ColumnTable:
+    """
+    按主键增量维护的列式表
+    - load() 全量装载；upsert() 按主键覆盖或追加；delete() 标记删除
+    - view() 返回只含有效行的列数组（结果缓存到下一次修改，调用方不要修改）
+    - version 每次修改加一，调用方可据此缓存派生结果
+    """
+
+    def __init__(self, key_dtype, column_dtypes):
+        """
+        :param key_dtype: 主键 dtype
+        :param column_dtypes: {列名: dtype}
+        """
+        self.column_dtypes = dict(column_dtypes)
+        self._keys = np.empty(0, dtype=key_dtype)
+        self._data = {name: np.empty(0, dtype=dtype) for name, dtype in self.column_dtypes.items()}
+        self._live = np.empty(0, dtype=bool)
+        self._positions = {}
+        self._size = 0
+        self._view = None
+        self.version = 0
+
+    def __len__(self):
+        return len(self._positions)
+
+    def load(self, keys, data):
+        """
+        全量装载
+        :param keys: 主键数组（不重复）
+        :param data: {列名: 数组}
+        """
+        self._keys = np.array(keys, dtype=self._keys.dtype)
+        self._data = {name: np.array(data[name], dtype=dtype) for name, dtype in self.column_dtypes.items()}
+        self._size = len(self._keys)
+        self._live = np.ones(self._size, dtype=bool)
+        self._positions = dict(zip(self._keys.tolist(), range(self._size)))
+        self._changed()
+
+    def upsert(self, keys, data):
+        """
+        按主键覆盖已有行、追加新行
+        :param keys: 主键数组（不重复）
+        :param data: {列名: 数组}
+        """
+        if not len(keys):
+            return
+        positions = np.fromiter(
+            (self._positions.get(key, -1) for key in keys.tolist()), dtype=np.int64, count=len(keys)
+        )
+        existing = positions >= 0
+        if existing.any():
+            rows = positions[existing]
+            for name, array in self._data.items():
+                array[rows] = data[name][existing]
+        added = np.flatnonzero(~existing)
+        if len(added):
+            start = self._size
+            self._reserve(start + len(added))
+            end = start + len(added)
+            self._keys[start:end] = keys[added]
+            self._live[start:end] = True
+            for name, array in self._data.items():
+                array[start:end] = data[name][added]
+            self._positions.update(zip(keys[added].tolist(), range(start, end)))
+            self._size = end
+        self._changed()
+
+    def delete(self, keys):
+        """
+        删除行（标记删除，有效行过少时 view() 会压缩存储）
+        :param keys: 主键序列
+        """
+        rows = [self._positions.pop(key) for key in keys if key in self._positions]
+        if rows:
+            self._live[rows] = False
+            self._changed()
+
+    def view(self):
+        """
+        有效行的列数组
+        :return: {'key': 主键数组, 列名: 数组}
+        """
+        view = self._view
+        if view is None:
+            size = self._size
+            live = self._live[:size]
+            if len(self._positions) == size:
+                view = {'key': self._keys[:size]}
+                view.update((name, array[:size]) for name, array in self._data.items())
+            else:
+                view = {'key': self._keys[:size][live]}
+                view.update((name, array[:size][live]) for name, array in self._data.items())
+                if len(self._positions) * 2 < size:
+                    # 压缩不改变内容，保留版本号
+                    version = self.version
+                    self.load(view['key'], view)
+                    self.version = version
+            self._view = view
+        return view
+
+    def _reserve(self, capacity):
+        """按倍数扩容存储"""
+        if capacity <= len(self._keys):
+            return
+        capacity = max(capacity, len(self._keys) * 2, 1024)
+
+        def grow(array):
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            return grown
+
+        self._keys = grow(self._keys)
+        self._live = grow(self._live)
+        self._data = {name: grow(array) for name, array in self._data.items()}
+
+    def _changed(self):
+        self._view = None
+        self.version += 1
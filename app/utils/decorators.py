@@ -1,8 +1,10 @@
 """
 自定义装饰器
 """
+import hashlib
+from datetime import datetime, timedelta
 from functools import wraps
-from flask import request
+from flask import request, current_app, make_response
 from flask_jwt_extended import verify_jwt_in_request, get_jwt
 from app.utils.exceptions import PermissionException, AuthException
 from app.utils.response import error_response
@@ -79,6 +81,87 @@ def validate_request(schema_class):
     return decorator
 
 
+def _row_version(row, kwargs, versions):
+    """
+    详情接口中主表的版本：用该行的 updated_at 代替整张表的版本，表中其他行的写入不改变 ETag。
+    updated_at 只精确到秒，该行在表的最近一次写入的同一秒内被修改过时，再带上表版本号，
+    同一秒内的多次修改仍会改变 ETag
+    :param row: (模型, 路由中主键参数名)
+    :param kwargs: 视图参数
+    :param versions: table_versions 的结果，主表的项会被替换
+    """
+    from app.extensions import db
+    
+    model, arg = row
+    name = model.__tablename__
+    pk = model.__mapper__.primary_key[0]
+    updated_at = db.session.query(model.updated_at).filter(pk == kwargs.get(arg)).scalar()
+    table_updated_at, version = versions.get(name, (None, 0))
+    if updated_at is not None and table_updated_at is not None and \
+            updated_at >= table_updated_at.replace(microsecond=0) - timedelta(seconds=1):
+        versions[name] = (updated_at, version)
+    else:
+        versions[name] = (updated_at, None)
+
+
+def conditional_get(*tables, row=None):
+    """
+    条件GET装饰器（放在 jwt_required 之后）
+    按接口依赖的表的版本（table_version 中的持久化版本号，见 table_versions）、请求路径、
+    查询参数和当前用户生成 ETag，各进程对相同数据生成相同的 ETag；
+    请求带 If-None-Match（或 If-Modified-Since）且未变化时直接返回304，只读取版本行，不查询业务表
+    :param tables: 响应内容依赖的表名（含关联字段、数据权限涉及的表）
+    :param row: 详情接口的 (模型, 路由中主键参数名)，主表按该行的 updated_at 判断是否变化（见 _row_version）
+    """
+    if row is not None and row[0].__tablename__ not in tables:
+        tables = (row[0].__tablename__,) + tables
+    
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('CONDITIONAL_GET', True):
+                return f(*args, **kwargs)
+            
+            from app.dao.base_dao import table_versions
+            versions = table_versions(tables)
+            if row is not None:
+                _row_version(row, kwargs, versions)
+            claims = get_jwt()
+            signature = repr((
+                request.path,
+                sorted(request.args.items(multi=True)),
+                claims.get('username'),
+                claims.get('role'),
+                sorted(versions.items())
+            ))
+            etag = hashlib.sha1(signature.encode('utf-8')).hexdigest()
+            modified = [v[0] for v in versions.values() if isinstance(v[0], datetime)]
+            last_modified = max(modified) if modified else None
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = (since is not None and last_modified is not None
+                                and last_modified.replace(microsecond=0) <= since.replace(tzinfo=None))
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        
+        return wrapper
+    
+    return decorator
+
+
 def get_current_user_info():
     """
     获取当前登录用户信息
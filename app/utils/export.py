@@ -0,0 +1,78 @@
+"""
+流式导出工具
+将逐行产出的字典以 CSV 或 NDJSON 格式分块写入响应，不在内存中拼接整个文件
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from urllib.parse import quote
+from flask import Response, stream_with_context
+from app.utils.exceptions import ValidationException
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# 每累计多少行向客户端输出一次
+_FLUSH_ROWS = 200
+
+
+def model_columns(model, extra=()):
+    """
+    导出列：模型表字段 + 关联字段
+    :param model: 模型类
+    :param extra: 额外的关联字段名（to_dict(include_relations=True) 中的键）
+    :return: 列名列表
+    """
+    return [column.name for column in model.__table__.columns] + list(extra)
+
+
+def export_response(rows, columns, filename, fmt='csv'):
+    """
+    生成流式导出响应
+    :param rows: 行字典生成器
+    :param columns: 导出列（CSV表头）
+    :param filename: 下载文件名（不含扩展名）
+    :param fmt: csv（带BOM，Excel可直接打开）或 ndjson（每行一个JSON对象）
+    :return: Flask流式响应
+    :raises ValidationException: 格式不支持
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValidationException(f'导出格式只能是：{", ".join(EXPORT_FORMATS)}')
+    
+    if fmt == 'csv':
+        body, content_type = _iter_csv(rows, columns), 'text/csv; charset=utf-8'
+    else:
+        body, content_type = _iter_ndjson(rows), 'application/x-ndjson; charset=utf-8'
+    
+    name = f'{filename}_{datetime.now().strftime("%Y%m%d%H%M%S")}.{fmt}'
+    response = Response(stream_with_context(body), content_type=content_type)
+    response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(name)}"
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _iter_csv(rows, columns):
+    """逐块生成CSV文本"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    buffer.write('\ufeff')
+    writer.writeheader()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % _FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _iter_ndjson(rows):
+    """逐块生成NDJSON文本"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=str))
+        if len(lines) >= _FLUSH_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
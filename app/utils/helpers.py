@@ -74,3 +74,97 @@ def get_pagination_params(default_page=1, default_per_page=20, max_per_page=100)
     
     return page, per_page
 
+
+def get_cursor_param():
+    """
+    从请求中获取分页游标
+    - 未传cursor：使用页码分页，返回None
+    - cursor为空字符串：游标分页的第一页
+    - 其他：上一页返回的next_cursor
+    :return: 游标字符串或None
+    """
+    from flask import request
+    
+    return request.args.get('cursor')
+
+
+def get_batch_body():
+    """
+    获取批量接口的请求体
+    - {"items": [...], ...}：原样返回
+    - [...]：视为 {"items": [...]}
+    :return: 请求体字典
+    :raises ValidationException: 请求体不是对象或数组
+    """
+    from flask import request
+    from app.utils.exceptions import ValidationException
+    
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if isinstance(data, list):
+        return {'items': data}
+    if not isinstance(data, dict):
+        raise ValidationException('请求体必须是 {items: [...]}')
+    return data
+
+
+def run_batch(items, schema, write):
+    """
+    批量接口的通用处理：逐行校验，校验通过的行交给 write 一次性写入，合并逐行结果
+    :param items: 请求中的数据列表
+    :param schema: 单行数据的Marshmallow Schema实例
+    :param write: 写入函数，接收校验后的行列表，返回DAO批量写入的逐行结果
+    :return: 按输入顺序排列的逐行结果，校验失败的行 status 为 invalid
+    :raises ValidationException: items不是列表或超过 BULK_MAX_ITEMS
+    """
+    from flask import current_app
+    from marshmallow import ValidationError
+    from app.utils.exceptions import ValidationException
+    
+    if not isinstance(items, list) or not items:
+        raise ValidationException('items必须是非空列表')
+    max_items = current_app.config.get('BULK_MAX_ITEMS', 5000)
+    if len(items) > max_items:
+        raise ValidationException(f'单次最多处理{max_items}条数据')
+    
+    rows, positions, results = [], [], []
+    for index, item in enumerate(items):
+        try:
+            rows.append(schema.load(item))
+            positions.append(index)
+        except ValidationError as e:
+            results.append({'index': index, 'status': 'invalid', 'id': None, 'errors': e.messages})
+    
+    if rows:
+        for outcome in write(rows):
+            outcome['index'] = positions[outcome['index']]
+            results.append(outcome)
+    
+    results.sort(key=lambda r: r['index'])
+    return results
+
+
+def get_count_policy():
+    """
+    从请求中获取分页总数统计策略（count参数）
+    - exact：精确统计（页码分页的默认值，可通过 DEFAULT_COUNT_POLICY 配置）
+    - cached：缓存统计结果，写操作后失效
+    - estimated：按表统计信息估算
+    - none：不统计总数，只返回是否有下一页（游标分页的默认值，深分页不执行 COUNT）
+    :return: 统计策略
+    :raises ValidationException: 参数不合法
+    """
+    from flask import request, current_app
+    from app.utils.pagination import COUNT_POLICIES
+    from app.utils.exceptions import ValidationException
+    
+    policy = request.args.get('count')
+    if not policy:
+        if request.args.get('cursor') is not None:
+            return 'none'
+        policy = current_app.config.get('DEFAULT_COUNT_POLICY', 'exact')
+    if policy not in COUNT_POLICIES:
+        raise ValidationException(f'count参数只能是：{", ".join(COUNT_POLICIES)}')
+    return policy
+
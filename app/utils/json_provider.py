@@ -0,0 +1,100 @@
+"""
+JSON编解码
+安装了 orjson 时使用 orjson，否则退回标准库 json。统一处理：
+- Decimal -> float
+- date -> 'YYYY-MM-DD'
+- datetime -> 'YYYY-MM-DD HH:MM:SS'
+输出紧凑、不转义中文。请求体解析（request.get_json）同样经过这里。
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于部署环境
+    orjson = None
+
+JSON_BACKENDS = ('auto', 'orjson', 'stdlib')
+
+
+_CONVERTERS = {
+    datetime: lambda value: value.isoformat(' ', 'seconds'),
+    date: date.isoformat,
+    Decimal: float
+}
+
+
+def _default(value):
+    """标准库/orjson 无法直接序列化的类型"""
+    converter = _CONVERTERS.get(type(value))
+    if converter is not None:
+        return converter(value)
+    if isinstance(value, datetime):
+        return value.isoformat(' ', 'seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON Provider
+    通过 JSON_BACKEND 配置选择实现：auto（有orjson时使用orjson）、orjson、stdlib
+    """
+
+    mimetype = 'application/json'
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        if backend not in JSON_BACKENDS:
+            raise ValueError(f'JSON_BACKEND只能是：{", ".join(JSON_BACKENDS)}')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND=orjson 需要安装orjson')
+        self.use_orjson = orjson is not None and backend != 'stdlib'
+        self.backend = 'orjson' if self.use_orjson else 'stdlib'
+
+    def dumps_bytes(self, obj, indent=False):
+        """
+        序列化为UTF-8字节串
+        :param obj: 数据
+        :param indent: 是否缩进（调试模式下便于阅读）
+        """
+        if self.use_orjson:
+            # date/datetime 交给 _default 按项目统一格式输出（orjson 默认输出 ISO 8601）
+            option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_default, option=option)
+        return json.dumps(
+            obj, default=_default, ensure_ascii=False,
+            indent=2 if indent else None,
+            separators=None if indent else (',', ':')
+        ).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        """序列化为字符串"""
+        if kwargs or not self.use_orjson:
+            kwargs.setdefault('default', _default)
+            kwargs.setdefault('ensure_ascii', False)
+            kwargs.setdefault('separators', (',', ':'))
+            return json.dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """反序列化（字符串或UTF-8字节串）"""
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """生成JSON响应，直接写入字节串，避免再做一次字符串编码"""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.dumps_bytes(obj, indent=self._app.debug)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
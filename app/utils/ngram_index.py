@@ -0,0 +1,172 @@
+"""
+字符 n-gram 倒排索引
+用于替代 LIKE '%关键字%' 的全表扫描：按单字和二元组（bigram）建立倒排表，
+查询时对倒排表求交集得到候选，再在内存中校验子串并按匹配质量排序。
+二元组切分不依赖分词，适合中文书名。
+"""
+import threading
+from app.utils.cache import TTLCache
+
+
+def normalize_text(text):
+    """统一大小写，便于不区分大小写匹配（如 ISBN 前缀）"""
+    return (text or '').casefold()
+
+
+def ngrams(text):
+    """
+    生成文本的单字和二元组
+    :param text: 已规范化的文本
+    :return: gram集合
+    """
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class NgramIndex:
+    """
+    内存倒排索引
+    - 文档由若干文本字段和若干属性（用于过滤）组成
+    - 字段权重决定同等匹配质量下的排序先后
+    """
+
+    # 匹配质量：整字段相等 > 前缀匹配 > 包含
+    EXACT, PREFIX, CONTAINS = 3, 2, 1
+
+    def __init__(self, field_weights, result_cache_ids=200000, result_cache_ttl=60):
+        """
+        :param field_weights: 字段名 -> 权重，如 {'textbook_name': 3, 'isbn': 2, 'author': 1}
+        :param result_cache_ids: 检索结果缓存中结果条数之和的上限（超过时淘汰最久未用的结果）
+        :param result_cache_ttl: 检索结果缓存的过期秒数
+        """
+        self.field_weights = dict(field_weights)
+        self._postings = {}  # gram -> set(doc_id)
+        self._docs = {}  # doc_id -> (texts, attrs)
+        self._lock = threading.RLock()
+        # 检索结果缓存（翻页时同一关键字重复检索），键中带索引版本号，索引变化后自然失效；
+        # 按结果条数计算容量（空结果计1），宽泛关键字的长列表不会占满内存
+        self._results = TTLCache(maxsize=result_cache_ids, ttl=result_cache_ttl,
+                                 weigh=lambda results: len(results) + 1)
+        self._version = 0
+        self.ready = False
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, fields, attrs=None):
+        """
+        添加或替换文档
+        :param doc_id: 文档ID（教材ID）
+        :param fields: 字段名 -> 文本
+        :param attrs: 过滤属性，如 {'publisher_id': 1, 'type_id': 2}
+        """
+        texts = {name: normalize_text(fields.get(name)) for name in self.field_weights}
+        grams = set()
+        for text in texts.values():
+            grams |= ngrams(text)
+        with self._lock:
+            self._remove(doc_id)
+            self._version += 1
+            self._docs[doc_id] = (texts, dict(attrs or {}))
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id):
+        """删除文档"""
+        with self._lock:
+            self._remove(doc_id)
+            self._version += 1
+
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._results.clear()
+            self._version += 1
+            self.ready = False
+
+    def search(self, keyword, filters=None):
+        """
+        检索
+        :param keyword: 关键字
+        :param filters: 属性过滤条件，如 {'publisher_id': 1}，值为None的条件忽略
+        :return: [(score, doc_id), ...]，按得分降序、ID升序排列
+        """
+        query = normalize_text(keyword).strip()
+        if not query:
+            return []
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        cache_key = (query, tuple(sorted(filters.items())), self._version)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+        results = self._search(query, filters)
+        self._results.set(cache_key, results)
+        return results
+
+    def _search(self, query, filters):
+        """执行检索（不经过结果缓存）"""
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+
+        with self._lock:
+            postings = []
+            for gram in set(grams):
+                posting = self._postings.get(gram)
+                if not posting:
+                    return []
+                postings.append(posting)
+            # 从最短的倒排表开始求交集
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return []
+            docs = [(doc_id, self._docs[doc_id]) for doc_id in candidates]
+
+        results = []
+        for doc_id, (texts, attrs) in docs:
+            if any(attrs.get(k) != v for k, v in filters.items()):
+                continue
+            score = self._score(query, texts)
+            if score:
+                results.append((score, doc_id))
+        results.sort(key=lambda r: (-r[0], r[1]))
+        return results
+
+    def _score(self, query, texts):
+        """
+        计算匹配得分，0 表示不匹配（二元组交集可能有误报，这里做子串校验）
+        得分 = 匹配质量 * 10000 + 字段权重 * 1000 + 覆盖率（关键字长度/字段长度，0~999）
+        """
+        best = 0
+        for name, text in texts.items():
+            position = text.find(query)
+            if position < 0:
+                continue
+            if text == query:
+                quality = self.EXACT
+            elif position == 0:
+                quality = self.PREFIX
+            else:
+                quality = self.CONTAINS
+            coverage = min(999, 999 * len(query) // len(text))
+            best = max(best, quality * 10000 + self.field_weights[name] * 1000 + coverage)
+        return best
+
+    def _remove(self, doc_id):
+        """删除文档（调用方需持有锁）"""
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        grams = set()
+        for text in doc[0].values():
+            grams |= ngrams(text)
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[gram]
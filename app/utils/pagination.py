@@ -0,0 +1,93 @@
+"""
+分页工具：分页结果与游标（keyset）编解码
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from app.utils.exceptions import ValidationException
+
+# 分页总数统计策略：精确、缓存、估算、不统计
+COUNT_POLICIES = ('exact', 'cached', 'estimated', 'none')
+
+
+class Page:
+    """
+    分页查询结果
+    可以按 (items, total) 解包，兼容原有的 ``items, total = dao.search(...)`` 写法
+    """
+
+    def __init__(self, items, total, next_cursor=None, has_next=None, count_policy='exact'):
+        self.items = items
+        self.total = total
+        self.next_cursor = next_cursor
+        self.has_next = has_next
+        self.count_policy = count_policy
+
+    def __iter__(self):
+        return iter((self.items, self.total))
+
+    def with_items(self, items):
+        """
+        替换数据列表（如转换为字典后），保留分页信息
+        :param items: 新的数据列表
+        :return: 新的Page对象
+        """
+        return Page(items, self.total, next_cursor=self.next_cursor, has_next=self.has_next,
+                    count_policy=self.count_policy)
+
+
+def _dump_value(value):
+    """将游标中的排序键值转换为可JSON序列化的值"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _load_value(value, column):
+    """按列类型（或直接给出的Python类型）还原游标中的排序键值"""
+    if value is None:
+        return None
+    try:
+        python_type = column if isinstance(column, type) else column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    if python_type is int:
+        return int(value)
+    return value
+
+
+def encode_cursor(values):
+    """
+    生成不透明的分页游标
+    :param values: 排序键值列表（最后一个为主键）
+    :return: 游标字符串
+    """
+    raw = json.dumps([_dump_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """
+    解析分页游标
+    :param cursor: 游标字符串
+    :param columns: 排序列或Python类型列表（与生成游标时一致）
+    :return: 排序键值列表
+    :raises ValidationException: 游标无效
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError('cursor length mismatch')
+        return [_load_value(v, c) for v, c in zip(values, columns)]
+    except (ValueError, TypeError, UnicodeError):
+        raise ValidationException('无效的分页游标')
@@ -0,0 +1,65 @@
+"""
+SQL语句计数工具
+用于测试和调试中确认一次请求/一次列表查询执行了多少条SQL语句
+"""
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """
+    SQL语句计数器（上下文管理器）
+
+    用法：
+        with QueryCounter() as counter:
+            service.get_textbook_list(per_page=100)
+        assert counter.count <= 3
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        """执行的语句数量"""
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        if self.engine is None:
+            from app.extensions import db
+            self.engine = db.engine
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+        return False
+
+
+def _count_request_query(conn, cursor, statement, parameters, context, executemany):
+    """累计当前请求执行的SQL语句数量"""
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def init_query_counter(app):
+    """
+    开启 QUERY_COUNT_HEADER 配置时，在响应头 X-Query-Count 中返回本次请求执行的SQL语句数量
+    :param app: Flask应用实例
+    """
+    if not app.config.get('QUERY_COUNT_HEADER'):
+        return
+
+    if not event.contains(Engine, 'before_cursor_execute', _count_request_query):
+        event.listen(Engine, 'before_cursor_execute', _count_request_query)
+
+    @app.after_request
+    def add_query_count_header(response):
+        response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+        return response
@@ -22,6 +22,23 @@ def success_response(data=None, message='success', code=200):
     return jsonify(response), code
 
 
+def bulk_response(results, message='批量处理完成'):
+    """
+    批量接口响应
+    :param results: 逐行结果列表（见 BaseDAO._bulk_outcome）
+    :param message: 响应消息
+    :return: JSON响应，data中包含按状态汇总的数量和逐行结果
+    """
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return success_response(data={
+        'total': len(results),
+        'summary': summary,
+        'results': results
+    }, message=message)
+
+
 def error_response(message='error', code=400, errors=None):
     """
     错误响应
@@ -40,18 +57,25 @@ def error_response(message='error', code=400, errors=None):
     return jsonify(response), code
 
 
-def paginated_response(items, total, page, per_page, message='success'):
+def paginated_response(items, total, page, per_page, message='success',
+                       next_cursor=None, has_next=None, count_policy='exact'):
     """
     分页响应
     :param items: 数据列表
-    :param total: 总数
+    :param total: 总数（count_policy为none时为None）
     :param page: 当前页码
     :param per_page: 每页数量
     :param message: 响应消息
+    :param next_cursor: 下一页游标（游标分页时返回）
+    :param has_next: 是否有下一页（游标分页或不统计总数时由查询结果给出）
+    :param count_policy: 总数统计策略，estimated表示total为估算值
     :return: JSON响应
     """
     import math
-    pages = math.ceil(total / per_page) if per_page > 0 else 0
+    if total is None:
+        pages = None
+    else:
+        pages = math.ceil(total / per_page) if per_page > 0 else 0
     
     data = {
         'items': items,
@@ -61,8 +85,26 @@ def paginated_response(items, total, page, per_page, message='success'):
             'per_page': per_page,
             'pages': pages,
             'has_prev': page > 1,
-            'has_next': page < pages
+            'has_next': page < pages if has_next is None else has_next,
+            'next_cursor': next_cursor,
+            'count_policy': count_policy
         }
     }
     return success_response(data=data, message=message)
 
+
+def page_response(page_result, page, per_page, message='success'):
+    """
+    将DAO/服务层返回的Page对象转换为分页响应
+    :param page_result: Page对象
+    :param page: 当前页码
+    :param per_page: 每页数量
+    :param message: 响应消息
+    :return: JSON响应
+    """
+    return paginated_response(
+        page_result.items, page_result.total, page, per_page, message=message,
+        next_cursor=page_result.next_cursor, has_next=page_result.has_next,
+        count_policy=page_result.count_policy
+    )
+
@@ -0,0 +1,97 @@
+"""
+模型序列化器
+按模型和字段集合生成一次转换函数并缓存，之后每行只做一次取值和类型转换：
+- DateTime -> 'YYYY-MM-DD HH:MM:SS'
+- Date -> 'YYYY-MM-DD'
+- Numeric -> float
+日期使用 isoformat 输出（结果与 strftime 相同，速度快约3倍）。
+ORM实例优先直接读取已加载的属性字典（绕过属性描述符），Core 查询结果行按位置解包。
+"""
+import threading
+from operator import attrgetter
+from sqlalchemy import Date, DateTime, Numeric
+
+_serializers = {}
+_lock = threading.Lock()
+
+
+def _convert_expression(column, var):
+    """生成单个字段的转换表达式（源码片段）"""
+    column_type = column.type
+    if isinstance(column_type, DateTime):
+        return f'({var}.isoformat(" ", "seconds") if {var} is not None else None)'
+    if isinstance(column_type, Date):
+        return f'({var}.isoformat() if {var} is not None else None)'
+    if isinstance(column_type, Numeric) and column_type.asdecimal:
+        return f'(float({var}) if {var} is not None else None)'
+    return var
+
+
+def compile_serializer(model, exclude=(), extra=(), positional=False, convert=True):
+    """
+    获取模型的序列化函数（按 模型 + 排除字段 + 额外字段 + 取值方式 缓存）
+    :param model: 模型类
+    :param exclude: 不输出的字段
+    :param extra: 额外输出的属性名（原样输出，如 Core 查询中关联表的列标签）
+    :param positional: 为True时按位置解包 Core 结果行，行中的列顺序必须为 模型字段（按表定义顺序） + extra
+    :param convert: 是否转换日期和金额；直接作为JSON响应输出时可关闭，由JSON编码器转换
+    :return: 函数 obj_or_row -> dict
+    """
+    key = (model, tuple(exclude), tuple(extra), positional, convert)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        with _lock:
+            serializer = _serializers.get(key)
+            if serializer is None:
+                serializer = _build(model, exclude, extra, positional, convert)
+                _serializers[key] = serializer
+    return serializer
+
+
+def _build(model, exclude, extra, positional, convert):
+    """生成序列化函数"""
+    columns = [c for c in model.__table__.columns if c.name not in exclude]
+    names = [c.name for c in columns] + list(extra)
+    variables = [f'v{i}' for i in range(len(names))]
+    if convert:
+        expressions = [_convert_expression(c, v) for c, v in zip(columns, variables)]
+        expressions += variables[len(columns):]
+    else:
+        expressions = variables
+    targets = ', '.join(variables) + ','
+
+    if positional:
+        lines = [f'{targets} = obj']
+    else:
+        # 已加载的属性直接从实例字典读取；有未加载（过期/延迟加载）的属性时
+        # 退回 attrgetter，由属性描述符触发加载
+        loaded = ', '.join(f'd[{name!r}]' for name in names)
+        lines = [
+            'try:',
+            '    d = obj.__dict__',
+            f'    {targets} = {loaded},',
+            'except KeyError:',
+            f'    {targets} = _get(obj)' if len(names) > 1 else f'    {targets} = _get(obj),'
+        ]
+    body = ', '.join(f'{name!r}: {expr}' for name, expr in zip(names, expressions))
+    source = 'def serialize(obj):\n' + ''.join(f'    {line}\n' for line in lines) + f'    return {{{body}}}\n'
+
+    namespace = {'_get': attrgetter(*names)}
+    exec(compile(source, f'<serializer {model.__name__}>', 'exec'), namespace)
+    serializer = namespace['serialize']
+    serializer.__doc__ = f'{model.__name__} 序列化：{", ".join(names)}'
+    return serializer
+
+
+def serialize_rows(model, rows, extra=(), convert=True):
+    """
+    序列化 Core 查询结果（不构建ORM实例）
+    查询需按表定义顺序选出模型的全部字段，之后依次为额外字段
+    :param model: 模型类
+    :param rows: 结果行列表
+    :param extra: 额外字段名
+    :param convert: 是否转换日期和金额（见 compile_serializer）
+    :return: 字典列表
+    """
+    serializer = compile_serializer(model, extra=extra, positional=True, convert=convert)
+    return [serializer(row) for row in rows]
@@ -0,0 +1,184 @@
+"""
+库存预警集合
+在内存中维护库存不足/过多的教材，按 (warning_level, -gap_quantity) 排序后提供给预警列表，
+并把进入/离开预警的变化推送给订阅者（Server-Sent Events）。
+判定条件与视图 v_inventory_warning 一致。
+"""
+import itertools
+import queue
+import threading
+from collections import deque
+
+# 预警级别：数值越小越紧急
+LEVEL_SHORTAGE, LEVEL_OVERSTOCK = 1, 2
+WARNING_STATUS = {LEVEL_SHORTAGE: '库存不足', LEVEL_OVERSTOCK: '库存过多'}
+
+ENTRY_FIELDS = ('textbook_id', 'isbn', 'textbook_name', 'publisher_id', 'type_id',
+                'current_quantity', 'min_quantity', 'max_quantity')
+
+
+def classify(row):
+    """
+    判定一行库存的预警状态
+    :param row: 含 status（教材状态）、current_quantity、min_quantity、max_quantity 的行
+    :return: (warning_level, gap_quantity)，不在预警中时返回None
+    """
+    if row.status != 1:
+        return None
+    current = row.current_quantity or 0
+    if row.min_quantity is not None and current < row.min_quantity:
+        return LEVEL_SHORTAGE, row.min_quantity - current
+    if row.max_quantity is not None and current > row.max_quantity:
+        return LEVEL_OVERSTOCK, current - row.max_quantity
+    return None
+
+
+class Subscription:
+    """一个订阅者的事件队列；队列满（消费过慢）时标记为溢出，由订阅者重新获取全量"""
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """
+        取下一个事件
+        :raises queue.Empty: 超时
+        """
+        return self._queue.get(timeout=timeout)
+
+
+class WarningSet:
+    """
+    库存预警集合
+    - apply() 传入变化过的库存行，更新集合并生成 enter / leave / update 事件
+    - items() 返回排好序的预警列表（排序结果缓存到下一次变化）
+    - 最近的事件保留在环形缓冲中，断线重连时按 Last-Event-ID 补发
+    """
+
+    def __init__(self, history=1000, queue_size=1000):
+        self._entries = {}  # textbook_id -> 预警条目
+        self._sorted = None
+        self._events = deque(maxlen=history)
+        self._event_ids = itertools.count(1)
+        self._last_event_id = 0
+        self._subscribers = set()
+        self._queue_size = queue_size
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def last_event_id(self):
+        return self._last_event_id
+
+    def load(self, rows):
+        """
+        全量装载（不产生事件）
+        :param rows: 库存行
+        """
+        with self._lock:
+            self._entries = {}
+            for row in rows:
+                state = classify(row)
+                if state:
+                    self._entries[row.textbook_id] = self._entry(row, state)
+            self._sorted = None
+            self.ready = True
+
+    def apply(self, rows):
+        """
+        按变化过的库存行更新集合，并向订阅者推送变化
+        :param rows: 库存行（可包含未进入预警的行）
+        :return: 本次产生的事件列表
+        """
+        events = []
+        with self._lock:
+            for row in rows:
+                state = classify(row)
+                previous = self._entries.get(row.textbook_id)
+                if state is None:
+                    if previous is not None:
+                        del self._entries[row.textbook_id]
+                        events.append(self._event('leave', previous))
+                    continue
+                entry = self._entry(row, state)
+                if previous == entry:
+                    continue
+                self._entries[row.textbook_id] = entry
+                events.append(self._event('enter' if previous is None else 'update', entry))
+            if events:
+                self._sorted = None
+                subscribers = list(self._subscribers)
+        for event in events:
+            for subscription in subscribers:
+                subscription.put(event)
+        return events
+
+    def items(self):
+        """
+        预警列表，按预警级别升序、缺口/超量数量降序
+        :return: 条目列表（共享对象，调用方不要修改）
+        """
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(
+                    self._entries.values(),
+                    key=lambda e: (e['warning_level'], -e['gap_quantity'], e['textbook_id'])
+                )
+            return self._sorted
+
+    def subscribe(self):
+        """注册订阅者"""
+        subscription = Subscription(self._queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """注销订阅者"""
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def events_since(self, event_id):
+        """
+        取某个事件之后的事件（断线重连补发）
+        :param event_id: 客户端收到的最后一个事件ID
+        :return: 事件列表；缓冲中已没有该事件之后的全部事件时返回None（需重新获取全量）
+        """
+        with self._lock:
+            if event_id >= self._last_event_id:
+                return []
+            if not self._events or self._events[0]['id'] > event_id + 1:
+                return None
+            return [event for event in self._events if event['id'] > event_id]
+
+    def clear(self):
+        """清空集合"""
+        with self._lock:
+            self._entries = {}
+            self._sorted = None
+            self.ready = False
+
+    def _event(self, kind, entry):
+        """生成事件并写入缓冲（调用方需持有锁）"""
+        event = {'id': next(self._event_ids), 'event': kind, 'data': entry}
+        self._last_event_id = event['id']
+        self._events.append(event)
+        return event
+
+    @staticmethod
+    def _entry(row, state):
+        """由库存行生成预警条目"""
+        level, gap = state
+        entry = {field: getattr(row, field) for field in ENTRY_FIELDS}
+        entry.update(status=WARNING_STATUS[level], warning_level=level, gap_quantity=gap)
+        return entry
@@ -0,0 +1,94 @@
+"""
+JSON响应编码基准测试：标准库 + 逐字段预转换 vs FastJSONProvider（orjson / 标准库）直接编码原始值
+
+用法：
+    python benchmarks/bench_json.py
+
+分别统计 100 行和 10000 行教材列表响应体的编码耗时（含序列化为字典）。
+"""
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.models import Textbook
+from app.dao.textbook_dao import TextbookDAO
+from app.utils.json_provider import FastJSONProvider, orjson
+from app.utils.serializer import serialize_rows
+
+
+def make_rows(total):
+    """按 TextbookDAO._as_rows 的列顺序构造结果行"""
+    now = datetime(2024, 3, 1, 8, 30, 0)
+    return [(
+        i, f'ISBN{i:010d}', f'数据库系统概论（第{i % 8 + 1}版）', '王珊', 1, 1, '第5版',
+        date(2020, 1, 1), Decimal('45.50'), '数据库原理教材', 1, now, now, 100 + i % 50
+    ) for i in range(total)]
+
+
+def timed(fn, repeat=5):
+    """返回多次执行的最短耗时（毫秒）"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def envelope(items):
+    """与 paginated_response 相同的响应结构"""
+    return {'code': 200, 'message': '查询成功', 'data': {
+        'items': items, 'total': len(items), 'page': 1, 'per_page': len(items), 'pages': 1
+    }}
+
+
+def main():
+    app = create_app('testing')
+    extra = TextbookDAO.ROW_EXTRA_COLUMNS
+    backends = ['stdlib'] + (['orjson'] if orjson is not None else [])
+    providers = {}
+    for backend in backends:
+        app.config['JSON_BACKEND'] = backend
+        providers[backend] = FastJSONProvider(app)
+
+    names = [c.name for c in Textbook.__table__.columns] + list(extra)
+
+    def legacy(rows):
+        # 旧实现：序列化时逐字段 strftime/float 转换，再由标准库 json（jsonify 默认参数）编码
+        items = []
+        for row in rows:
+            item = dict(zip(names, row))
+            for key in ('created_at', 'updated_at'):
+                item[key] = item[key].strftime('%Y-%m-%d %H:%M:%S')
+            item['publication_date'] = item['publication_date'].strftime('%Y-%m-%d')
+            item['price'] = float(item['price'])
+            items.append(item)
+        return json.dumps(envelope(items), ensure_ascii=False, sort_keys=True).encode('utf-8')
+
+    def fast(provider, rows):
+        items = serialize_rows(Textbook, rows, extra=extra, convert=False)
+        return provider.dumps_bytes(envelope(items))
+
+    sample = make_rows(3)
+    expected = json.loads(legacy(sample))
+    for backend, provider in providers.items():
+        assert json.loads(fast(provider, sample)) == expected, backend
+
+    for total in (100, 10000):
+        rows = make_rows(total)
+        repeat = 50 if total <= 100 else 5
+        print(f'行数：{total}（响应体 {len(legacy(rows)) / 1024:.1f} KB）')
+        print(f'  标准库 + 预转换    {timed(lambda: legacy(rows), repeat):10.3f} ms')
+        for backend, provider in providers.items():
+            print(f'  {backend:<8} 原始值     {timed(lambda: fast(provider, rows), repeat):10.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
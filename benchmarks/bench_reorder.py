@@ -0,0 +1,120 @@
+"""
+补货建议基准测试：逐教材 Python 循环 vs ReorderEngine 向量化计算
+
+用法：
+    python benchmarks/bench_reorder.py [教材数]
+
+生成合成的订购需求（平均每本教材20条）和入库记录，分别统计：
+- 查询结果行转换为数组（columns）的耗时
+- 向量化计算的耗时
+- 等价的逐行 Python 实现的耗时，并核对两者结果一致
+"""
+import math
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.columnar import columns
+from app.utils.reorder import ReorderEngine
+
+WINDOW_DAYS = 180
+
+
+def make_data(textbooks, rng):
+    """生成合成数据（行元组形式，与DAO查询结果相同）"""
+    publishers = max(textbooks // 200, 1)
+    start = date.today() - timedelta(days=WINDOW_DAYS - 1)
+    textbook_rows = [(tid, int(rng.integers(1, publishers + 1))) for tid in range(1, textbooks + 1)]
+    demand_count = textbooks * 20
+    demand_rows = list(zip(
+        rng.integers(1, textbooks + 1, demand_count).tolist(),
+        [start + timedelta(days=d) for d in rng.integers(0, WINDOW_DAYS, demand_count).tolist()],
+        rng.integers(1, 50, demand_count).tolist()
+    ))
+    receipt_count = textbooks * 2
+    order_dates = [start + timedelta(days=d) for d in rng.integers(0, WINDOW_DAYS - 30, receipt_count).tolist()]
+    receipt_rows = list(zip(
+        rng.integers(1, publishers + 1, receipt_count).tolist(),
+        order_dates,
+        [d + timedelta(days=lead) for d, lead in zip(order_dates, rng.integers(3, 30, receipt_count).tolist())],
+        rng.integers(1, 200, receipt_count).tolist()
+    ))
+    return start, textbook_rows, demand_rows, receipt_rows
+
+
+def vectorized(engine, start, textbook_rows, demand_rows, receipt_rows):
+    """行 → 数组 → 向量化计算"""
+    origin = np.datetime64(start, 'D')
+    textbook_ids, publisher_ids = columns(textbook_rows, np.int64, np.int64)
+    demand_ids, demand_dates, quantities = columns(demand_rows, np.int64, 'datetime64[D]', np.int64)
+    publishers, order_dates, receipt_dates, receipt_quantities = columns(
+        receipt_rows, np.int64, 'datetime64[D]', 'datetime64[D]', np.int64
+    )
+    converted = time.perf_counter()
+    result = engine.compute(
+        textbook_ids, publisher_ids,
+        (demand_ids, (demand_dates - origin).astype(np.int64), quantities),
+        (publishers, (receipt_dates - order_dates).astype(np.int64), receipt_quantities)
+    )
+    return converted, result
+
+
+def python_loop(engine, start, textbook_rows, demand_rows, receipt_rows):
+    """等价的逐行实现"""
+    daily = {}
+    for tid, day, qty in demand_rows:
+        key = (tid, (day - start).days)
+        daily[key] = daily.get(key, 0) + qty
+    totals, squares = {}, {}
+    for (tid, _), qty in daily.items():
+        totals[tid] = totals.get(tid, 0) + qty
+        squares[tid] = squares.get(tid, 0) + qty * qty
+
+    lead_sum, lead_weight = {}, {}
+    for pid, ordered, received, qty in receipt_rows:
+        lead_sum[pid] = lead_sum.get(pid, 0) + (received - ordered).days * qty
+        lead_weight[pid] = lead_weight.get(pid, 0) + qty
+    overall = sum(lead_sum.values()) / sum(lead_weight.values())
+
+    points = []
+    for tid, pid in textbook_rows:
+        velocity = totals.get(tid, 0) / engine.window_days
+        variance = max(squares.get(tid, 0) / engine.window_days - velocity * velocity, 0)
+        lead = max(lead_sum[pid] / lead_weight[pid] if pid in lead_weight else overall, 1.0)
+        points.append(math.ceil(velocity * lead + engine.service_z * math.sqrt(variance) * math.sqrt(lead)))
+    return points
+
+
+def main():
+    textbooks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = np.random.default_rng(42)
+    start, textbook_rows, demand_rows, receipt_rows = make_data(textbooks, rng)
+    engine = ReorderEngine(window_days=WINDOW_DAYS)
+
+    started = time.perf_counter()
+    converted, result = vectorized(engine, start, textbook_rows, demand_rows, receipt_rows)
+    finished = time.perf_counter()
+    convert_ms, compute_ms = (converted - started) * 1000, (finished - converted) * 1000
+
+    started = time.perf_counter()
+    expected = python_loop(engine, start, textbook_rows, demand_rows, receipt_rows)
+    loop_ms = (time.perf_counter() - started) * 1000
+
+    # 浮点求和顺序不同，允许个别教材在取整边界上相差1
+    diff = np.abs(result['reorder_point'] - np.array(expected))
+    assert diff.max() <= 1 and (diff > 0).mean() < 0.001, diff.max()
+
+    print(f'教材 {textbooks} 本，订购需求 {len(demand_rows)} 条，入库 {len(receipt_rows)} 条')
+    print(f'{"方式":<16}{"耗时(ms)":>12}')
+    print(f'{"行转数组":<16}{convert_ms:>12.1f}')
+    print(f'{"向量化计算":<16}{compute_ms:>12.1f}')
+    print(f'{"逐行Python":<16}{loop_ms:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
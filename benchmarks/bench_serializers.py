@@ -0,0 +1,99 @@
+"""
+模型序列化基准测试：逐字段反射的旧版 to_dict vs 生成的序列化函数 vs Core 行序列化
+
+用法：
+    python benchmarks/bench_serializers.py [行数]
+
+使用内存SQLite生成教材数据，分别统计序列化（以及查询+序列化）的耗时。
+"""
+import os
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+from app.models import Publisher, TextbookType, Textbook
+from app.dao.textbook_dao import TextbookDAO
+from app.utils.serializer import compile_serializer, serialize_rows
+
+
+def legacy_to_dict(textbook):
+    """旧实现：BaseModel.to_dict 逐列反射 + Textbook.to_dict 二次转换"""
+    data = {}
+    for column in textbook.__table__.columns:
+        value = getattr(textbook, column.name)
+        if isinstance(value, datetime):
+            value = value.strftime('%Y-%m-%d %H:%M:%S')
+        data[column.name] = value
+    if textbook.price:
+        data['price'] = float(textbook.price)
+    if textbook.publication_date:
+        data['publication_date'] = textbook.publication_date.strftime('%Y-%m-%d')
+    return data
+
+
+def seed(total):
+    """生成合成数据"""
+    db.session.add(Publisher(publisher_name='出版社'))
+    db.session.add(TextbookType(type_name='类型', type_code='T'))
+    db.session.flush()
+    db.session.execute(db.insert(Textbook), [{
+        'isbn': f'ISBN{i:010d}',
+        'textbook_name': f'数据库系统概论（第{i % 8 + 1}版）',
+        'author': '王珊',
+        'publisher_id': 1,
+        'type_id': 1,
+        'price': Decimal('45.50'),
+        'publication_date': date(2020, 1, 1),
+        'status': 1
+    } for i in range(total)])
+    db.session.commit()
+
+
+def timed(fn, repeat=5):
+    """返回多次执行的最短耗时（毫秒）"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed(total)
+        textbooks = Textbook.query.all()
+        compiled = compile_serializer(Textbook)
+        assert [legacy_to_dict(t) for t in textbooks[:100]] == [compiled(t) for t in textbooks[:100]]
+
+        print(f'行数：{total}')
+        print('仅序列化（ORM实例已加载）')
+        print(f'  旧版 to_dict       {timed(lambda: [legacy_to_dict(t) for t in textbooks]):10.2f} ms')
+        print(f'  生成的序列化函数   {timed(lambda: [compiled(t) for t in textbooks]):10.2f} ms')
+
+        dao = TextbookDAO()
+        row_query = dao._as_rows(Textbook.query)
+
+        def orm_path():
+            db.session.expunge_all()
+            return [t.to_dict(include_relations=True) for t in dao._with_relations(Textbook.query).all()]
+
+        def row_path():
+            return serialize_rows(Textbook, row_query.all(), extra=TextbookDAO.ROW_EXTRA_COLUMNS)
+
+        print('查询 + 序列化（含出版社、类型、库存）')
+        print(f'  ORM实例 + to_dict  {timed(orm_path, repeat=3):10.2f} ms')
+        print(f'  Core行 + 序列化    {timed(row_path, repeat=3):10.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+统计基准测试：数据库分组查询 vs 内存列式统计快照
+
+用法：
+    python benchmarks/bench_statistics_snapshot.py [教材数量]
+
+使用内存SQLite生成合成数据（平均每本教材10条订单），按类型、按出版社、按教材统计分别对比：
+- 数据库：sp_rebuild_statistics / sp_statistics_by_textbook 中的关联分组查询（SQLite 不支持存储过程，直接执行查询体）
+- 快照：StatisticsService 在统计快照上的向量化分组汇总
+快照方式另外给出首次全量装载、修改一条订单后增量同步并重新汇总的耗时，并核对两种方式结果一致。
+"""
+import os
+import random
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, update
+from app import create_app
+from app.extensions import db
+from app.models import Publisher, TextbookType, Textbook, PurchaseOrder, Inventory
+from app.dao.analytics_dao import AnalyticsDAO
+from app.dao.base_dao import invalidate_tables
+from app.services.statistics_service import StatisticsService
+
+STATUSES = ['待审核', '已审核', '已订购', '部分到货', '已到货', '已发放', '已取消']
+
+# sp_rebuild_statistics 中按教材汇总的查询体，外层按类型或出版社分组
+GROUP_SQL = """
+    SELECT g.{key}, COUNT(s.textbook_id), COALESCE(SUM(s.order_quantity), 0),
+           COALESCE(SUM(s.arrived_quantity), 0), COALESCE(SUM(s.issued_quantity), 0),
+           COALESCE(SUM(s.current_quantity), 0)
+    FROM {table} g
+    LEFT JOIN (
+        SELECT t.textbook_id, t.{key},
+               COALESCE(o.order_quantity, 0) AS order_quantity,
+               COALESCE(o.arrived_quantity, 0) AS arrived_quantity,
+               COALESCE(o.issued_quantity, 0) AS issued_quantity,
+               COALESCE(i.current_quantity, 0) AS current_quantity
+        FROM textbook t
+        LEFT JOIN (
+            SELECT textbook_id, SUM(order_quantity) AS order_quantity,
+                   SUM(arrived_quantity) AS arrived_quantity,
+                   SUM(CASE WHEN order_status = '已发放' THEN arrived_quantity ELSE 0 END) AS issued_quantity
+            FROM purchase_order
+            GROUP BY textbook_id
+        ) o ON o.textbook_id = t.textbook_id
+        LEFT JOIN inventory i ON i.textbook_id = t.textbook_id
+        WHERE t.status = 1
+    ) s ON s.{key} = g.{key}
+    WHERE g.status = 1
+    GROUP BY g.{key}
+    ORDER BY g.{key}
+"""
+
+# sp_statistics_by_textbook 的查询体
+TEXTBOOK_SQL = """
+    SELECT t.textbook_id, COALESCE(SUM(po.order_quantity), 0), COALESCE(SUM(po.arrived_quantity), 0),
+           COALESCE(SUM(CASE WHEN po.order_status = '已发放' THEN po.arrived_quantity ELSE 0 END), 0),
+           COALESCE(i.current_quantity, 0)
+    FROM textbook t
+    LEFT JOIN purchase_order po ON t.textbook_id = po.textbook_id
+    LEFT JOIN inventory i ON t.textbook_id = i.textbook_id
+    WHERE t.textbook_id = :textbook_id
+    GROUP BY t.textbook_id, i.current_quantity
+"""
+
+FIELDS = ('textbook_count', 'order_quantity', 'arrived_quantity', 'issued_quantity', 'current_quantity')
+
+
+def seed(total):
+    """生成合成数据"""
+    groups = max(total // 500, 10)
+    db.session.add_all([Publisher(publisher_name=f'出版社{i:04d}') for i in range(groups)])
+    db.session.add_all([TextbookType(type_name=f'类型{i}', type_code=f'T{i:04d}') for i in range(groups)])
+    db.session.flush()
+    rng = random.Random(42)
+    db.session.execute(db.insert(Textbook), [{
+        'isbn': f'978{i:010d}',
+        'textbook_name': f'教材{i}',
+        'author': '作者',
+        'publisher_id': rng.randint(1, groups),
+        'type_id': rng.randint(1, groups),
+        'price': Decimal('39.80'),
+        'publication_date': date(2020, 1, 1),
+        'status': 0 if rng.random() < 0.05 else 1
+    } for i in range(total)])
+    db.session.execute(db.insert(Inventory), [{
+        'textbook_id': tid, 'current_quantity': rng.randint(0, 500), 'min_quantity': 10, 'max_quantity': 1000
+    } for tid in range(1, total + 1) if rng.random() < 0.9])
+    orders = []
+    for i in range(total * 10):
+        quantity = rng.randint(1, 200)
+        status = rng.choice(STATUSES)
+        orders.append({
+            'order_no': f'PO{i:09d}',
+            'textbook_id': rng.randint(1, total),
+            'order_quantity': quantity,
+            'arrived_quantity': quantity if status in ('已到货', '已发放') else 0,
+            'order_date': date(2024, 1, 1),
+            'order_status': status
+        })
+    db.session.execute(db.insert(PurchaseOrder), orders)
+    db.session.commit()
+
+
+def timed(fn, repeat=5):
+    """返回多次执行的最短耗时（毫秒）和最后一次结果"""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def group_sql(key, table):
+    rows = db.session.execute(text(GROUP_SQL.format(key=key, table=table))).fetchall()
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+def textbook_sql(textbook_id):
+    row = db.session.execute(text(TEXTBOOK_SQL), {'textbook_id': textbook_id}).fetchone()
+    return tuple(row[1:])
+
+
+def group_snapshot(items, key):
+    return {item[key]: tuple(item[field] for field in FIELDS) for item in items}
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed(total)
+        service = StatisticsService()
+        dao = AnalyticsDAO()
+        sample = random.Random(7).sample(range(1, total + 1), 100)
+
+        started = time.perf_counter()
+        dao.build_snapshot()
+        build_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        dao.textbook_totals()
+        totals_ms = (time.perf_counter() - started) * 1000
+        print(f'教材 {total} 本，订单 {total * 10} 条；快照全量装载 {build_ms:.0f}ms，按教材汇总 {totals_ms:.0f}ms')
+        print(f'{"统计":<12}{"数据库(ms)":>14}{"快照(ms)":>12}')
+
+        sql_ms, expected = timed(lambda: group_sql('type_id', 'textbook_type'))
+        snapshot_ms, result = timed(lambda: service.get_statistics_by_type())
+        assert group_snapshot(result, 'type_id') == expected
+        print(f'{"按类型":<12}{sql_ms:>14.1f}{snapshot_ms:>12.2f}')
+
+        sql_ms, expected = timed(lambda: group_sql('publisher_id', 'publisher'))
+        snapshot_ms, result = timed(lambda: service.get_statistics_by_publisher())
+        assert group_snapshot(result, 'publisher_id') == expected
+        print(f'{"按出版社":<12}{sql_ms:>14.1f}{snapshot_ms:>12.2f}')
+
+        sql_ms, expected = timed(lambda: [textbook_sql(tid) for tid in sample], repeat=3)
+        snapshot_ms, result = timed(lambda: [service.get_statistics_by_textbook(tid) for tid in sample], repeat=3)
+        assert [tuple(item[field] for field in FIELDS[1:]) for item in result] == expected
+        print(f'{"按教材x100":<12}{sql_ms:>14.1f}{snapshot_ms:>12.2f}')
+
+        db.session.execute(update(PurchaseOrder).where(PurchaseOrder.order_id == 1).values(order_quantity=999))
+        db.session.commit()
+        invalidate_tables('purchase_order')
+        started = time.perf_counter()
+        dao.ensure_snapshot()
+        result = service.get_statistics_by_type()
+        sync_ms = (time.perf_counter() - started) * 1000
+        assert group_snapshot(result, 'type_id') == group_sql('type_id', 'textbook_type')
+        print(f'修改一条订单后增量同步并按类型统计：{sync_ms:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
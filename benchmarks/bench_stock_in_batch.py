@@ -0,0 +1,95 @@
+"""
+批量入库基准测试：逐行调用 StockInService.create_stock_in vs 批量入库 batch_create_stock_ins
+
+用法：
+    python benchmarks/bench_stock_in_batch.py [每批行数]
+
+使用内存SQLite生成订单，分别统计两种方式的总耗时和执行的SQL语句数。
+SQLite 没有 MySQL 的入库触发器，实际部署中两种方式都还要加上逐行触发器的开销；
+逐行方式在 MySQL 上每行还要多两次提交（每次提交都要刷盘）。
+"""
+import os
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+from app.models import Publisher, TextbookType, Textbook, PurchaseOrder, StockIn
+from app.services.stock_in_service import StockInService
+from app.utils.query_counter import QueryCounter
+
+
+def seed(lines):
+    """生成教材和订单，每个订单对应两行入库"""
+    db.session.add(Publisher(publisher_name='出版社'))
+    db.session.add(TextbookType(type_name='类型', type_code='T0'))
+    db.session.flush()
+    db.session.execute(db.insert(Textbook), [{
+        'isbn': f'978{i:010d}', 'textbook_name': f'教材{i}', 'publisher_id': 1, 'type_id': 1,
+        'price': Decimal('39.80'), 'status': 1
+    } for i in range(lines)])
+    # 两种方式各用一半订单
+    db.session.execute(db.insert(PurchaseOrder), [{
+        'order_no': f'PO{i:010d}', 'textbook_id': i % lines + 1, 'order_quantity': 100,
+        'order_date': date(2024, 9, 1), 'order_person': 'admin', 'order_status': '已订购',
+        'arrived_quantity': 0
+    } for i in range(lines)])
+    db.session.commit()
+
+
+def make_lines(order_ids):
+    """每个订单两行入库（到货分两箱）"""
+    lines = []
+    for order_id in order_ids:
+        order = db.session.get(PurchaseOrder, order_id)
+        for quantity in (60, 40):
+            lines.append({
+                'order_id': order_id, 'textbook_id': order.textbook_id,
+                'stock_in_quantity': quantity, 'actual_quantity': quantity,
+                'stock_in_date': date(2024, 9, 2), 'quality_status': '合格',
+                'warehouse_person': 'admin'
+            })
+    db.session.expire_all()
+    return lines
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    orders = lines // 2
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed(orders * 2)
+        service = StockInService()
+        
+        per_line = make_lines(range(1, orders + 1))
+        started = time.perf_counter()
+        with QueryCounter() as counter:
+            for line in per_line:
+                service.create_stock_in(dict(line))
+        single_ms = (time.perf_counter() - started) * 1000
+        single_queries = counter.count
+        
+        batch = make_lines(range(orders + 1, orders * 2 + 1))
+        started = time.perf_counter()
+        with QueryCounter() as counter:
+            results = service.batch_create_stock_ins(batch)
+        batch_ms = (time.perf_counter() - started) * 1000
+        batch_queries = counter.count
+        
+        created = sum(1 for r in results if r['status'] == 'created')
+        assert created == len(batch), results[:3]
+        assert db.session.query(StockIn).count() == len(per_line) + len(batch)
+        
+        print(f'入库行数：{len(batch)}（{orders} 个订单）')
+        print(f'{"方式":<10}{"耗时(ms)":>12}{"SQL语句数":>12}')
+        print(f'{"逐行":<10}{single_ms:>12.1f}{single_queries:>12}')
+        print(f'{"批量":<10}{batch_ms:>12.1f}{batch_queries:>12}')
+
+
+if __name__ == '__main__':
+    main()
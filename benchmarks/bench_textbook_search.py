@@ -0,0 +1,88 @@
+"""
+教材关键字搜索基准测试：LIKE '%关键字%' 全表扫描 vs 进程内 n-gram 倒排索引
+
+用法：
+    python benchmarks/bench_textbook_search.py [教材数量]
+
+使用内存SQLite生成合成中文书名数据，分别统计两种方式的单次查询耗时。
+索引方式分别给出首次检索和同一关键字再次检索（翻页，命中结果缓存）的耗时。
+"""
+import os
+import random
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+from app.models import Publisher, TextbookType, Textbook
+from app.dao.textbook_dao import TextbookDAO
+
+SUBJECTS = ['数据库', '操作系统', '计算机网络', '数据结构', '编译原理', '线性代数', '高等数学',
+            '概率论', '离散数学', '软件工程', '人工智能', '机器学习', '大学物理', '电路分析']
+SUFFIXES = ['原理', '概论', '教程', '基础', '实验指导', '习题解析', '导论', '应用']
+AUTHORS = ['王珊', '萨师煊', '严蔚敏', '谢希仁', '汤小丹', '同济大学', '周志华', '李航']
+KEYWORDS = ['数据库', '系统概论', '网络', '机器学习导论', '王珊', '9787', '不存在的书']
+
+
+def seed(total):
+    """生成合成数据"""
+    db.session.add_all([Publisher(publisher_name=f'出版社{i}') for i in range(10)])
+    db.session.add_all([TextbookType(type_name=f'类型{i}', type_code=f'T{i}') for i in range(10)])
+    db.session.flush()
+    rng = random.Random(42)
+    rows = [{
+        'isbn': f'978{i:010d}',
+        'textbook_name': f'{rng.choice(SUBJECTS)}{rng.choice(SUFFIXES)}（第{rng.randint(1, 8)}版）',
+        'author': rng.choice(AUTHORS),
+        'publisher_id': rng.randint(1, 10),
+        'type_id': rng.randint(1, 10),
+        'price': Decimal('39.80'),
+        'publication_date': date(2020, 1, 1),
+        'status': 1
+    } for i in range(total)]
+    db.session.execute(db.insert(Textbook), rows)
+    db.session.commit()
+
+
+def timed(fn, repeat=5):
+    """返回多次执行的最短耗时（毫秒）和最后一次结果"""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed(total)
+        dao = TextbookDAO()
+
+        started = time.perf_counter()
+        dao.build_search_index()
+        print(f'教材数量：{total}，索引构建耗时：{(time.perf_counter() - started):.2f}s')
+        # 预热ORM语句编译缓存，避免首个关键字的计时包含编译开销
+        dao.search(keyword=SUBJECTS[0][0], per_page=20)
+        print(f'{"关键字":<12}{"命中":>8}{"LIKE(ms)":>12}{"索引首次(ms)":>14}{"索引翻页(ms)":>14}')
+
+        for keyword in KEYWORDS:
+            app.config['TEXTBOOK_SEARCH_INDEX'] = False
+            like_ms, like_page = timed(lambda: dao.search(keyword=keyword, per_page=20))
+            app.config['TEXTBOOK_SEARCH_INDEX'] = True
+            cold_ms, index_page = timed(lambda: dao.search(keyword=keyword, per_page=20), repeat=1)
+            warm_ms, _ = timed(lambda: dao.search(keyword=keyword, page=2, per_page=20))
+            assert like_page.total == index_page.total, keyword
+            print(f'{keyword:<12}{index_page.total:>8}{like_ms:>12.2f}{cold_ms:>14.2f}{warm_ms:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
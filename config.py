@@ -39,15 +39,76 @@ class Config:
     # 分页配置
     DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', 20))
     MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+    # 分页总数统计策略：exact / cached / estimated / none（可被请求参数count覆盖）
+    DEFAULT_COUNT_POLICY = os.getenv('DEFAULT_COUNT_POLICY', 'exact')
+    COUNT_CACHE_TTL = int(os.getenv('COUNT_CACHE_TTL', 60))
+    # 参考数据（出版社、教材类型）缓存过期时间（秒），本进程内的写操作会立即失效
+    REFERENCE_CACHE_TTL = int(os.getenv('REFERENCE_CACHE_TTL', 300))
+    # 仪表盘汇总缓存的刷新间隔（秒）
+    DASHBOARD_REFRESH = int(os.getenv('DASHBOARD_REFRESH', 15))
+    
+    # 缓存后端：memory（进程内LRU+TTL）/ redis（多进程共享，需安装redis）
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 300))
+    # 进程内后端的最大条目数
+    CACHE_MAXSIZE = int(os.getenv('CACHE_MAXSIZE', 4096))
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'textbook:')
+    
+    # 教材关键字搜索使用进程内n-gram倒排索引，关闭时退回 LIKE 查询
+    TEXTBOOK_SEARCH_INDEX = os.getenv('TEXTBOOK_SEARCH_INDEX', 'true').lower() == 'true'
+    # 应用启动时在后台线程预先构建倒排索引（关闭时在首次搜索时构建）
+    TEXTBOOK_SEARCH_INDEX_WARMUP = os.getenv('TEXTBOOK_SEARCH_INDEX_WARMUP', 'true').lower() == 'true'
+    # 倒排索引按 updated_at 增量同步的间隔（秒），用于追平其他进程的写入
+    TEXTBOOK_SEARCH_INDEX_REFRESH = int(os.getenv('TEXTBOOK_SEARCH_INDEX_REFRESH', 30))
+    
+    # 批量写入：每块行数（一条 executemany），单次请求最多行数
+    BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 500))
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 5000))
+    
+    # 订单号、入库单号每次向 doc_sequence 预留的序号个数（号段内分配不访问数据库）
+    DOC_SEQUENCE_BLOCK = int(os.getenv('DOC_SEQUENCE_BLOCK', 20))
+    
+    # 库存快照：某教材在上次快照之后累计多少条流水时生成新快照（flask compact-inventory-ledger）
+    INVENTORY_SNAPSHOT_INTERVAL = int(os.getenv('INVENTORY_SNAPSHOT_INTERVAL', 200))
+    
+    # 库存预警集合的增量同步间隔（秒），同时是预警推送流的心跳间隔
+    INVENTORY_WARNING_REFRESH = int(os.getenv('INVENTORY_WARNING_REFRESH', 5))
+    
+    # 补货建议：统计窗口天数、补货周期天数（建议最高库存覆盖的天数）、安全库存系数 z、
+    # 没有入库记录时的默认到货周期（天）
+    REORDER_WINDOW_DAYS = int(os.getenv('REORDER_WINDOW_DAYS', 180))
+    REORDER_REVIEW_DAYS = int(os.getenv('REORDER_REVIEW_DAYS', 30))
+    REORDER_SERVICE_Z = float(os.getenv('REORDER_SERVICE_Z', 1.65))
+    REORDER_DEFAULT_LEAD_DAYS = int(os.getenv('REORDER_DEFAULT_LEAD_DAYS', 14))
+    
+    # 统计快照：按类型、出版社、教材统计在内存列式快照上计算（false 时查询数据库汇总表/存储过程），
+    # 以及按 updated_at 增量同步的间隔（秒）；本进程写入相关表后下一次读取即同步
+    STATISTICS_SNAPSHOT = os.getenv('STATISTICS_SNAPSHOT', 'true').lower() == 'true'
+    ANALYTICS_SNAPSHOT_REFRESH = int(os.getenv('ANALYTICS_SNAPSHOT_REFRESH', 30))
+    
+    # 按日期范围统计单次最多返回的时间段数（按日约10年）
+    STATISTICS_MAX_BUCKETS = int(os.getenv('STATISTICS_MAX_BUCKETS', 3660))
+    
+    # 列表/详情接口的条件GET（ETag/Last-Modified，未变化时返回304）
+    CONDITIONAL_GET = os.getenv('CONDITIONAL_GET', 'true').lower() == 'true'
+    
+    # 导出接口每次从服务端游标读取的行数
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
     
     # CORS配置
     CORS_ORIGINS = '*'
     
+    # 在响应头 X-Query-Count 中返回每个请求执行的SQL语句数量
+    QUERY_COUNT_HEADER = False
+    
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_DIR = 'logs'
     
     # JSON配置
+    # 编码器：auto（安装了orjson时使用orjson）/ orjson / stdlib
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
     JSON_AS_ASCII = False
     RESTFUL_JSON = {'ensure_ascii': False}
 
@@ -57,6 +118,7 @@ class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_ECHO = True
     LOG_LEVEL = 'DEBUG'
+    QUERY_COUNT_HEADER = True
 
 
 class ProductionConfig(Config):
@@ -69,6 +131,8 @@ class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TEXTBOOK_SEARCH_INDEX_WARMUP = False
+    QUERY_COUNT_HEADER = True
 
 
 # 配置字典
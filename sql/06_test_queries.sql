@@ -52,8 +52,11 @@ CALL sp_inventory_warning();
 -- 调用存储过程：查询指定教材统计信息（教材ID=1）
 CALL sp_statistics_by_textbook(1);
 
--- 调用存储过程：按日期范围统计（2024年1月）
-CALL sp_statistics_by_date_range('2024-01-01', '2024-01-31');
+-- 按日期范围统计（2024年1月，读取按日汇总表 stat_daily）
+SELECT stat_date, order_count, order_quantity, stock_in_count, arrived_quantity, issued_quantity
+FROM stat_daily
+WHERE stat_date BETWEEN '2024-01-01' AND '2024-01-31'
+ORDER BY stat_date;
 
 -- 调用存储过程：生成订单编号
 CALL sp_generate_order_no(@new_order_no);
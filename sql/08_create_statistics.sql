@@ -0,0 +1,359 @@
+-- =============================================
+-- 高校教材管理系统 - 统计汇总表
+-- 按类型、按出版社的统计结果由触发器随订单、库存、教材的变更增量维护，
+-- 统计接口直接读取汇总表，耗时与历史数据量无关。
+-- 数据异常时可执行 CALL sp_rebuild_statistics() 或 flask rebuild-statistics 全量重建。
+-- 需在 02~04 脚本之后执行
+-- =============================================
+
+USE textbook_management;
+
+-- =============================================
+-- 汇总表
+-- 只统计启用状态（status=1）的教材；类型、出版社的启用状态在查询时过滤
+-- =============================================
+DROP TABLE IF EXISTS stat_by_type;
+
+CREATE TABLE stat_by_type (
+    type_id INT PRIMARY KEY COMMENT '类型ID',
+    textbook_count INT NOT NULL DEFAULT 0 COMMENT '教材种类数',
+    order_quantity INT NOT NULL DEFAULT 0 COMMENT '订购总数量',
+    arrived_quantity INT NOT NULL DEFAULT 0 COMMENT '到货总数量',
+    issued_quantity INT NOT NULL DEFAULT 0 COMMENT '发放总数量',
+    current_quantity INT NOT NULL DEFAULT 0 COMMENT '当前库存总量',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='按类型统计汇总表';
+
+DROP TABLE IF EXISTS stat_by_publisher;
+
+CREATE TABLE stat_by_publisher (
+    publisher_id INT PRIMARY KEY COMMENT '出版社ID',
+    textbook_count INT NOT NULL DEFAULT 0 COMMENT '教材种类数',
+    order_quantity INT NOT NULL DEFAULT 0 COMMENT '订购总数量',
+    arrived_quantity INT NOT NULL DEFAULT 0 COMMENT '到货总数量',
+    issued_quantity INT NOT NULL DEFAULT 0 COMMENT '发放总数量',
+    current_quantity INT NOT NULL DEFAULT 0 COMMENT '当前库存总量',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='按出版社统计汇总表';
+
+-- =============================================
+-- 存储过程：把一本教材的增量累加到其类型和出版社的汇总行
+-- 教材不存在或已停用时不做任何修改
+-- =============================================
+DROP PROCEDURE IF EXISTS sp_stat_apply;
+
+DELIMITER $$
+
+CREATE PROCEDURE sp_stat_apply(
+    IN p_textbook_id INT,
+    IN p_textbooks INT,
+    IN p_ordered INT,
+    IN p_arrived INT,
+    IN p_issued INT,
+    IN p_on_hand INT
+)
+BEGIN
+    DECLARE v_type_id INT DEFAULT NULL;
+    DECLARE v_publisher_id INT DEFAULT NULL;
+
+    IF p_textbooks <> 0 OR p_ordered <> 0 OR p_arrived <> 0 OR p_issued <> 0 OR p_on_hand <> 0 THEN
+        SELECT type_id, publisher_id INTO v_type_id, v_publisher_id
+        FROM textbook
+        WHERE textbook_id = p_textbook_id AND status = 1;
+
+        IF v_type_id IS NOT NULL THEN
+            INSERT INTO stat_by_type (type_id, textbook_count, order_quantity, arrived_quantity,
+                                      issued_quantity, current_quantity)
+            VALUES (v_type_id, p_textbooks, p_ordered, p_arrived, p_issued, p_on_hand)
+            ON DUPLICATE KEY UPDATE
+                textbook_count = textbook_count + p_textbooks,
+                order_quantity = order_quantity + p_ordered,
+                arrived_quantity = arrived_quantity + p_arrived,
+                issued_quantity = issued_quantity + p_issued,
+                current_quantity = current_quantity + p_on_hand;
+
+            INSERT INTO stat_by_publisher (publisher_id, textbook_count, order_quantity, arrived_quantity,
+                                           issued_quantity, current_quantity)
+            VALUES (v_publisher_id, p_textbooks, p_ordered, p_arrived, p_issued, p_on_hand)
+            ON DUPLICATE KEY UPDATE
+                textbook_count = textbook_count + p_textbooks,
+                order_quantity = order_quantity + p_ordered,
+                arrived_quantity = arrived_quantity + p_arrived,
+                issued_quantity = issued_quantity + p_issued,
+                current_quantity = current_quantity + p_on_hand;
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 存储过程：全量重建汇总表
+-- 订单按教材先聚合再与库存关联，避免一本教材有多张订单时库存被重复累加
+-- =============================================
+DROP PROCEDURE IF EXISTS sp_rebuild_statistics;
+
+DELIMITER $$
+
+CREATE PROCEDURE sp_rebuild_statistics()
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_textbook_stat;
+    CREATE TEMPORARY TABLE tmp_textbook_stat AS
+    SELECT
+        t.textbook_id,
+        t.type_id,
+        t.publisher_id,
+        COALESCE(o.order_quantity, 0) AS order_quantity,
+        COALESCE(o.arrived_quantity, 0) AS arrived_quantity,
+        COALESCE(o.issued_quantity, 0) AS issued_quantity,
+        COALESCE(i.current_quantity, 0) AS current_quantity
+    FROM
+        textbook t
+        LEFT JOIN (
+            SELECT
+                textbook_id,
+                SUM(order_quantity) AS order_quantity,
+                SUM(arrived_quantity) AS arrived_quantity,
+                SUM(CASE WHEN order_status = '已发放' THEN arrived_quantity ELSE 0 END) AS issued_quantity
+            FROM purchase_order
+            GROUP BY textbook_id
+        ) o ON o.textbook_id = t.textbook_id
+        LEFT JOIN inventory i ON i.textbook_id = t.textbook_id
+    WHERE
+        t.status = 1;
+
+    DELETE FROM stat_by_type;
+    INSERT INTO stat_by_type (type_id, textbook_count, order_quantity, arrived_quantity,
+                              issued_quantity, current_quantity)
+    SELECT type_id, COUNT(*), SUM(order_quantity), SUM(arrived_quantity),
+           SUM(issued_quantity), SUM(current_quantity)
+    FROM tmp_textbook_stat
+    GROUP BY type_id;
+
+    DELETE FROM stat_by_publisher;
+    INSERT INTO stat_by_publisher (publisher_id, textbook_count, order_quantity, arrived_quantity,
+                                   issued_quantity, current_quantity)
+    SELECT publisher_id, COUNT(*), SUM(order_quantity), SUM(arrived_quantity),
+           SUM(issued_quantity), SUM(current_quantity)
+    FROM tmp_textbook_stat
+    GROUP BY publisher_id;
+
+    DROP TEMPORARY TABLE tmp_textbook_stat;
+
+    COMMIT;
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 触发器：订单变更
+-- =============================================
+DROP TRIGGER IF EXISTS trg_purchase_order_stat_after_insert;
+DROP TRIGGER IF EXISTS trg_purchase_order_stat_after_update;
+DROP TRIGGER IF EXISTS trg_purchase_order_stat_after_delete;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_purchase_order_stat_after_insert
+AFTER INSERT ON purchase_order
+FOR EACH ROW
+BEGIN
+    CALL sp_stat_apply(
+        NEW.textbook_id, 0, NEW.order_quantity, NEW.arrived_quantity,
+        IF(NEW.order_status = '已发放', NEW.arrived_quantity, 0), 0
+    );
+END$$
+
+CREATE TRIGGER trg_purchase_order_stat_after_update
+AFTER UPDATE ON purchase_order
+FOR EACH ROW
+BEGIN
+    IF OLD.textbook_id = NEW.textbook_id THEN
+        CALL sp_stat_apply(
+            NEW.textbook_id, 0,
+            NEW.order_quantity - OLD.order_quantity,
+            NEW.arrived_quantity - OLD.arrived_quantity,
+            IF(NEW.order_status = '已发放', NEW.arrived_quantity, 0)
+                - IF(OLD.order_status = '已发放', OLD.arrived_quantity, 0),
+            0
+        );
+    ELSE
+        CALL sp_stat_apply(
+            OLD.textbook_id, 0, -OLD.order_quantity, -OLD.arrived_quantity,
+            -IF(OLD.order_status = '已发放', OLD.arrived_quantity, 0), 0
+        );
+        CALL sp_stat_apply(
+            NEW.textbook_id, 0, NEW.order_quantity, NEW.arrived_quantity,
+            IF(NEW.order_status = '已发放', NEW.arrived_quantity, 0), 0
+        );
+    END IF;
+END$$
+
+CREATE TRIGGER trg_purchase_order_stat_after_delete
+AFTER DELETE ON purchase_order
+FOR EACH ROW
+BEGIN
+    CALL sp_stat_apply(
+        OLD.textbook_id, 0, -OLD.order_quantity, -OLD.arrived_quantity,
+        -IF(OLD.order_status = '已发放', OLD.arrived_quantity, 0), 0
+    );
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 触发器：库存变更（入库触发器、发放对库存的修改都会经过这里）
+-- =============================================
+DROP TRIGGER IF EXISTS trg_inventory_stat_after_insert;
+DROP TRIGGER IF EXISTS trg_inventory_stat_after_update;
+DROP TRIGGER IF EXISTS trg_inventory_stat_after_delete;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_inventory_stat_after_insert
+AFTER INSERT ON inventory
+FOR EACH ROW
+BEGIN
+    CALL sp_stat_apply(NEW.textbook_id, 0, 0, 0, 0, NEW.current_quantity);
+END$$
+
+CREATE TRIGGER trg_inventory_stat_after_update
+AFTER UPDATE ON inventory
+FOR EACH ROW
+BEGIN
+    IF OLD.textbook_id = NEW.textbook_id THEN
+        CALL sp_stat_apply(NEW.textbook_id, 0, 0, 0, 0, NEW.current_quantity - OLD.current_quantity);
+    ELSE
+        CALL sp_stat_apply(OLD.textbook_id, 0, 0, 0, 0, -OLD.current_quantity);
+        CALL sp_stat_apply(NEW.textbook_id, 0, 0, 0, 0, NEW.current_quantity);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_inventory_stat_after_delete
+AFTER DELETE ON inventory
+FOR EACH ROW
+BEGIN
+    CALL sp_stat_apply(OLD.textbook_id, 0, 0, 0, 0, -OLD.current_quantity);
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 触发器：教材变更
+-- 新增教材只增加种类数（库存记录由 trg_textbook_after_insert 初始化为0）；
+-- 启用状态、类型或出版社变化时，把该教材的全部订单和库存从原分组移到新分组
+-- =============================================
+DROP TRIGGER IF EXISTS trg_textbook_stat_after_insert;
+DROP TRIGGER IF EXISTS trg_textbook_stat_after_update;
+DROP TRIGGER IF EXISTS trg_textbook_stat_after_delete;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_textbook_stat_after_insert
+AFTER INSERT ON textbook
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 1 THEN
+        INSERT INTO stat_by_type (type_id, textbook_count) VALUES (NEW.type_id, 1)
+        ON DUPLICATE KEY UPDATE textbook_count = textbook_count + 1;
+        INSERT INTO stat_by_publisher (publisher_id, textbook_count) VALUES (NEW.publisher_id, 1)
+        ON DUPLICATE KEY UPDATE textbook_count = textbook_count + 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_textbook_stat_after_update
+AFTER UPDATE ON textbook
+FOR EACH ROW
+BEGIN
+    DECLARE v_ordered INT DEFAULT 0;
+    DECLARE v_arrived INT DEFAULT 0;
+    DECLARE v_issued INT DEFAULT 0;
+    DECLARE v_on_hand INT DEFAULT 0;
+    DECLARE v_old_active INT DEFAULT 0;
+    DECLARE v_new_active INT DEFAULT 0;
+
+    IF NOT (OLD.status <=> NEW.status AND OLD.type_id <=> NEW.type_id
+            AND OLD.publisher_id <=> NEW.publisher_id) THEN
+        SELECT
+            COALESCE(SUM(order_quantity), 0),
+            COALESCE(SUM(arrived_quantity), 0),
+            COALESCE(SUM(CASE WHEN order_status = '已发放' THEN arrived_quantity ELSE 0 END), 0)
+        INTO v_ordered, v_arrived, v_issued
+        FROM purchase_order
+        WHERE textbook_id = NEW.textbook_id;
+
+        SELECT COALESCE(SUM(current_quantity), 0) INTO v_on_hand
+        FROM inventory
+        WHERE textbook_id = NEW.textbook_id;
+
+        SET v_old_active = IF(OLD.status = 1, 1, 0);
+        SET v_new_active = IF(NEW.status = 1, 1, 0);
+
+        IF v_old_active = 1 THEN
+            UPDATE stat_by_type
+            SET textbook_count = textbook_count - 1,
+                order_quantity = order_quantity - v_ordered,
+                arrived_quantity = arrived_quantity - v_arrived,
+                issued_quantity = issued_quantity - v_issued,
+                current_quantity = current_quantity - v_on_hand
+            WHERE type_id = OLD.type_id;
+            UPDATE stat_by_publisher
+            SET textbook_count = textbook_count - 1,
+                order_quantity = order_quantity - v_ordered,
+                arrived_quantity = arrived_quantity - v_arrived,
+                issued_quantity = issued_quantity - v_issued,
+                current_quantity = current_quantity - v_on_hand
+            WHERE publisher_id = OLD.publisher_id;
+        END IF;
+
+        IF v_new_active = 1 THEN
+            INSERT INTO stat_by_type (type_id, textbook_count, order_quantity, arrived_quantity,
+                                      issued_quantity, current_quantity)
+            VALUES (NEW.type_id, 1, v_ordered, v_arrived, v_issued, v_on_hand)
+            ON DUPLICATE KEY UPDATE
+                textbook_count = textbook_count + 1,
+                order_quantity = order_quantity + v_ordered,
+                arrived_quantity = arrived_quantity + v_arrived,
+                issued_quantity = issued_quantity + v_issued,
+                current_quantity = current_quantity + v_on_hand;
+            INSERT INTO stat_by_publisher (publisher_id, textbook_count, order_quantity, arrived_quantity,
+                                           issued_quantity, current_quantity)
+            VALUES (NEW.publisher_id, 1, v_ordered, v_arrived, v_issued, v_on_hand)
+            ON DUPLICATE KEY UPDATE
+                textbook_count = textbook_count + 1,
+                order_quantity = order_quantity + v_ordered,
+                arrived_quantity = arrived_quantity + v_arrived,
+                issued_quantity = issued_quantity + v_issued,
+                current_quantity = current_quantity + v_on_hand;
+        END IF;
+    END IF;
+END$$
+
+-- 教材的订单和库存记录须先删除（外键限制），此时只需扣减种类数
+CREATE TRIGGER trg_textbook_stat_after_delete
+AFTER DELETE ON textbook
+FOR EACH ROW
+BEGIN
+    IF OLD.status = 1 THEN
+        UPDATE stat_by_type SET textbook_count = textbook_count - 1 WHERE type_id = OLD.type_id;
+        UPDATE stat_by_publisher SET textbook_count = textbook_count - 1 WHERE publisher_id = OLD.publisher_id;
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 用现有数据初始化汇总表
+-- =============================================
+CALL sp_rebuild_statistics();
+
+SELECT * FROM stat_by_type;
+SELECT * FROM stat_by_publisher;
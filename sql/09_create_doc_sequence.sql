@@ -0,0 +1,32 @@
+-- =============================================
+-- 高校教材管理系统 - 单号序列表
+-- 订单号（PO）、入库单号（SI）由应用按号段分配：每个进程一次预留 DOC_SEQUENCE_BLOCK 个序号，
+-- 在内存中依次发放，号段用完后再执行一次 UPDATE 预留下一段。
+-- 取代 sp_generate_order_no / sp_generate_stock_in_no（MAX(...) + 1 的方式随当天单据增多变慢，
+-- 且并发时会生成重复单号）。
+-- 需在 02 脚本之后执行
+-- =============================================
+
+USE textbook_management;
+
+DROP TABLE IF EXISTS doc_sequence;
+
+CREATE TABLE doc_sequence (
+    seq_prefix VARCHAR(10) NOT NULL COMMENT '单号前缀（PO/SI）',
+    seq_date CHAR(8) NOT NULL COMMENT '日期（YYYYMMDD）',
+    next_value BIGINT NOT NULL DEFAULT 1 COMMENT '下一个未分配的序号',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+    PRIMARY KEY (seq_prefix, seq_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='单号序列表';
+
+-- 接续当天已生成的单号（当天首次预留时应用也会自动接续，这里便于在部署当天核对）
+INSERT INTO doc_sequence (seq_prefix, seq_date, next_value)
+SELECT 'PO', DATE_FORMAT(NOW(), '%Y%m%d'), COALESCE(MAX(CAST(SUBSTRING(order_no, 11) AS UNSIGNED)), 0) + 1
+FROM purchase_order
+WHERE order_no LIKE CONCAT('PO', DATE_FORMAT(NOW(), '%Y%m%d'), '%');
+
+INSERT INTO doc_sequence (seq_prefix, seq_date, next_value)
+SELECT 'SI', DATE_FORMAT(NOW(), '%Y%m%d'), COALESCE(MAX(CAST(SUBSTRING(stock_in_no, 11) AS UNSIGNED)), 0) + 1
+FROM stock_in
+WHERE stock_in_no LIKE CONCAT('SI', DATE_FORMAT(NOW(), '%Y%m%d'), '%');
@@ -0,0 +1,86 @@
+-- =============================================
+-- 高校教材管理系统 - 库存流水与快照
+-- inventory 表由触发器和发放接口原地更新，无法回答"某天的库存是多少"。
+-- 每次库存变动另外追加一行流水（只追加，不修改、不删除）：
+--   入库、删除入库（入库冲销）由本脚本的触发器写入；发放由应用在同一事务中写入；
+--   对账调整由 flask verify-inventory-ledger --reconcile 写入。
+-- 快照按教材定期生成（flask compact-inventory-ledger），按时间点查询时
+-- 只需读取最近的快照再累加其后的少量流水。
+-- 需在 02、03 脚本之后执行
+-- =============================================
+
+USE textbook_management;
+
+DROP TABLE IF EXISTS inventory_snapshot;
+DROP TABLE IF EXISTS inventory_movement;
+
+CREATE TABLE inventory_movement (
+    movement_id BIGINT PRIMARY KEY AUTO_INCREMENT COMMENT '流水ID',
+    textbook_id INT NOT NULL COMMENT '教材ID',
+    movement_type ENUM('期初', '入库', '入库冲销', '发放', '调整') NOT NULL COMMENT '流水类型',
+    quantity_change INT NOT NULL DEFAULT 0 COMMENT '当前库存变化量',
+    in_change INT NOT NULL DEFAULT 0 COMMENT '累计入库变化量',
+    out_change INT NOT NULL DEFAULT 0 COMMENT '累计出库变化量',
+    ref_type VARCHAR(20) COMMENT '来源单据类型（stock_in/purchase_order/reconcile/inventory）',
+    ref_id INT COMMENT '来源单据ID',
+    operator VARCHAR(50) COMMENT '操作人',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '发生时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '更新时间（流水不修改，与发生时间相同）',
+    FOREIGN KEY (textbook_id) REFERENCES textbook(textbook_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    INDEX idx_movement_textbook (textbook_id, movement_id),
+    INDEX idx_movement_created (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='库存流水表';
+
+CREATE TABLE inventory_snapshot (
+    textbook_id INT NOT NULL COMMENT '教材ID',
+    last_movement_id BIGINT NOT NULL COMMENT '快照包含的最后一条流水ID',
+    snapshot_at DATETIME NOT NULL COMMENT '快照时点（最后一条流水的发生时间）',
+    current_quantity INT NOT NULL DEFAULT 0 COMMENT '当前库存数量',
+    total_in_quantity INT NOT NULL DEFAULT 0 COMMENT '累计入库数量',
+    total_out_quantity INT NOT NULL DEFAULT 0 COMMENT '累计出库数量',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+    PRIMARY KEY (textbook_id, last_movement_id),
+    INDEX idx_snapshot_textbook_time (textbook_id, snapshot_at),
+    FOREIGN KEY (textbook_id) REFERENCES textbook(textbook_id) ON DELETE RESTRICT ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='库存快照表';
+
+-- =============================================
+-- 触发器：入库、删除入库时追加流水
+-- 与 trg_stock_in_after_insert / trg_stock_in_before_delete 并存；
+-- 删除使用 AFTER 触发器，回退失败（SIGNAL）时不会写入流水
+-- =============================================
+DROP TRIGGER IF EXISTS trg_stock_in_ledger_after_insert;
+DROP TRIGGER IF EXISTS trg_stock_in_ledger_after_delete;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_stock_in_ledger_after_insert
+AFTER INSERT ON stock_in
+FOR EACH ROW
+BEGIN
+    INSERT INTO inventory_movement (textbook_id, movement_type, quantity_change, in_change, out_change,
+                                    ref_type, ref_id, operator)
+    VALUES (NEW.textbook_id, '入库', NEW.actual_quantity, NEW.actual_quantity, 0,
+            'stock_in', NEW.stock_in_id, NEW.warehouse_person);
+END$$
+
+CREATE TRIGGER trg_stock_in_ledger_after_delete
+AFTER DELETE ON stock_in
+FOR EACH ROW
+BEGIN
+    INSERT INTO inventory_movement (textbook_id, movement_type, quantity_change, in_change, out_change,
+                                    ref_type, ref_id, operator)
+    VALUES (OLD.textbook_id, '入库冲销', -OLD.actual_quantity, -OLD.actual_quantity, 0,
+            'stock_in', OLD.stock_in_id, OLD.warehouse_person);
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 期初：以当前库存为起点
+-- =============================================
+INSERT INTO inventory_movement (textbook_id, movement_type, quantity_change, in_change, out_change, ref_type)
+SELECT textbook_id, '期初', current_quantity, total_in_quantity, total_out_quantity, 'inventory'
+FROM inventory
+WHERE current_quantity <> 0 OR total_in_quantity <> 0 OR total_out_quantity <> 0;
@@ -0,0 +1,218 @@
+-- =============================================
+-- 高校教材管理系统 - 按日统计汇总
+-- 按日期范围统计（GET /statistics/by-date）读取按日汇总表 stat_daily，
+-- 再由应用按日/周/月合并，多年的范围也只读取几千行，与订单、入库的历史数据量无关。
+-- 汇总行由订单、入库、库存流水的触发器增量维护：
+--   订单数、订购数量按订购日期（不含已取消订单）；入库单数、实际入库数量按入库日期；
+--   发放数量按"发放"流水的发生日期。
+-- 数据异常时可执行 CALL sp_rebuild_daily_statistics() 或 flask rebuild-statistics 全量重建。
+-- 需在 02、03、10 脚本之后执行
+-- =============================================
+
+USE textbook_management;
+
+DROP TABLE IF EXISTS stat_daily;
+
+CREATE TABLE stat_daily (
+    stat_date DATE PRIMARY KEY COMMENT '日期',
+    order_count INT NOT NULL DEFAULT 0 COMMENT '订单数（按订购日期）',
+    order_quantity INT NOT NULL DEFAULT 0 COMMENT '订购数量（按订购日期）',
+    stock_in_count INT NOT NULL DEFAULT 0 COMMENT '入库单数（按入库日期）',
+    arrived_quantity INT NOT NULL DEFAULT 0 COMMENT '实际入库数量（按入库日期）',
+    issued_quantity INT NOT NULL DEFAULT 0 COMMENT '发放数量（按发放日期）',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='按日统计汇总表';
+
+-- =============================================
+-- 存储过程：把增量累加到某一天的汇总行
+-- =============================================
+DROP PROCEDURE IF EXISTS sp_stat_daily_apply;
+
+DELIMITER $$
+
+CREATE PROCEDURE sp_stat_daily_apply(
+    IN p_date DATE,
+    IN p_orders INT,
+    IN p_ordered INT,
+    IN p_stock_ins INT,
+    IN p_arrived INT,
+    IN p_issued INT
+)
+BEGIN
+    IF p_date IS NOT NULL AND (p_orders <> 0 OR p_ordered <> 0 OR p_stock_ins <> 0
+                               OR p_arrived <> 0 OR p_issued <> 0) THEN
+        INSERT INTO stat_daily (stat_date, order_count, order_quantity, stock_in_count,
+                                arrived_quantity, issued_quantity)
+        VALUES (p_date, p_orders, p_ordered, p_stock_ins, p_arrived, p_issued)
+        ON DUPLICATE KEY UPDATE
+            order_count = order_count + p_orders,
+            order_quantity = order_quantity + p_ordered,
+            stock_in_count = stock_in_count + p_stock_ins,
+            arrived_quantity = arrived_quantity + p_arrived,
+            issued_quantity = issued_quantity + p_issued;
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 存储过程：全量重建按日汇总表
+-- 启用库存流水之前已发放、没有"发放"流水的订单，按订单最后修改日期计入发放
+-- =============================================
+DROP PROCEDURE IF EXISTS sp_rebuild_daily_statistics;
+
+DELIMITER $$
+
+CREATE PROCEDURE sp_rebuild_daily_statistics()
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    DELETE FROM stat_daily;
+    INSERT INTO stat_daily (stat_date, order_count, order_quantity, stock_in_count,
+                            arrived_quantity, issued_quantity)
+    SELECT stat_date, SUM(order_count), SUM(order_quantity), SUM(stock_in_count),
+           SUM(arrived_quantity), SUM(issued_quantity)
+    FROM (
+        SELECT order_date AS stat_date, COUNT(*) AS order_count, SUM(order_quantity) AS order_quantity,
+               0 AS stock_in_count, 0 AS arrived_quantity, 0 AS issued_quantity
+        FROM purchase_order
+        WHERE order_status <> '已取消'
+        GROUP BY order_date
+        UNION ALL
+        SELECT stock_in_date, 0, 0, COUNT(*), SUM(actual_quantity), 0
+        FROM stock_in
+        GROUP BY stock_in_date
+        UNION ALL
+        SELECT DATE(created_at), 0, 0, 0, 0, SUM(out_change)
+        FROM inventory_movement
+        WHERE movement_type = '发放'
+        GROUP BY DATE(created_at)
+        UNION ALL
+        SELECT DATE(o.updated_at), 0, 0, 0, 0, SUM(o.arrived_quantity)
+        FROM purchase_order o
+        WHERE o.order_status = '已发放'
+          AND NOT EXISTS (
+              SELECT 1 FROM inventory_movement m
+              WHERE m.movement_type = '发放' AND m.ref_type = 'purchase_order' AND m.ref_id = o.order_id
+          )
+        GROUP BY DATE(o.updated_at)
+    ) daily
+    GROUP BY stat_date;
+
+    COMMIT;
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 触发器：订单变更（已取消的订单不计入）
+-- =============================================
+DROP TRIGGER IF EXISTS trg_purchase_order_daily_after_insert;
+DROP TRIGGER IF EXISTS trg_purchase_order_daily_after_update;
+DROP TRIGGER IF EXISTS trg_purchase_order_daily_after_delete;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_purchase_order_daily_after_insert
+AFTER INSERT ON purchase_order
+FOR EACH ROW
+BEGIN
+    IF NEW.order_status <> '已取消' THEN
+        CALL sp_stat_daily_apply(NEW.order_date, 1, NEW.order_quantity, 0, 0, 0);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_purchase_order_daily_after_update
+AFTER UPDATE ON purchase_order
+FOR EACH ROW
+BEGIN
+    DECLARE v_old INT DEFAULT IF(OLD.order_status <> '已取消', 1, 0);
+    DECLARE v_new INT DEFAULT IF(NEW.order_status <> '已取消', 1, 0);
+
+    -- 到货、发放等只修改状态和到货数量的更新不涉及汇总行
+    IF OLD.order_date = NEW.order_date THEN
+        CALL sp_stat_daily_apply(NEW.order_date, v_new - v_old,
+                                 NEW.order_quantity * v_new - OLD.order_quantity * v_old, 0, 0, 0);
+    ELSE
+        CALL sp_stat_daily_apply(OLD.order_date, -v_old, -OLD.order_quantity * v_old, 0, 0, 0);
+        CALL sp_stat_daily_apply(NEW.order_date, v_new, NEW.order_quantity * v_new, 0, 0, 0);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_purchase_order_daily_after_delete
+AFTER DELETE ON purchase_order
+FOR EACH ROW
+BEGIN
+    IF OLD.order_status <> '已取消' THEN
+        CALL sp_stat_daily_apply(OLD.order_date, -1, -OLD.order_quantity, 0, 0, 0);
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 触发器：入库变更
+-- =============================================
+DROP TRIGGER IF EXISTS trg_stock_in_daily_after_insert;
+DROP TRIGGER IF EXISTS trg_stock_in_daily_after_update;
+DROP TRIGGER IF EXISTS trg_stock_in_daily_after_delete;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_stock_in_daily_after_insert
+AFTER INSERT ON stock_in
+FOR EACH ROW
+BEGIN
+    CALL sp_stat_daily_apply(NEW.stock_in_date, 0, 0, 1, NEW.actual_quantity, 0);
+END$$
+
+CREATE TRIGGER trg_stock_in_daily_after_update
+AFTER UPDATE ON stock_in
+FOR EACH ROW
+BEGIN
+    IF OLD.stock_in_date = NEW.stock_in_date THEN
+        CALL sp_stat_daily_apply(NEW.stock_in_date, 0, 0, 0, NEW.actual_quantity - OLD.actual_quantity, 0);
+    ELSE
+        CALL sp_stat_daily_apply(OLD.stock_in_date, 0, 0, -1, -OLD.actual_quantity, 0);
+        CALL sp_stat_daily_apply(NEW.stock_in_date, 0, 0, 1, NEW.actual_quantity, 0);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_stock_in_daily_after_delete
+AFTER DELETE ON stock_in
+FOR EACH ROW
+BEGIN
+    CALL sp_stat_daily_apply(OLD.stock_in_date, 0, 0, -1, -OLD.actual_quantity, 0);
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 触发器：发放流水（发放接口与库存扣减在同一事务中写入）
+-- =============================================
+DROP TRIGGER IF EXISTS trg_inventory_movement_daily_after_insert;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_inventory_movement_daily_after_insert
+AFTER INSERT ON inventory_movement
+FOR EACH ROW
+BEGIN
+    IF NEW.movement_type = '发放' THEN
+        CALL sp_stat_daily_apply(DATE(NEW.created_at), 0, 0, 0, 0, NEW.out_change);
+    END IF;
+END$$
+
+DELIMITER ;
+
+-- =============================================
+-- 以现有数据初始化
+-- =============================================
+CALL sp_rebuild_daily_statistics();
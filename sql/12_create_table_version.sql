@@ -0,0 +1,32 @@
+-- =============================================
+-- 高校教材管理系统 - 表版本
+-- 每张表一行版本号，应用的写操作提交后递增（BaseDAO 写方法与 invalidate_tables）。
+-- 条件GET（ETag/Last-Modified）和统计快照只读取这几行判断数据是否变化，
+-- 不再对业务表执行 COUNT(*) 和 MAX(updated_at)；各进程读到的版本一致，ETag 相同。
+-- 绕过应用直接修改业务表后，需递增对应表的版本，例如：
+--   UPDATE table_version SET version = version + 1 WHERE table_name = 'textbook';
+-- 应用硬删除行时还会递增 '<表名>:delete' 行（删除标记，第一次删除时插入），
+-- 统计快照据此重新装载该表；直接删除行后也应递增该行，否则要等周期核对行数时才会发现。
+-- 需在 02 脚本之后执行
+-- =============================================
+
+USE textbook_management;
+
+DROP TABLE IF EXISTS table_version;
+
+CREATE TABLE table_version (
+    table_name VARCHAR(64) PRIMARY KEY COMMENT '表名',
+    version BIGINT NOT NULL DEFAULT 0 COMMENT '版本号（每次写入后加一）',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='表版本';
+
+-- 应用写入的表（没有对应行时应用会在第一次写入时补上）
+INSERT INTO table_version (table_name, version) VALUES
+    ('publisher', 1),
+    ('textbook_type', 1),
+    ('textbook', 1),
+    ('inventory', 1),
+    ('purchase_order', 1),
+    ('stock_in', 1),
+    ('user', 1);
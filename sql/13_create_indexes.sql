@@ -0,0 +1,17 @@
+-- =============================================
+-- 高校教材管理系统 - 补充索引
+-- 订单可见性判断和统计快照增量同步使用的索引
+-- 需在 02 脚本之后执行
+-- =============================================
+
+USE textbook_management;
+
+-- 订单可见性判断（教师、普通用户只能看到部分订购人的订单）
+-- 订单按订购人过滤，再按 username 关联用户表并过滤角色
+CREATE INDEX idx_order_person ON purchase_order(order_person);
+CREATE INDEX idx_user_role_status ON user(role, status);
+
+-- 更新时间索引（统计快照按 updated_at 水位线增量读取有修改的行）
+CREATE INDEX idx_textbook_updated ON textbook(updated_at);
+CREATE INDEX idx_order_updated ON purchase_order(updated_at);
+CREATE INDEX idx_inventory_updated ON inventory(updated_at);
@@ -0,0 +1,45 @@
+"""
+测试夹具
+使用 testing 配置（内存SQLite），每个测试一个新的应用和数据库
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db as _db, cache
+
+
+@pytest.fixture
+def app():
+    """测试应用"""
+    app = create_app('testing')
+    with app.app_context():
+        cache.clear()
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+        cache.clear()
+
+
+@pytest.fixture
+def db(app):
+    """数据库"""
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    """测试客户端"""
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """管理员的认证请求头"""
+    with app.test_request_context():
+        token = create_access_token(identity='1', additional_claims={
+            'username': 'admin',
+            'role': '管理员',
+            'real_name': '管理员'
+        })
+    return {'Authorization': f'Bearer {token}'}
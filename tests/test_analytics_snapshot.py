@@ -0,0 +1,68 @@
+"""
+统计快照同步测试：写入后的同步只读取有修改的行，硬删除按删除标记重新装载，行数只在周期到期时核对
+"""
+from datetime import date
+from decimal import Decimal
+import pytest
+from sqlalchemy import update
+from app.dao.analytics_dao import AnalyticsDAO, analytics_tables, _snapshot_state
+from app.dao.base_dao import BaseDAO, invalidate_tables
+from app.models import Publisher, TextbookType, Textbook, PurchaseOrder
+from app.utils.query_counter import QueryCounter
+
+
+@pytest.fixture
+def dao(app, db):
+    db.session.add(Publisher(publisher_name='高等教育出版社'))
+    db.session.add(TextbookType(type_name='专业课', type_code='ZY'))
+    db.session.flush()
+    db.session.add(Textbook(isbn='9780000000001', textbook_name='教材', publisher_id=1, type_id=1,
+                            price=Decimal('39.80'), publication_date=date(2020, 1, 1)))
+    db.session.flush()
+    db.session.add_all([PurchaseOrder(order_no=f'PO{i:04d}', textbook_id=1, order_quantity=10,
+                                      order_date=date(2024, 1, 1)) for i in range(3)])
+    db.session.commit()
+    dao = AnalyticsDAO()
+    dao.clear()
+    dao.build_snapshot()
+    yield dao
+    dao.clear()
+
+
+def counts(statements):
+    return [s for s in statements if 'count(' in s.lower()]
+
+
+def test_write_sync_is_incremental(dao, db):
+    db.session.execute(update(PurchaseOrder).where(PurchaseOrder.order_id == 1).values(order_quantity=99))
+    db.session.commit()
+    invalidate_tables('purchase_order')
+    with QueryCounter() as counter:
+        totals = dao.textbook_totals()
+    assert not counts(counter.statements)
+    assert totals['order_quantity'].tolist() == [119]
+
+
+def test_hard_delete_reloads_table(dao, db):
+    BaseDAO(PurchaseOrder).delete(2, soft=False)
+    with QueryCounter() as counter:
+        totals = dao.textbook_totals()
+    assert not counts(counter.statements)
+    assert len(analytics_tables['purchase_order']) == 2
+    assert totals['order_quantity'].tolist() == [20]
+
+
+def test_periodic_sync_checks_counts(dao, db):
+    # 绕过应用删除行，只递增表版本
+    db.session.query(PurchaseOrder).filter(PurchaseOrder.order_id == 3).delete()
+    db.session.commit()
+    invalidate_tables('purchase_order')
+    dao.ensure_snapshot()
+    assert len(analytics_tables['purchase_order']) == 3
+    
+    _snapshot_state['checked_at'] = 0.0
+    with QueryCounter() as counter:
+        totals = dao.textbook_totals()
+    assert counts(counter.statements)
+    assert len(analytics_tables['purchase_order']) == 2
+    assert totals['order_quantity'].tolist() == [20]
@@ -0,0 +1,18 @@
+"""
+批量接口请求体测试
+"""
+
+
+def test_batch_accepts_bare_list(client, auth_headers):
+    response = client.post('/api/v1/publishers/batch', headers=auth_headers,
+                           json=[{'publisher_name': '高等教育出版社'}, {'publisher_name': '清华大学出版社'}])
+    body = response.get_json()
+    assert body['code'] == 200, body
+    assert [r['status'] for r in body['data']['results']] == ['created', 'created']
+
+
+def test_batch_rejects_scalar_body(client, auth_headers):
+    response = client.post('/api/v1/textbooks/batch', headers=auth_headers, json='items')
+    body = response.get_json()
+    assert response.status_code == 400
+    assert body['message'] == '请求体必须是 {items: [...]}'
@@ -0,0 +1,55 @@
+"""
+条件GET测试：详情接口的 ETag 只随该行（和关联表）的修改变化
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import update
+from app.dao.base_dao import invalidate_tables
+from app.models import Publisher, TextbookType, Textbook
+
+
+def seed(db):
+    db.session.add(Publisher(publisher_name='高等教育出版社'))
+    db.session.add(TextbookType(type_name='专业课', type_code='ZY'))
+    db.session.flush()
+    db.session.add_all([Textbook(
+        isbn=f'978{i:010d}',
+        textbook_name=f'教材{i}',
+        publisher_id=1,
+        type_id=1,
+        price=Decimal('39.80'),
+        publication_date=date(2020, 1, 1),
+        updated_at=datetime(2024, 1, 1)
+    ) for i in range(2)])
+    db.session.commit()
+
+
+def rename(db, textbook_id, name):
+    """只修改教材表（教材DAO的写操作还会递增库存表的版本）"""
+    db.session.execute(update(Textbook).where(Textbook.textbook_id == textbook_id).values(textbook_name=name))
+    db.session.commit()
+    invalidate_tables('textbook')
+
+
+def get_etag(client, headers, url, etag=None):
+    if etag:
+        headers = dict(headers, **{'If-None-Match': etag})
+    response = client.get(url, headers=headers)
+    return response.status_code, response.headers.get('ETag')
+
+
+def test_detail_etag_ignores_other_rows(db, client, auth_headers):
+    seed(db)
+    status, etag = get_etag(client, auth_headers, '/api/v1/textbooks/1')
+    assert status == 200 and etag
+    
+    rename(db, 2, '其他教材')
+    assert get_etag(client, auth_headers, '/api/v1/textbooks/1', etag)[0] == 304
+    
+    # 同一秒内连续修改该行，ETag 每次都变化
+    rename(db, 1, '修改一次')
+    status, first = get_etag(client, auth_headers, '/api/v1/textbooks/1', etag)
+    assert status == 200 and first != etag
+    rename(db, 1, '修改两次')
+    status, second = get_etag(client, auth_headers, '/api/v1/textbooks/1', first)
+    assert status == 200 and second != first
@@ -0,0 +1,81 @@
+"""
+列表接口的SQL语句数量测试
+同一个列表页无论数据量多少，执行的语句数量应当相同（关联数据预加载，没有逐行懒加载）
+"""
+from datetime import date
+from decimal import Decimal
+import pytest
+from app.models import Publisher, TextbookType, Textbook, Inventory, PurchaseOrder, StockIn, User
+from app.extensions import cache
+from app.utils.query_counter import QueryCounter
+
+N = 5
+PER_PAGE = 100
+
+
+def seed(db, total):
+    """生成 total 本教材，每本教材一条订单和一条入库记录"""
+    db.session.add(User(username='admin', password='admin123', role='管理员'))
+    db.session.add_all([Publisher(publisher_name=f'出版社{i}') for i in range(total)])
+    db.session.add_all([TextbookType(type_name=f'类型{i}', type_code=f'T{i:04d}') for i in range(total)])
+    db.session.flush()
+    db.session.add_all([Textbook(
+        isbn=f'978{i:010d}',
+        textbook_name=f'教材{i}',
+        author='作者',
+        publisher_id=i + 1,
+        type_id=i + 1,
+        price=Decimal('39.80'),
+        publication_date=date(2020, 1, 1)
+    ) for i in range(total)])
+    db.session.flush()
+    db.session.add_all([Inventory(textbook_id=i + 1, current_quantity=10) for i in range(total)])
+    db.session.add_all([PurchaseOrder(
+        order_no=f'PO{i:08d}',
+        textbook_id=i + 1,
+        order_quantity=10,
+        arrived_quantity=10,
+        order_date=date(2024, 1, 1),
+        order_person='admin',
+        order_status='已到货'
+    ) for i in range(total)])
+    db.session.flush()
+    db.session.add_all([StockIn(
+        stock_in_no=f'SI{i:08d}',
+        order_id=i + 1,
+        textbook_id=i + 1,
+        stock_in_quantity=10,
+        actual_quantity=10,
+        stock_in_date=date(2024, 1, 2),
+        warehouse_person='admin'
+    ) for i in range(total)])
+    db.session.commit()
+
+
+def count_statements(client, headers, url):
+    """请求列表页，返回执行的SQL语句数量"""
+    with QueryCounter() as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['code'] == 200, body
+    return counter.count, body
+
+
+@pytest.mark.parametrize('url', [
+    f'/api/v1/textbooks?per_page={PER_PAGE}',
+    f'/api/v1/purchase-orders?per_page={PER_PAGE}',
+    f'/api/v1/stock-ins?per_page={PER_PAGE}',
+])
+def test_list_statement_count_is_constant(db, client, auth_headers, url):
+    counts = []
+    for total in (N, 10 * N):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        cache.clear()
+        seed(db, total)
+        count, body = count_statements(client, auth_headers, url)
+        assert len(body['data']['items']) == total
+        counts.append(count)
+    assert counts[0] == counts[1]
@@ -0,0 +1,77 @@
+"""
+Redis缓存后端测试（使用 fakeredis，未安装 fakeredis 或 lupa 时跳过）
+"""
+import pytest
+from flask import Flask
+from app.utils.cache import Cache
+
+fakeredis = pytest.importorskip('fakeredis')
+pytest.importorskip('lupa')
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    """使用 fakeredis 的 Redis 后端缓存，返回 (缓存, Redis客户端)"""
+    import redis
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    monkeypatch.setattr(redis.Redis, 'from_url', classmethod(lambda cls, url: client))
+    app = Flask(__name__)
+    app.config.update(CACHE_BACKEND='redis', CACHE_DEFAULT_TTL=300, CACHE_KEY_PREFIX='test:')
+    return Cache(app), client
+
+
+def test_get_set(redis_cache):
+    cache, client = redis_cache
+    assert cache.get(('ref:textbook', 1)) is None
+    cache.set(('ref:textbook', 1), {'name': '教材'}, ttl=60, tags=('textbook',))
+    assert cache.get(('ref:textbook', 1)) == {'name': '教材'}
+    key = cache.backend._key(('ref:textbook', 1))
+    assert 0 < client.ttl(key) <= 60
+
+
+def test_invalidate_tags(redis_cache):
+    cache, client = redis_cache
+    cache.set('a', 1, tags=('textbook',))
+    cache.set('b', 2, tags=('textbook', 'publisher'))
+    cache.set('c', 3, tags=('publisher',))
+    cache.invalidate_tags('textbook')
+    assert cache.get('a') is None
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert not client.exists('test:tag:textbook')
+    assert cache.backend.generations(('textbook', 'publisher')) == (1, 0)
+
+
+def test_tag_set_expires_with_members(redis_cache):
+    cache, client = redis_cache
+    cache.set('short', 1, ttl=10, tags=('textbook',))
+    assert 0 < client.ttl('test:tag:textbook') <= 10
+    # 更长的成员延长集合的过期时间，更短的成员不缩短
+    cache.set('long', 2, ttl=100, tags=('textbook',))
+    assert 10 < client.ttl('test:tag:textbook') <= 100
+    cache.set('shorter', 3, ttl=5, tags=('textbook',))
+    assert 10 < client.ttl('test:tag:textbook') <= 100
+
+
+def test_get_or_set_skips_write_back_after_invalidation(redis_cache):
+    cache, _ = redis_cache
+    
+    def loader():
+        # 读取期间其他进程写入了教材表
+        cache.invalidate_tags('textbook')
+        return 'stale'
+    
+    assert cache.get_or_set('count', loader, tags=('textbook',)) == 'stale'
+    assert cache.get('count') is None
+    assert cache.get_or_set('count', lambda: 'fresh', tags=('textbook',)) == 'fresh'
+    assert cache.get('count') == 'fresh'
+
+
+def test_set_rejects_stale_generations(redis_cache):
+    cache, _ = redis_cache
+    generations = cache.backend.generations(('textbook',))
+    cache.invalidate_tags('textbook')
+    assert cache.backend.set('k', 1, 60, ('textbook',), generations) is False
+    assert cache.get('k') is None
+    assert cache.backend.set('k', 1, 60, ('textbook',), cache.backend.generations(('textbook',))) is True
+    assert cache.get('k') == 1
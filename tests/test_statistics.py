@@ -0,0 +1,35 @@
+"""
+按日期范围统计测试
+"""
+
+
+def by_date(client, headers, start, end, granularity):
+    response = client.get(
+        f'/api/v1/statistics/by-date?start_date={start}&end_date={end}&granularity={granularity}',
+        headers=headers
+    )
+    return response.status_code, response.get_json()
+
+
+def test_rejects_too_many_buckets(client, auth_headers):
+    status, body = by_date(client, auth_headers, '0001-01-01', '9998-12-31', 'day')
+    assert status == 400
+    assert '上限' in body['message']
+
+
+def test_last_representable_period(client, auth_headers):
+    for granularity, count in (('day', 31), ('week', 5), ('month', 1)):
+        status, body = by_date(client, auth_headers, '9999-12-01', '9999-12-31', granularity)
+        assert status == 200, body
+        assert len(body['data']) == count
+        assert body['data'][-1]['end_date'] == '9999-12-31'
+
+
+def test_zero_filled_month_buckets(client, auth_headers):
+    status, body = by_date(client, auth_headers, '2024-01-15', '2024-03-10', 'month')
+    assert status == 200
+    assert [(b['period'], b['start_date'], b['end_date']) for b in body['data']] == [
+        ('2024-01', '2024-01-15', '2024-01-31'),
+        ('2024-02', '2024-02-01', '2024-02-29'),
+        ('2024-03', '2024-03-01', '2024-03-10'),
+    ]
@@ -0,0 +1,36 @@
+"""
+用户写操作测试：登录和目录以外字段的修改不递增用户表版本
+"""
+from app.dao.base_dao import table_versions
+from app.dao.user_dao import UserDAO
+from app.models import User
+
+
+def seed(db):
+    user = User(username='teacher', password='secret123', real_name='张老师', role='教师')
+    db.session.add(user)
+    db.session.commit()
+    return user.user_id
+
+
+def user_version():
+    return table_versions(['user'])['user'][1]
+
+
+def test_login_does_not_bump_user_version(db, client):
+    user_id = seed(db)
+    version = user_version()
+    response = client.post('/api/v1/auth/login', json={'username': 'teacher', 'password': 'secret123'})
+    assert response.get_json()['code'] == 200
+    assert user_version() == version
+    assert db.session.get(User, user_id).last_login is not None
+
+
+def test_update_bumps_version_only_for_directory_fields(db):
+    user_id = seed(db)
+    dao = UserDAO()
+    version = user_version()
+    dao.update(user_id, {'phone': '13800000000'})
+    assert user_version() == version
+    dao.update(user_id, {'role': '普通用户'})
+    assert user_version() == version + 1